@@ -20,19 +20,31 @@ if config_obj.config_file_name is not None:
 target_metadata = SQLModel.metadata
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    # the FTS5 table and its shadow tables are created by search.py's DDL
+    return not (type_ == "table" and reflected and name.startswith("run_fts"))
+
+
 def run_migrations_online():
     db = Database(DATABASE_URL)
     connectable = db.get_engine()
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
         with context.begin_transaction():
             context.run_migrations()
 
 
 if context.is_offline_mode():
     context.configure(
-        url=DATABASE_URL, target_metadata=target_metadata, literal_binds=True
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        include_object=include_object,
     )
     with context.begin_transaction():
         context.run_migrations()
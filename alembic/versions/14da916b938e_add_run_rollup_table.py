@@ -0,0 +1,93 @@
+"""Add run rollup table
+
+Revision ID: 14da916b938e
+Revises: 49d8f4e44581
+Create Date: 2025-03-18 21:06:33.417925
+
+"""
+
+from collections import defaultdict
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "14da916b938e"
+down_revision: Union[str, None] = "49d8f4e44581"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# same keys as db.PERIOD_FORMATS
+PERIOD_FORMATS = {"week": "%Y-%W", "month": "%Y-%m"}
+
+
+def upgrade() -> None:
+    run_rollup = op.create_table(
+        "run_rollup",
+        sa.Column("period", sa.String(), nullable=False),
+        sa.Column("bucket", sa.String(), nullable=False),
+        sa.Column(
+            "run_type",
+            # the runtype enum already exists on PostgreSQL
+            postgresql.ENUM(
+                "EASY",
+                "LONG",
+                "INTERVAL",
+                "TEMPO",
+                "RACE",
+                "RECOVERY",
+                name="runtype",
+                create_type=False,
+            ),
+            nullable=False,
+        ),
+        sa.Column("run_count", sa.Integer(), nullable=False),
+        sa.Column("distance_m", sa.Float(), nullable=False),
+        sa.Column("duration", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("period", "bucket", "run_type"),
+    )
+
+    # backfill in Python so SQLite and PostgreSQL get identical strftime keys
+    run = sa.table(
+        "run",
+        sa.column("date", sa.DateTime()),
+        sa.column("run_type", sa.String()),
+        sa.column("distance_m", sa.Float()),
+        sa.column("duration", sa.Float()),
+    )
+    totals = defaultdict(lambda: [0, 0.0, 0.0])
+    rows = op.get_bind().execute(
+        sa.select(run.c.date, run.c.run_type, run.c.distance_m, run.c.duration)
+    )
+    for date, run_type, distance_m, duration in rows:
+        for period, fmt in PERIOD_FORMATS.items():
+            total = totals[period, date.strftime(fmt), run_type]
+            total[0] += 1
+            total[1] += distance_m or 0.0
+            total[2] += duration
+
+    op.bulk_insert(
+        run_rollup,
+        [
+            {
+                "period": period,
+                "bucket": bucket,
+                "run_type": run_type,
+                "run_count": run_count,
+                "distance_m": distance_m,
+                "duration": duration,
+            }
+            for (period, bucket, run_type), (
+                run_count,
+                distance_m,
+                duration,
+            ) in totals.items()
+        ],
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("run_rollup")
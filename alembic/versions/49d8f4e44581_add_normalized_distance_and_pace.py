@@ -0,0 +1,50 @@
+"""Add normalized distance and pace
+
+Revision ID: 49d8f4e44581
+Revises: 54d1fc3f373c
+Create Date: 2025-03-14 20:41:07.552904
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "49d8f4e44581"
+down_revision: Union[str, None] = "54d1fc3f373c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("run", sa.Column("distance_m", sa.Float(), nullable=True))
+    op.add_column("run", sa.Column("pace_s_per_km", sa.Float(), nullable=True))
+
+    # enum columns store the member names, see the initial migration
+    op.execute(
+        """
+        UPDATE run SET distance_m = distance * CASE
+            WHEN unit = 'MILES' THEN 1609.344 ELSE 1000.0 END
+        """
+    )
+    op.execute(
+        """
+        UPDATE run SET pace_s_per_km = duration * 60 / (distance_m / 1000)
+        WHERE distance_m > 0
+        """
+    )
+
+    op.create_index(op.f("ix_run_distance_m"), "run", ["distance_m"], unique=False)
+    op.create_index(
+        op.f("ix_run_pace_s_per_km"), "run", ["pace_s_per_km"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_run_pace_s_per_km"), table_name="run")
+    op.drop_index(op.f("ix_run_distance_m"), table_name="run")
+    op.drop_column("run", "pace_s_per_km")
+    op.drop_column("run", "distance_m")
@@ -0,0 +1,30 @@
+"""Add run date and type indexes
+
+Revision ID: 54d1fc3f373c
+Revises: 45159dc97be5
+Create Date: 2025-03-10 19:12:44.208311
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "54d1fc3f373c"
+down_revision: Union[str, None] = "45159dc97be5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f("ix_run_date"), "run", ["date"], unique=False)
+    op.create_index(op.f("ix_run_run_type"), "run", ["run_type"], unique=False)
+    op.create_index("ix_run_run_type_date", "run", ["run_type", "date"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_run_run_type_date", table_name="run")
+    op.drop_index(op.f("ix_run_run_type"), table_name="run")
+    op.drop_index(op.f("ix_run_date"), table_name="run")
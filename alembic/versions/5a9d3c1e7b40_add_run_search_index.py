@@ -0,0 +1,41 @@
+"""Add run full-text search index
+
+Revision ID: 5a9d3c1e7b40
+Revises: e41a7c0d9f62
+Create Date: 2025-04-02 19:12:08.431577
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+from running_analyzer.search import PG_SEARCH_INDEX_DDL, SQLITE_FTS_DDL
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5a9d3c1e7b40"
+down_revision: Union[str, None] = "e41a7c0d9f62"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+        # index the runs that are already there
+        op.execute("INSERT INTO run_fts(run_fts) VALUES ('rebuild')")
+    elif dialect == "postgresql":
+        op.execute(PG_SEARCH_INDEX_DDL)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for trigger in ["run_fts_insert", "run_fts_delete", "run_fts_update"]:
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS run_fts")
+    elif dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_run_search")
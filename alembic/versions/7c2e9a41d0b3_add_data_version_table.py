@@ -0,0 +1,33 @@
+"""Add data version table
+
+Revision ID: 7c2e9a41d0b3
+Revises: 14da916b938e
+Create Date: 2025-03-22 10:14:52.901377
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7c2e9a41d0b3"
+down_revision: Union[str, None] = "14da916b938e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # the single row is created by the first write through RunRepository
+    op.create_table(
+        "data_version",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("data_version")
@@ -0,0 +1,151 @@
+"""Add athletes and scope runs and rollups to them
+
+Revision ID: 9c4b2e7f1a38
+Revises: 5a9d3c1e7b40
+Create Date: 2025-04-06 10:21:54.802316
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from running_analyzer.search import SQLITE_FTS_DDL
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c4b2e7f1a38"
+down_revision: Union[str, None] = "5a9d3c1e7b40"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# same name as db.DEFAULT_ATHLETE, the owner of the existing runs
+DEFAULT_ATHLETE = "default"
+
+ATHLETE_INDEXES = {
+    "ix_run_athlete_id_date": ["athlete_id", "date"],
+    "ix_run_athlete_id_run_type_date": ["athlete_id", "run_type", "date"],
+    "ix_run_athlete_id_distance_m": ["athlete_id", "distance_m"],
+    "ix_run_athlete_id_pace_s_per_km": ["athlete_id", "pace_s_per_km"],
+    "ix_run_athlete_id_location": ["athlete_id", "location"],
+}
+
+# the athlete-less indexes the ones above replace
+RUN_INDEXES = {
+    "ix_run_date": ["date"],
+    "ix_run_run_type": ["run_type"],
+    "ix_run_run_type_date": ["run_type", "date"],
+    "ix_run_distance_m": ["distance_m"],
+    "ix_run_pace_s_per_km": ["pace_s_per_km"],
+    "ix_run_location": ["location"],
+}
+
+ROLLUP_COLUMNS = "period, bucket, run_type, run_count, distance_m, duration"
+
+
+def create_run_rollup(*athlete_columns) -> None:
+    op.create_table(
+        "run_rollup",
+        *athlete_columns,
+        sa.Column("period", sa.String(), nullable=False),
+        sa.Column("bucket", sa.String(), nullable=False),
+        sa.Column(
+            "run_type",
+            postgresql.ENUM(
+                "EASY",
+                "LONG",
+                "INTERVAL",
+                "TEMPO",
+                "RACE",
+                "RECOVERY",
+                name="runtype",
+                create_type=False,
+            ),
+            nullable=False,
+        ),
+        sa.Column("run_count", sa.Integer(), nullable=False),
+        sa.Column("distance_m", sa.Float(), nullable=False),
+        sa.Column("duration", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            *(column.name for column in athlete_columns),
+            "period",
+            "bucket",
+            "run_type",
+        ),
+    )
+
+
+def restore_fts_triggers() -> None:
+    # SQLite batch operations recreate the run table, which drops its triggers
+    if op.get_bind().dialect.name == "sqlite":
+        for statement in SQLITE_FTS_DDL[1:]:
+            op.execute(statement)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "athlete",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+    athlete = sa.table(
+        "athlete", sa.column("id", sa.Integer()), sa.column("name", sa.String())
+    )
+    op.bulk_insert(athlete, [{"id": 1, "name": DEFAULT_ATHLETE}])
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("SELECT setval('athlete_id_seq', 1)")
+
+    op.add_column("run", sa.Column("athlete_id", sa.Integer(), nullable=True))
+    op.execute("UPDATE run SET athlete_id = 1")
+    with op.batch_alter_table("run") as batch_op:
+        batch_op.alter_column("athlete_id", existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key(
+            "fk_run_athlete_id", "athlete", ["athlete_id"], ["id"]
+        )
+        for name in RUN_INDEXES:
+            batch_op.drop_index(name)
+        for name, columns in ATHLETE_INDEXES.items():
+            batch_op.create_index(name, columns, unique=False)
+    restore_fts_triggers()
+
+    op.rename_table("run_rollup", "run_rollup_old")
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("ALTER INDEX run_rollup_pkey RENAME TO run_rollup_old_pkey")
+    create_run_rollup(
+        sa.Column(
+            "athlete_id", sa.Integer(), sa.ForeignKey("athlete.id"), nullable=False
+        )
+    )
+    op.execute(
+        f"INSERT INTO run_rollup (athlete_id, {ROLLUP_COLUMNS}) "
+        f"SELECT 1, {ROLLUP_COLUMNS} FROM run_rollup_old"
+    )
+    op.drop_table("run_rollup_old")
+
+
+def downgrade() -> None:
+    op.rename_table("run_rollup", "run_rollup_old")
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("ALTER INDEX run_rollup_pkey RENAME TO run_rollup_old_pkey")
+    create_run_rollup()
+    op.execute(
+        f"INSERT INTO run_rollup ({ROLLUP_COLUMNS}) "
+        "SELECT period, bucket, run_type, sum(run_count), sum(distance_m), "
+        "sum(duration) FROM run_rollup_old GROUP BY period, bucket, run_type"
+    )
+    op.drop_table("run_rollup_old")
+
+    with op.batch_alter_table("run") as batch_op:
+        for name in ATHLETE_INDEXES:
+            batch_op.drop_index(name)
+        for name, columns in RUN_INDEXES.items():
+            batch_op.create_index(name, columns, unique=False)
+        batch_op.drop_constraint("fk_run_athlete_id", type_="foreignkey")
+        batch_op.drop_column("athlete_id")
+    restore_fts_triggers()
+
+    op.drop_table("athlete")
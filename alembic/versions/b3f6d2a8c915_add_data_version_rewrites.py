@@ -0,0 +1,30 @@
+"""Add data version rewrites counter
+
+Revision ID: b3f6d2a8c915
+Revises: 7c2e9a41d0b3
+Create Date: 2025-03-26 19:02:11.418230
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b3f6d2a8c915"
+down_revision: Union[str, None] = "7c2e9a41d0b3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "data_version",
+        sa.Column("rewrites", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("data_version", "rewrites")
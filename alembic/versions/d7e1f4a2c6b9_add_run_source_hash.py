@@ -0,0 +1,41 @@
+"""Add run source hash for idempotent imports
+
+Revision ID: d7e1f4a2c6b9
+Revises: 9c4b2e7f1a38
+Create Date: 2025-04-09 20:14:37.518203
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from running_analyzer.search import SQLITE_FTS_DDL
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d7e1f4a2c6b9"
+down_revision: Union[str, None] = "9c4b2e7f1a38"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("run", sa.Column("source_hash", sa.String(), nullable=True))
+    op.create_index(
+        "ix_run_athlete_id_source_hash",
+        "run",
+        ["athlete_id", "source_hash"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_run_athlete_id_source_hash", table_name="run")
+    # the batch copy SQLite may use drops the run table's FTS triggers
+    with op.batch_alter_table("run") as batch_op:
+        batch_op.drop_column("source_hash")
+    if op.get_bind().dialect.name == "sqlite":
+        for statement in SQLITE_FTS_DDL[1:]:
+            op.execute(statement)
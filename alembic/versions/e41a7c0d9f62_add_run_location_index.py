@@ -0,0 +1,26 @@
+"""Add run location index
+
+Revision ID: e41a7c0d9f62
+Revises: b3f6d2a8c915
+Create Date: 2025-03-29 11:37:45.206114
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e41a7c0d9f62"
+down_revision: Union[str, None] = "b3f6d2a8c915"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f("ix_run_location"), "run", ["location"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_run_location"), table_name="run")
@@ -0,0 +1,34 @@
+"""Add run track table
+
+Revision ID: f2a8c5d1e9b7
+Revises: d7e1f4a2c6b9
+Create Date: 2025-04-12 16:48:03.274915
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f2a8c5d1e9b7"
+down_revision: Union[str, None] = "d7e1f4a2c6b9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "run_track",
+        sa.Column("run_id", sa.Integer(), nullable=False),
+        sa.Column("samples", sa.Integer(), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(["run_id"], ["run.id"]),
+        sa.PrimaryKeyConstraint("run_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("run_track")
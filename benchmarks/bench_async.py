@@ -0,0 +1,92 @@
+"""Compare serial and concurrent (asyncio.gather) dashboard queries on a SQLite file.
+
+python benchmarks/bench_async.py --runs 200000
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from bench_summary import fake_rows
+
+from running_analyzer.async_db import AsyncRunRepository
+from running_analyzer.db import RunRepository
+from running_analyzer.models import RunType
+
+YEARS = [(datetime(year, 1, 1), datetime(year, 12, 31)) for year in (2020, 2021, 2022)]
+
+
+def dashboard_queries(repo):
+    """The dashboard's independent queries, as calls or coroutines."""
+    return [
+        *(repo.list_runs_by_type(run_type) for run_type in RunType),
+        *(repo.list_runs_by_date_range(start, end) for start, end in YEARS),
+        repo.get_run_stats(),
+        repo.weekly_summary(start_date=YEARS[0][0]),
+        repo.monthly_summary(),
+    ]
+
+
+async def serial(repo):
+    return [await query for query in dashboard_queries(repo)]
+
+
+async def concurrent(repo):
+    return await asyncio.gather(*dashboard_queries(repo))
+
+
+async def best_of(fn, repo, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn(repo)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+async def async_timings(url: str, repeat: int) -> tuple[float, float]:
+    async with AsyncRunRepository(url) as repo:
+        await concurrent(repo)  # warm up the pool
+        return (
+            await best_of(serial, repo, repeat),
+            await best_of(concurrent, repo, repeat),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        repo = RunRepository(url, create_db=True, cache_size=0)
+        repo.bulk_insert_runs(fake_rows(args.runs), batch_size=5000)
+
+        sync = min(
+            _elapsed(lambda: dashboard_queries(repo)) for _ in range(args.repeat)
+        )
+        serial_time, concurrent_time = asyncio.run(async_timings(url, args.repeat))
+
+        queries = len(dashboard_queries(repo))
+        print(f"{args.runs} runs, {queries} queries, best of {args.repeat}")
+        print(f"  {'RunRepository, serial':<34} {sync * 1000:10.1f} ms")
+        print(f"  {'AsyncRunRepository, serial':<34} {serial_time * 1000:10.1f} ms")
+        print(f"  {'AsyncRunRepository, gather':<34} {concurrent_time * 1000:10.1f} ms")
+        print(f"  speedup over serial {serial_time / concurrent_time:.1f}x")
+
+        repo.db.engine.dispose()
+
+
+def _elapsed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
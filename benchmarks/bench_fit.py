@@ -0,0 +1,133 @@
+"""Compare the columnar FIT decoder against fitparse's per-record dicts.
+
+python benchmarks/bench_fit.py --hours 4
+"""
+
+import argparse
+import math
+import struct
+import time
+
+from running_analyzer.fit import (
+    FIT_EPOCH,
+    SUMMARY_FIELDS,
+    read_fit_columns,
+    summarize_fit_columns,
+)
+from running_analyzer.utils import parse_fit_file, summarize_fit_data
+
+FIT_FILE = "data/Morning_Run.fit"
+
+CRC_TABLE = [
+    0x0000, 0xCC01, 0xD801, 0x1400, 0xF001, 0x3C00, 0x2800, 0xE401,
+    0xA001, 0x6C00, 0x7800, 0xB401, 0x5000, 0x9C01, 0x8801, 0x4400,
+]  # fmt: skip
+
+# timestamp, position_lat, position_long, enhanced_altitude, heart_rate,
+# cadence, distance, enhanced_speed
+RECORD_FIELDS = [
+    (253, 4, 0x86),
+    (0, 4, 0x85),
+    (1, 4, 0x85),
+    (78, 4, 0x86),
+    (3, 1, 0x02),
+    (4, 1, 0x02),
+    (5, 4, 0x86),
+    (73, 4, 0x86),
+]
+
+
+def crc(data: bytes) -> int:
+    value = 0
+    for byte in data:
+        for nibble in (byte & 0xF, byte >> 4):
+            tmp = CRC_TABLE[value & 0xF]
+            value = (value >> 4) & 0x0FFF
+            value ^= tmp ^ CRC_TABLE[nibble]
+    return value
+
+
+def synthetic_fit(seconds: int) -> bytes:
+    """A 1 Hz activity of ``seconds`` record messages, CRC included so
+    fitparse accepts it."""
+    messages = [
+        struct.pack("<BBBHB", 0x40, 0, 0, 20, len(RECORD_FIELDS)),
+        *(struct.pack("BBB", *field) for field in RECORD_FIELDS),
+    ]
+    start = 1740816000 - FIT_EPOCH
+    for second in range(seconds):
+        speed = 3 + math.sin(second / 60)
+        messages.append(
+            struct.pack(
+                "<BIiiIBBII",
+                0,
+                start + second,
+                int(51.5 / 180 * 2**31) + second * 10,
+                int(-0.1 / 180 * 2**31) + second * 7,
+                int((30 + 5 * math.sin(second / 300) + 500) * 5),
+                140 + second % 20,
+                85,
+                int(second * 3 * 100),
+                int(speed * 1000),
+            )
+        )
+    data = b"".join(messages)
+    header = struct.pack("<BBHI4s", 14, 0x10, 2100, len(data), b".FIT")
+    header += struct.pack("<H", crc(header))
+    return header + data + struct.pack("<H", crc(header + data))
+
+
+def timed(label: str, fn, repeat: int) -> float:
+    best = min(_elapsed(fn) for _ in range(repeat))
+    print(f"  {label:<42} {best * 1000:10.2f} ms")
+    return best
+
+
+def _elapsed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def compare(data: bytes, repeat: int) -> None:
+    # the dict path's average_speed ignores enhanced_speed
+    summaries = [
+        summarize_fit_columns(read_fit_columns(data, SUMMARY_FIELDS)),
+        summarize_fit_data(parse_fit_file(data)),
+    ]
+    for summary in summaries:
+        del summary["average_speed"]
+    assert summaries[0] == summaries[1]
+    records = timed(
+        "parse_fit_file + summarize_fit_data",
+        lambda: summarize_fit_data(parse_fit_file(data)),
+        repeat,
+    )
+    timed("read_fit_columns (all fields)", lambda: read_fit_columns(data), repeat)
+    columns = timed(
+        "read_fit_columns + summarize_fit_columns",
+        lambda: summarize_fit_columns(read_fit_columns(data, SUMMARY_FIELDS)),
+        repeat,
+    )
+    print(f"  speedup {records / columns:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=float, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(FIT_FILE, "rb") as file:
+        data = file.read()
+    print(f"{FIT_FILE} ({len(data)} bytes), best of {args.repeat}")
+    compare(data, args.repeat)
+
+    seconds = int(args.hours * 3600)
+    data = synthetic_fit(seconds)
+    print(f"synthetic {seconds} records at 1 Hz ({len(data)} bytes)")
+    compare(data, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Compare the fused summary statistics against the separate per-stat calls.
+
+python benchmarks/bench_summary.py --runs 200000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from running_analyzer.db import RunRepository
+from running_analyzer.models import DistanceUnit, Run, RunType
+
+
+def fake_rows(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    for i in range(count):
+        distance = round(rng.uniform(2, 25), 2)
+        yield (
+            Run(
+                date=start + timedelta(hours=6 * i),
+                distance=distance,
+                unit=rng.choice(list(DistanceUnit)),
+                duration=round(distance * rng.uniform(5, 11)),
+                run_type=rng.choice(list(RunType)),
+            )
+            .normalize()
+            .model_dump(exclude={"id"})
+        )
+
+
+def timed(label: str, fn, repeat: int) -> float:
+    best = min(_elapsed(fn) for _ in range(repeat))
+    print(f"  {label:<38} {best * 1000:10.1f} ms")
+    return best
+
+
+def _elapsed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def separate_model_calls(runs):
+    return (
+        Run.summarize_runs(runs),
+        Run.best_run(runs),
+        Run.longest_run(runs),
+        Run.shortest_run(runs),
+        Run.slowest_run(runs),
+        Run.run_type_distribution(runs),
+    )
+
+
+def separate_repo_calls(repo):
+    return (
+        repo.summarize_runs(),
+        repo.get_best_run(),
+        repo.get_longest_run(),
+        repo.get_shortest_run(),
+        repo.get_slowest_run(),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = RunRepository(f"sqlite:///{Path(tmp) / 'bench.db'}", create_db=True)
+        repo.bulk_insert_runs(fake_rows(args.runs), batch_size=5000)
+        runs = repo.list_runs()
+
+        print(f"{args.runs} runs, best of {args.repeat}")
+        print("in memory:")
+        separate = timed(
+            "separate Run classmethods", lambda: separate_model_calls(runs), args.repeat
+        )
+        fused = timed("Run.run_stats", lambda: Run.run_stats(runs), args.repeat)
+        print(f"  speedup {separate / fused:.1f}x")
+
+        print("database:")
+        original = timed(
+            "list_runs + Run classmethods",
+            lambda: separate_model_calls(repo.list_runs()),
+            args.repeat,
+        )
+        timed(
+            "summarize_runs + get_*_run (no types)",
+            lambda: separate_repo_calls(repo),
+            args.repeat,
+        )
+        fused = timed("get_run_stats", repo.get_run_stats, args.repeat)
+        print(f"  speedup {original / fused:.1f}x")
+
+        repo.db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
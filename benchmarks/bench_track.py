@@ -0,0 +1,57 @@
+"""Compare stored run tracks against keeping and re-parsing the .fit files.
+
+python benchmarks/bench_track.py --hours 4
+"""
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from bench_fit import FIT_FILE, synthetic_fit, timed
+from running_analyzer.db import RunRepository
+from running_analyzer.fit import read_fit_columns
+from running_analyzer.fit_import import fit_data_row
+from running_analyzer.models import DistanceUnit, RunType
+from running_analyzer.track import decode_track
+from running_analyzer.utils import parse_fit_file
+
+
+def compare(repo: RunRepository, data: bytes, repeat: int) -> None:
+    row = fit_data_row(data, DistanceUnit.KILOMETERS, RunType.EASY)
+    blob = row["track"]["data"]
+    print(
+        f"  track {len(blob)} bytes for {row['track']['samples']} samples, "
+        f"{len(blob) / len(data):.1%} of the .fit file"
+    )
+    repo.bulk_insert_runs([row])
+    run_id = repo.count_runs()
+
+    fitparse = timed("parse_fit_file (fitparse)", lambda: parse_fit_file(data), repeat)
+    timed("read_fit_columns", lambda: read_fit_columns(data), repeat)
+    timed("decode_track", lambda: decode_track(blob), repeat)
+    track = timed("get_run_track", lambda: repo.get_run_track(run_id), repeat)
+    print(f"  speedup over fitparse {fitparse / track:.0f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=float, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = RunRepository(f"sqlite:///{Path(tmp) / 'bench.db'}", create_db=True)
+
+        with open(FIT_FILE, "rb") as file:
+            data = file.read()
+        print(f"{FIT_FILE} ({len(data)} bytes), best of {args.repeat}")
+        compare(repo, data, args.repeat)
+
+        seconds = int(args.hours * 3600)
+        data = synthetic_fit(seconds)
+        print(f"synthetic {seconds} records at 1 Hz ({len(data)} bytes)")
+        compare(repo, data, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
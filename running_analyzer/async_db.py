@@ -0,0 +1,287 @@
+from datetime import datetime
+from typing import AsyncIterator, Optional
+import numpy as np
+from decouple import config
+from sqlalchemy import make_url
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from running_analyzer.db import (
+    DEFAULT_ATHLETE,
+    Database,
+    add_sqlite_pragmas,
+    display_unit_statement,
+    first_run_statement,
+    page_statement,
+    period_from_rows,
+    period_statement,
+    pool_options,
+    run_filters,
+    run_stats_from_rows,
+    run_stats_statements,
+    summary_from_totals,
+    summary_statement,
+)
+from running_analyzer.frame import FRAME_COLUMNS, RunFrame
+from running_analyzer.search import search_statement
+from running_analyzer.models import Athlete, DataVersion, DistanceUnit, Run, RunTrack
+from running_analyzer.track import decode_track
+
+
+# asyncio driver per backend, used when the URL names a blocking one
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+ASYNC_CAPABLE = {"aiosqlite", "asyncpg", "psycopg"}
+
+
+def async_database_url(database_url: str) -> URL:
+    """``database_url`` with its driver swapped for the asyncio one, e.g.
+    ``postgresql+psycopg2://`` becomes ``postgresql+asyncpg://``."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend in ASYNC_DRIVERS and url.get_driver_name() not in ASYNC_CAPABLE:
+        url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    return url
+
+
+class AsyncRunRepository:
+    """RunRepository's queries on SQLAlchemy's asyncio extension.
+
+    Every call checks out its own pooled connection, so independent queries
+    can be awaited together with ``asyncio.gather``. Results match the
+    RunRepository methods of the same name; writes and the query cache stay
+    on RunRepository. An async engine belongs to one event loop, so each
+    repository owns its engine: use it as an async context manager or call
+    ``dispose()`` when done. An athlete that does not exist yet has no runs;
+    RunRepository creates it on first use.
+    """
+
+    def __init__(
+        self,
+        database_url: str | None = None,
+        *,
+        debug: bool | None = None,
+        athlete: str | None = None,
+    ):
+        self.database_url = database_url or Database.get_default_database_url()
+        self.athlete = athlete or config("ATHLETE", default=DEFAULT_ATHLETE)
+        self._athlete_id = None
+        self.debug = (
+            debug if debug is not None else config("ECHO", default=False, cast=bool)
+        )
+        url = async_database_url(self.database_url)
+        if url.get_backend_name() == "sqlite":
+            self.engine: AsyncEngine = create_async_engine(url, echo=self.debug)
+            add_sqlite_pragmas(self.engine.sync_engine, url)
+        else:
+            self.engine = create_async_engine(url, echo=self.debug, **pool_options())
+
+    async def __aenter__(self) -> "AsyncRunRepository":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.dispose()
+
+    async def dispose(self) -> None:
+        await self.engine.dispose()
+
+    def session(self) -> AsyncSession:
+        return AsyncSession(self.engine, expire_on_commit=False)
+
+    @property
+    def dialect(self) -> str:
+        return self.engine.dialect.name
+
+    async def athlete_id(self) -> int | None:
+        if self._athlete_id is None:
+            async with self.session() as session:
+                statement = select(Athlete.id).where(Athlete.name == self.athlete)
+                self._athlete_id = (await session.exec(statement)).first()
+        return self._athlete_id
+
+    async def _scoped(self, filters: dict) -> dict:
+        # -1 matches no runs, for an athlete not created yet
+        return {**filters, "athlete_id": await self.athlete_id() or -1}
+
+    async def data_version(self) -> int:
+        return (await self.data_versions())[0]
+
+    async def data_versions(self) -> tuple[int, int]:
+        async with self.session() as session:
+            statement = select(DataVersion.version, DataVersion.rewrites)
+            row = (await session.exec(statement)).first()
+            return tuple(row) if row else (0, 0)
+
+    async def get_run_by_id(self, run_id: int) -> Optional[Run]:
+        athlete_id = await self.athlete_id()
+        async with self.session() as session:
+            run = await session.get(Run, run_id)
+        return run if run is not None and run.athlete_id == athlete_id else None
+
+    async def get_run_track(self, run_id: int) -> Optional[dict[str, np.ndarray]]:
+        statement = (
+            select(RunTrack.data)
+            .join(Run, Run.id == RunTrack.run_id)
+            .where(RunTrack.run_id == run_id, Run.athlete_id == await self.athlete_id())
+        )
+        async with self.session() as session:
+            data = (await session.exec(statement)).first()
+        return None if data is None else decode_track(data)
+
+    async def list_runs(self) -> list[Run]:
+        statement = (
+            select(Run).where(*run_filters(**await self._scoped({}))).order_by(Run.id)
+        )
+        async with self.session() as session:
+            return (await session.exec(statement)).all()
+
+    async def iter_runs(
+        self,
+        batch_size: int = 1000,
+        *,
+        limit: int | None = None,
+        after_date: datetime | None = None,
+        after_id: int | None = None,
+        desc: bool = False,
+        **filters,
+    ) -> AsyncIterator[Run]:
+        """Stream runs in date order, see ``RunRepository.iter_runs``."""
+        filters = await self._scoped(filters)
+        async with self.session() as session:
+            if after_id is not None and after_date is None:
+                statement = select(Run.date).where(
+                    Run.id == after_id,
+                    Run.athlete_id == filters["athlete_id"],
+                )
+                after_date = (await session.exec(statement)).first()
+                if after_date is None:
+                    raise ValueError(f"Run with ID {after_id} not found.")
+
+            statement = page_statement(
+                limit=limit,
+                after_date=after_date,
+                after_id=after_id,
+                desc=desc,
+                **filters,
+            ).execution_options(yield_per=batch_size)
+            async for run in await session.stream_scalars(statement):
+                yield run
+
+    async def list_runs_page(self, limit: int = 50, **kwargs) -> list[Run]:
+        return [
+            run async for run in self.iter_runs(batch_size=limit, limit=limit, **kwargs)
+        ]
+
+    async def load_frame(
+        self, batch_size: int = 10000, *, after_id: int | None = None, **filters
+    ) -> RunFrame:
+        conditions = run_filters(**await self._scoped(filters))
+        if after_id is not None:
+            conditions.append(Run.id > after_id)
+        statement = (
+            select(*(getattr(Run, column) for column in FRAME_COLUMNS))
+            .where(*conditions)
+            .order_by(Run.date, Run.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async with self.session() as session:
+            result = await session.stream(statement)
+            return RunFrame.concat(
+                [RunFrame.from_rows(rows) async for rows in result.partitions()]
+            )
+
+    async def count_runs(self, **filters) -> int:
+        statement = select(func.count(Run.id)).where(
+            *run_filters(**await self._scoped(filters))
+        )
+        async with self.session() as session:
+            return (await session.exec(statement)).one()
+
+    async def list_runs_by_type(self, run_type: str) -> list[Run]:
+        statement = select(Run).where(
+            *run_filters(**await self._scoped({"run_type": run_type}))
+        )
+        async with self.session() as session:
+            return (await session.exec(statement)).all()
+
+    async def list_runs_by_date_range(
+        self, start_date: datetime, end_date: datetime
+    ) -> list[Run]:
+        filters = {"start_date": start_date, "end_date": end_date}
+        statement = select(Run).where(*run_filters(**await self._scoped(filters)))
+        async with self.session() as session:
+            return (await session.exec(statement)).all()
+
+    async def search_runs(
+        self, terms: str, limit: int = 20, **filters
+    ) -> list[tuple[Run, float]]:
+        if not terms.strip(" *"):
+            raise ValueError("Nothing to search for.")
+
+        conditions = run_filters(**await self._scoped(filters))
+        statement = search_statement(terms, self.dialect, conditions).limit(limit)
+        async with self.session() as session:
+            return [tuple(row) for row in await session.exec(statement)]
+
+    async def summarize_runs(
+        self, unit: DistanceUnit = DistanceUnit.KILOMETERS, **filters
+    ) -> Optional[dict]:
+        statement = summary_statement(**await self._scoped(filters))
+        async with self.session() as session:
+            totals = (await session.exec(statement)).one()
+        return summary_from_totals(*totals, unit)
+
+    async def period_summary(
+        self, period: str, unit: DistanceUnit = DistanceUnit.KILOMETERS, **filters
+    ) -> dict:
+        statement = period_statement(
+            period, self.dialect, **await self._scoped(filters)
+        )
+        async with self.session() as session:
+            rows = (await session.exec(statement)).all()
+        return period_from_rows(rows, unit)
+
+    async def weekly_summary(
+        self, unit: DistanceUnit = DistanceUnit.KILOMETERS, **filters
+    ) -> dict:
+        return await self.period_summary("week", unit, **filters)
+
+    async def monthly_summary(
+        self, unit: DistanceUnit = DistanceUnit.KILOMETERS, **filters
+    ) -> dict:
+        return await self.period_summary("month", unit, **filters)
+
+    async def get_display_unit(self, **filters) -> Optional[DistanceUnit]:
+        statement = display_unit_statement(**await self._scoped(filters))
+        async with self.session() as session:
+            return (await session.exec(statement)).first()
+
+    async def _first_run(self, stat: str, **filters) -> Optional[Run]:
+        statement = first_run_statement(stat, **await self._scoped(filters))
+        async with self.session() as session:
+            return (await session.exec(statement)).first()
+
+    async def get_best_run(self, **filters) -> Optional[Run]:
+        return await self._first_run("best", **filters)
+
+    async def get_slowest_run(self, **filters) -> Optional[Run]:
+        return await self._first_run("slowest", **filters)
+
+    async def get_longest_run(self, **filters) -> Optional[Run]:
+        return await self._first_run("longest", **filters)
+
+    async def get_shortest_run(self, **filters) -> Optional[Run]:
+        return await self._first_run("shortest", **filters)
+
+    async def get_run_stats(
+        self, unit: DistanceUnit = DistanceUnit.KILOMETERS, **filters
+    ) -> Optional[dict]:
+        statement, type_counts = run_stats_statements(**await self._scoped(filters))
+        async with self.session() as session:
+            row = (await session.exec(statement)).one()
+            if not row[0]:
+                return None
+
+            run_types = (await session.exec(type_counts)).all()
+            runs = (await session.exec(select(Run).where(Run.id.in_(row[3:])))).all()
+        return run_stats_from_rows(row, run_types, runs, unit)
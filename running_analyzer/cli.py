@@ -1,17 +1,43 @@
 import typer
 import plotext as plt
 import numpy as np
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
+from functools import wraps
+from inspect import Parameter, signature
+from itertools import batched, islice
 from pathlib import Path
+from typing import BinaryIO, Iterator
+from zipfile import BadZipFile, ZipFile
 from running_analyzer.db import RunRepository
-from running_analyzer.models import Run, DistanceUnit, RunType
+from running_analyzer.fit_import import (
+    FitImportStats,
+    archive_fit_members,
+    find_fit_files,
+    fit_data_row,
+    import_fit_archive,
+    import_fit_files,
+    is_fit_name,
+    open_fit_stream,
+    read_fit_bytes,
+)
+from running_analyzer.models import Run, DistanceUnit, RunType, METERS_PER_UNIT
+from running_analyzer.query import RunQuery
+from running_analyzer.track import track_splits
+from running_analyzer.snapshot import (
+    FrameRepository,
+    FrameSnapshot,
+    default_snapshot_dir,
+)
 from running_analyzer.utils import (
-    load_runs_from_csv,
+    iter_run_rows,
+    write_runs_to_csv,
+    RejectsWriter,
     display_run_details,
-    summarize_fit_data,
-    parse_fit_file,
+    iter_fit_records,
 )
 from rich.console import Console
+from rich.progress import Progress
 from rich.table import Table
 import json
 
@@ -23,6 +49,130 @@ repo = RunRepository()
 console = Console()
 
 FIT_FILE_EXTENSION = ".fit"
+ZIP_FILE_EXTENSION = ".zip"
+# what reading a corrupt .fit, .fit.gz or .zip raises
+FIT_READ_ERRORS = (ValueError, OSError, EOFError, BadZipFile)
+LIST_BATCH_SIZE = 500
+DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S.%f",
+    "%Y-%m-%d %H:%M:%S",
+]
+
+
+# the RunQuery fields as command options, see query_options
+QUERY_OPTIONS = [
+    Parameter(name, Parameter.KEYWORD_ONLY, annotation=annotation, default=option)
+    for name, annotation, option in [
+        ("run_type", RunType, typer.Option(None, "--type", help="Runs of this type")),
+        (
+            "start_date",
+            datetime,
+            typer.Option(
+                None, "--from", formats=DATE_FORMATS, help="Runs on or after this date"
+            ),
+        ),
+        (
+            "end_date",
+            datetime,
+            typer.Option(
+                None, "--to", formats=DATE_FORMATS, help="Runs on or before this date"
+            ),
+        ),
+        (
+            "min_distance",
+            float,
+            typer.Option(None, "--min-distance", help="Runs at least this long"),
+        ),
+        (
+            "max_distance",
+            float,
+            typer.Option(None, "--max-distance", help="Runs at most this long"),
+        ),
+        (
+            "min_pace",
+            float,
+            typer.Option(None, "--min-pace", help="Runs at this pace or slower"),
+        ),
+        (
+            "max_pace",
+            float,
+            typer.Option(None, "--max-pace", help="Runs at this pace or faster"),
+        ),
+        ("location", str, typer.Option(None, "--location", help="Runs at this place")),
+        (
+            "hr_above",
+            float,
+            typer.Option(None, "--hr-above", help="Runs with a higher heart rate"),
+        ),
+        (
+            "unit",
+            DistanceUnit,
+            typer.Option(
+                DistanceUnit.KILOMETERS.value,
+                "--unit",
+                help="Unit of the distance and pace (min per unit) filters",
+            ),
+        ),
+    ]
+]
+
+
+def query_options(command):
+    """Give a command the run filter options, passed to it as a RunQuery in its
+    ``query`` parameter."""
+    parameters = [
+        parameter
+        for parameter in signature(command).parameters.values()
+        if parameter.name != "query"
+    ]
+
+    @wraps(command)
+    def wrapper(*args, **kwargs):
+        values = {
+            option.name: kwargs.pop(option.name, None) for option in QUERY_OPTIONS
+        }
+        query = RunQuery(
+            **{name: value for name, value in values.items() if value is not None}
+        )
+        return command(*args, query=query, **kwargs)
+
+    wrapper.__signature__ = signature(command).replace(
+        parameters=[*parameters, *QUERY_OPTIONS]
+    )
+    return wrapper
+
+
+@app.callback()
+def main(
+    athlete: str = typer.Option(
+        None,
+        "--athlete",
+        "-a",
+        help="Read and record this athlete's runs [env: ATHLETE, default: default]",
+    ),
+):
+    global repo
+    if athlete is not None and athlete != repo.athlete:
+        repo = RunRepository(athlete=athlete)
+
+
+def snapshot_dir():
+    """The athlete's snapshot location, None before they have any runs."""
+    if repo.athlete_id is None:
+        return None
+    return default_snapshot_dir(repo.db.database_url, repo.athlete_id)
+
+
+def analytics(query: RunQuery | None = None):
+    """The athlete's snapshot, refreshed, once one has been built with the
+    snapshot command, otherwise the database. Filtered queries always go to
+    the database."""
+    path = snapshot_dir()
+    if query or path is None or not FrameSnapshot(path).exists():
+        return repo
+    return FrameRepository(FrameSnapshot(path).refresh(repo))
 
 
 # persistant runninng of app. Need to work more, but doing it REPL style and prompts users for commands.
@@ -46,6 +196,8 @@ def command_loop():
         alias_map = {
             "add-run": ["ar"],
             "list-runs": ["lr"],
+            "query": ["q"],
+            "search": ["s"],
             "update-run": ["ur"],
             "best-run": ["br"],
             "run-stat best": ["rb"],
@@ -53,6 +205,7 @@ def command_loop():
             "run-stat shortest": ["rs"],
             "run-stat slowest": ["rt"],
             "import-data": ["id"],
+            "export-data": ["ed"],
             "summary": ["sum"],
             "avg-pace": ["ap"],
             "weekly-summary": ["ws"],
@@ -61,7 +214,9 @@ def command_loop():
             "plot-pace": ["pp"],
             "plot-weekly-summary": ["pws"],
             "import-fit": ["if"],
+            "import-fit-dir": ["ifd"],
             "list-fit": ["lf"],
+            "splits": ["sp"],
         }
 
         all_aliases = {alias for aliases in alias_map.values() for alias in aliases}
@@ -154,25 +309,187 @@ def add_run():
     )
 
 
-@app.command("list-runs", help="List all runs")
-def list_runs():
-    runs = repo.list_runs()
-    if not runs:
+def runs_table(runs, title: str | None = None, show_header: bool = True) -> Table:
+    # fixed widths so consecutive batches line up
+    table = Table(title=title, show_header=show_header)
+    table.add_column("ID", justify="center", style="cyan", width=8)
+    table.add_column("Date", style="magenta", width=10)
+    table.add_column("Distance", justify="right", style="green", width=12)
+    table.add_column("Duration", justify="right", style="yellow", width=14)
+
+    for run in runs:
+        table.add_row(
+            str(run.id),
+            run.run_date,
+            f"{run.distance} {run.unit_display}",
+            f"{run.duration} mins",
+        )
+
+    return table
+
+
+@app.command("list-runs", help="List all runs, or a page of them with --limit")
+def list_runs(
+    limit: int = typer.Option(None, "--limit", "-n", help="Show at most N runs"),
+    after_id: int = typer.Option(
+        None, "--after-id", help="Start after this run (date, then id order)"
+    ),
+    after_date: datetime = typer.Option(
+        None, "--after-date", formats=DATE_FORMATS, help="Start after this date"
+    ),
+    desc: bool = typer.Option(False, "--desc", help="Newest runs first"),
+):
+    runs = repo.iter_runs(
+        batch_size=min(limit or LIST_BATCH_SIZE, LIST_BATCH_SIZE),
+        limit=limit,
+        after_id=after_id,
+        after_date=after_date,
+        desc=desc,
+    )
+    batches = batched(runs, LIST_BATCH_SIZE)
+    try:
+        batch = next(batches, None)
+    except ValueError as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(code=1)
+
+    if batch is None:
         console.print("No runs found. Go out and run!")
         raise typer.Exit()
 
-    table = Table(title="🏃 Your Runs")
+    shown = 0
+    title = "🏃 Your Runs"
+    while batch is not None:
+        console.print(runs_table(batch, title=title, show_header=shown == 0))
+        shown += len(batch)
+        last = batch[-1]
+        title = None
+        batch = next(batches, None)
+
+    if limit is not None and shown == limit:
+        order = " --desc" if desc else ""
+        typer.echo(
+            f"Next page: list-runs -n {limit}{order} "
+            f"--after-date {last.date.isoformat()} --after-id {last.id}"
+        )
+
+
+@app.command("query", help="List the runs matching the filters")
+@query_options
+def query_runs(
+    query: RunQuery,
+    limit: int = typer.Option(None, "--limit", "-n", help="Show at most N runs"),
+    explain: bool = typer.Option(
+        False, "--explain", help="Show the database's plan for the query instead"
+    ),
+):
+    if explain:
+        for line in repo.explain(query.statement(athlete_id=repo.athlete_id)):
+            typer.echo(line)
+        raise typer.Exit()
+
+    runs = repo.iter_runs(
+        batch_size=min(limit or LIST_BATCH_SIZE, LIST_BATCH_SIZE),
+        limit=limit,
+        **query.filters(),
+    )
+    shown = 0
+    for batch in batched(runs, LIST_BATCH_SIZE):
+        title = "🔎 Matching Runs" if not shown else None
+        console.print(runs_table(batch, title=title, show_header=not shown))
+        shown += len(batch)
+
+    if not shown:
+        console.print("No runs match the filters.")
+    else:
+        typer.echo(f"{shown} runs")
+
+
+@app.command("search", help="Search run notes and locations, best match first")
+@query_options
+def search_runs(
+    query: RunQuery,
+    terms: str = typer.Argument(..., help='Words to match, "word*" for a prefix'),
+    limit: int = typer.Option(20, "--limit", "-n", help="Show at most N runs"),
+):
+    try:
+        results = repo.search_runs(terms, limit=limit, **query.filters())
+    except ValueError as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(code=1)
+
+    if not results:
+        console.print("No runs match the search.")
+        raise typer.Exit()
+
+    table = Table(title=f"🔎 Runs matching '{terms}'")
     table.add_column("ID", justify="center", style="cyan")
     table.add_column("Date", style="magenta")
     table.add_column("Distance", justify="right", style="green")
-    table.add_column("Duration", justify="right", style="yellow")
+    table.add_column("Location", style="blue")
+    table.add_column("Notes")
+    table.add_column("Rank", justify="right", style="yellow")
 
-    for run in runs:
+    for run, rank in results:
         table.add_row(
             str(run.id),
             run.run_date,
             f"{run.distance} {run.unit_display}",
-            f"{run.duration} mins",
+            run.location or "",
+            run.notes or "",
+            f"{rank:.2f}",
+        )
+
+    console.print(table)
+
+
+def format_seconds(seconds: float) -> str:
+    seconds = round(seconds)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return (
+        f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+    )
+
+
+@app.command("splits", help="Splits of a run imported from a .fit file")
+def splits(
+    run_id: int,
+    unit: DistanceUnit = typer.Option(
+        None, "--unit", "-u", help="Split length (default: the run's unit)"
+    ),
+):
+    run = repo.get_run_by_id(run_id)
+    if run is None:
+        typer.echo(f"Error: Run {run_id} not found.", err=True)
+        raise typer.Exit(code=1)
+
+    # the samples are only read now, never when listing runs
+    track = repo.get_run_track(run_id)
+    if track is None:
+        typer.echo(f"Run {run_id} has no samples, only .fit imports keep them.")
+        raise typer.Exit()
+
+    unit = DistanceUnit(unit or run.unit)
+    split_m = METERS_PER_UNIT[unit]
+    table = Table(title=f"⏱️ Splits of run {run_id} ({run.run_date})")
+    table.add_column("Split", justify="center", style="cyan")
+    table.add_column("Distance", justify="right", style="green")
+    table.add_column("Time", justify="right")
+    table.add_column("Pace", justify="right", style="yellow")
+    table.add_column("Avg HR", justify="right", style="red")
+    table.add_column("Elevation Gain", justify="right", style="blue")
+
+    for split in track_splits(track, split_m):
+        distance = split["distance_m"] / split_m
+        heart_rate = split["heart_rate"]
+        table.add_row(
+            str(split["split"]),
+            f"{distance:.2f} {unit.value}",
+            format_seconds(split["duration_s"]),
+            f"{format_seconds(split['duration_s'] / distance)} /{unit.value}",
+            "" if heart_rate is None else f"{heart_rate:.0f}",
+            f"{split['elevation_gain']:.0f} m",
         )
 
     console.print(table)
@@ -206,30 +523,142 @@ def update_run(run_id: int):
         "notes": typer.prompt("New notes", default=run.notes),
     }
 
-    repo.update_run(run, **updated_data)
+    updated_data["date"] = datetime.fromisoformat(updated_data["date"])
+    repo.update_run(run_id, **updated_data)
     typer.echo(f"Run {run_id} updated successfully!")
 
 
+def with_ids(query: RunQuery, min_id: int | None, max_id: int | None) -> dict:
+    """The query's filters plus an id range, for picking out one import."""
+    ids = {"min_id": min_id, "max_id": max_id}
+    return {
+        **query.filters(),
+        **{name: value for name, value in ids.items() if value is not None},
+    }
+
+
+@app.command("update-runs", help="Set fields on every run matching the filters")
+@query_options
+def update_runs(
+    query: RunQuery,
+    min_id: int = typer.Option(None, "--min-id", help="Only runs with id >= N"),
+    max_id: int = typer.Option(None, "--max-id", help="Only runs with id <= N"),
+    set_type: RunType = typer.Option(None, "--set-type", help="New run type"),
+    set_location: str = typer.Option(None, "--set-location", help="New location"),
+    set_notes: str = typer.Option(None, "--set-notes", help="New notes"),
+    dry_run: bool = typer.Option(
+        False, "--dry-run", help="Only count the runs that would change"
+    ),
+):
+    filters = with_ids(query, min_id, max_id)
+    values = {
+        name: value
+        for name, value in {
+            "run_type": set_type,
+            "location": set_location,
+            "notes": set_notes,
+        }.items()
+        if value is not None
+    }
+    if not values:
+        typer.echo(
+            "Error: nothing to set, use --set-type, --set-location or --set-notes"
+        )
+        raise typer.Exit(code=1)
+
+    if dry_run:
+        typer.echo(f"{repo.count_runs(**filters)} runs would be updated.")
+        raise typer.Exit()
+
+    updated = repo.update_runs(filters, **values)
+    typer.echo(f"✅ Updated {updated} runs.")
+
+
+@app.command("delete-runs", help="Delete every run matching the filters")
+@query_options
+def delete_runs(
+    query: RunQuery,
+    min_id: int = typer.Option(None, "--min-id", help="Only runs with id >= N"),
+    max_id: int = typer.Option(None, "--max-id", help="Only runs with id <= N"),
+    dry_run: bool = typer.Option(
+        False, "--dry-run", help="Only count the runs that would be deleted"
+    ),
+    yes: bool = typer.Option(False, "--yes", "-y", help="Do not ask to confirm"),
+):
+    filters = with_ids(query, min_id, max_id)
+    if not filters:
+        typer.echo("Error: give at least one filter, e.g. --min-id 1 for every run")
+        raise typer.Exit(code=1)
+
+    count = repo.count_runs(**filters)
+    if dry_run:
+        typer.echo(f"{count} runs would be deleted.")
+        raise typer.Exit()
+
+    if count and not yes and not typer.confirm(f"Delete {count} runs?"):
+        raise typer.Exit()
+
+    deleted = repo.delete_runs(filters)
+    typer.echo(f"🗑️ Deleted {deleted} runs.")
+
+
 @app.command("import-data", help="Import running data from CSV")
-def import_data(csv_file: str):
-    runs_to_add = load_runs_from_csv(csv_file)
+def import_data(
+    csv_file: str,
+    batch_size: int = typer.Option(
+        1000, "--batch-size", "-b", help="Rows inserted and committed per batch"
+    ),
+    skip_rows: int = typer.Option(
+        0,
+        "--skip-rows",
+        help="Skip valid rows already imported by a previous, failed run",
+    ),
+    rejects_file: str = typer.Option(
+        None,
+        "--rejects",
+        help="CSV file for rejected rows (default: <csv_file>.rejects.csv)",
+    ),
+):
+    rejects_path = rejects_file or Path(csv_file).with_suffix(".rejects.csv")
 
-    with repo.session() as session:
-        session.add_all(runs_to_add)
-        session.commit()
-        typer.echo(f"✅ Imported {len(runs_to_add)} runs into the database.")
+    with RejectsWriter(rejects_path) as rejects:
+        rows = iter_run_rows(csv_file, rejects)
+        stats = repo.bulk_insert_runs(rows, batch_size=batch_size, skip=skip_rows)
+        stats.rejected = rejects.count
+
+    typer.echo(
+        f"✅ Imported {stats.inserted} new runs into the database in "
+        f"{stats.elapsed:.2f}s ({stats.rows_per_second:.0f} rows/s), "
+        f"skipped {stats.skipped} already imported."
+    )
+    if stats.rejected:
+        typer.echo(f"⚠️  Rejected {stats.rejected} invalid rows, see {rejects_path}")
+
+    if stats.failed_at is not None:
+        typer.echo(f"Error: batch failed: {stats.error}", err=True)
+        typer.echo(f"Resume with: --skip-rows {stats.failed_at}", err=True)
+        raise typer.Exit(code=1)
+
+
+@app.command("export-data", help="Export all runs to CSV")
+def export_data(csv_file: str):
+    count = write_runs_to_csv(repo.iter_runs(), csv_file)
+    typer.echo(f"✅ Exported {count} runs to {csv_file}.")
 
 
 @app.command("summary", help="Summary of all runs")
-def summary():
-    runs = repo.list_runs()
+@query_options
+def summary(query: RunQuery):
+    filters = query.filters()
+    source = analytics(query)
+    unit = source.get_display_unit(**filters)
 
-    if not runs:
+    if unit is None:
         typer.echo("no runs found in the database")
         raise typer.Exit()
 
-    summary = Run.summarize_runs(runs)
-    unit = runs[0].unit_display if runs else "unit"
+    summary = source.get_run_stats(unit, **filters)
+    unit = unit.value
 
     typer.echo("🏃‍♂️ Run Summary:")
     typer.echo(f"  Total Runs: {summary['total_runs']}")
@@ -239,59 +668,67 @@ def summary():
     typer.echo(f"  Average Duration: {summary['avg_duration']:.2f} mins")
     typer.echo(f"  Average Pace: {summary['avg_pace']:.2f} min per {unit}")
 
-    best = Run.best_run(runs)
-    longest = Run.longest_run(runs)
-    shortest = Run.shortest_run(runs)
-    slowest = Run.slowest_run(runs)
+    best = summary["best_run"]
+    longest = summary["longest_run"]
+    shortest = summary["shortest_run"]
+    slowest = summary["slowest_run"]
 
     if best:
         typer.echo("\n🏆 Best Run:")
         typer.echo(
-            f"  {best.run_date}: {best.distance:.2f} {unit} in {best.duration:.2f} mins (Pace: {best.calculated_pace:.2f})"
+            f"  {best.run_date}: {best.distance:.2f} {best.unit_display} in {best.duration:.2f} mins (Pace: {best.calculated_pace:.2f})"
         )
 
     if longest:
         typer.echo("\n📏 Longest Run:")
-        typer.echo(f"  {longest.run_date}: {longest.distance:.2f} {unit}")
+        typer.echo(
+            f"  {longest.run_date}: {longest.distance:.2f} {longest.unit_display}"
+        )
 
     if shortest:
         typer.echo("\n📉 Shortest Run:")
-        typer.echo(f"  {shortest.run_date}: {shortest.distance:.2f} {unit}")
+        typer.echo(
+            f"  {shortest.run_date}: {shortest.distance:.2f} {shortest.unit_display}"
+        )
 
     if slowest:
         typer.echo("\n🐢 Slowest Run:")
         typer.echo(
-            f"  {slowest.run_date}: Pace of {slowest.calculated_pace:.2f} min/{unit}"
+            f"  {slowest.run_date}: Pace of {slowest.calculated_pace:.2f} min/{slowest.unit_display}"
         )
 
+    typer.echo("\n🏷️ Run Types:")
+    for run_type, count in summary["run_types"].items():
+        typer.echo(f"  {run_type.value}: {count}")
+
 
 @app.command("avg-pace", help="Average pace overall")
-def avg_pace():
-    runs = repo.list_runs()
+@query_options
+def avg_pace(query: RunQuery):
+    filters = query.filters()
+    source = analytics(query)
+    unit = source.get_display_unit(**filters)
 
-    if not runs:
+    if unit is None:
         typer.echo("No runs found in the database")
         raise typer.Exit()
 
-    pace = Run.average_pace(runs)
-
-    sample_run = runs[0]
-    typer.echo(f"Average Pace: {pace:.2f} min per {sample_run.unit_display}")
+    summary = source.summarize_runs(unit, **filters)
+    typer.echo(f"Average Pace: {summary['avg_pace']:.2f} min per {unit.value}")
 
 
 @app.command("weekly-summary", help="Show weekly running summary")
-def weekly_summary():
-    runs = repo.list_runs()
-    if not runs:
+@query_options
+def weekly_summary(query: RunQuery):
+    filters = query.filters()
+    source = analytics(query)
+    unit = source.get_display_unit(**filters)
+    if unit is None:
         typer.echo("No runs found in the database")
         raise typer.Exit()
 
-    weekly_data = Run.weekly_summary(runs)
-    unit = runs[0].unit_display if runs else "unit"
-
-    sorted_weeks = sorted(
-        weekly_data.items(), key=lambda x: tuple(map(int, x[0].split("-")))
-    )
+    weekly_data = source.weekly_summary(unit, **filters)
+    unit = unit.value
 
     table = Table(title="📅 Weekly Running Summary")
     table.add_column("Week", justify="center", style="cyan")
@@ -299,7 +736,7 @@ def weekly_summary():
     table.add_column("Total Duration", justify="right", style="yellow")
     table.add_column("Average Pace", justify="right", style="magenta")
 
-    for week, data in sorted_weeks:
+    for week, data in weekly_data.items():
         table.add_row(
             week,
             f"{data['total_distance']:.2f} {unit}",
@@ -311,18 +748,17 @@ def weekly_summary():
 
 
 @app.command("monthly-summary", help="Show weekly running summary")
-def monthly_summary():
-    runs = repo.list_runs()
-    if not runs:
+@query_options
+def monthly_summary(query: RunQuery):
+    filters = query.filters()
+    source = analytics(query)
+    unit = source.get_display_unit(**filters)
+    if unit is None:
         typer.echo("No runs found in the database")
         raise typer.Exit()
 
-    monthly_data = Run.monthly_summary(runs)
-    unit = runs[0].unit_display if runs else "unit"
-
-    sorted_months = sorted(
-        monthly_data.items(), key=lambda x: tuple(map(int, x[0].split("-")))
-    )
+    monthly_data = source.monthly_summary(unit, **filters)
+    unit = unit.value
 
     table = Table(title="📅 Monthly Running Summary")
     table.add_column("Month", justify="center", style="cyan")
@@ -330,7 +766,7 @@ def monthly_summary():
     table.add_column("Total Duration", justify="right", style="yellow")
     table.add_column("Average Pace", justify="right", style="magenta")
 
-    for month, data in sorted_months:
+    for month, data in monthly_data.items():
         table.add_row(
             month,
             f"{data['total_distance']:.2f} {unit}",
@@ -345,17 +781,14 @@ def monthly_summary():
     "run-stat",
     help="Show details of a specific run stat (longest (rl), shortest (rs), slowest (rt), best (rb))",
 )
-def run_stat(stat: str):
-    runs = repo.list_runs()
-    if not runs:
-        typer.echo("No runs found in database")
-        raise typer.Exit()
-
+@query_options
+def run_stat(stat: str, query: RunQuery):
+    source = analytics(query)
     stat_map = {
-        "longest": (Run.longest_run, "📏 Longest Run"),
-        "shortest": (Run.shortest_run, "📉 Shortest Run"),
-        "slowest": (Run.slowest_run, "🐢 Slowest Run"),
-        "best": (Run.best_run, "🏆 Best Run"),
+        "longest": (source.get_longest_run, "📏 Longest Run"),
+        "shortest": (source.get_shortest_run, "📉 Shortest Run"),
+        "slowest": (source.get_slowest_run, "🐢 Slowest Run"),
+        "best": (source.get_best_run, "🏆 Best Run"),
     }
 
     if stat not in stat_map:
@@ -363,7 +796,7 @@ def run_stat(stat: str):
         raise typer.Exit()
 
     run_func, emoji_title = stat_map[stat]
-    selected_run = run_func(runs)
+    selected_run = run_func(**query.filters())
     if not selected_run:
         typer.echo(f"No valid {stat} run found.")
         raise typer.Exit()
@@ -383,16 +816,81 @@ def validate_fit_file(fit_file: str) -> Path:
         typer.echo("Error: File not found.")
         raise typer.Exit()
 
-    if path.suffix.lower() != FIT_FILE_EXTENSION:
-        typer.echo("Error: Only .fit files are supported.")
+    if not is_fit_name(path.name) and path.suffix.lower() != ZIP_FILE_EXTENSION:
+        typer.echo("Error: Only .fit, .fit.gz and .zip files are supported.")
         raise typer.Exit()
 
     return path
 
 
+@contextmanager
+def open_fit_source(path: Path, member: str | None) -> Iterator[str | BinaryIO]:
+    """What the FIT decoders read for ``path``: a .fit file's path, or a
+    stream of a .fit.gz file or zip member that is decompressed only as far
+    as it is read. A zip with a single FIT file needs no ``member``."""
+    if path.suffix.lower() == FIT_FILE_EXTENSION:
+        yield str(path)
+        return
+
+    with ExitStack() as stack:
+        if path.suffix.lower() != ZIP_FILE_EXTENSION:
+            file = stack.enter_context(path.open("rb"))
+            yield stack.enter_context(open_fit_stream(file, path.name))
+            return
+
+        archive = stack.enter_context(ZipFile(path))
+        if member is None:
+            members = archive_fit_members(archive)
+            if len(members) != 1:
+                typer.echo(
+                    f"Error: {path} holds {len(members)} .fit files, "
+                    "pick one with --member.",
+                    err=True,
+                )
+                raise typer.Exit(code=1)
+            member = members[0]
+        try:
+            file = stack.enter_context(archive.open(member))
+        except KeyError:
+            typer.echo(f"Error: {path} has no member {member}.", err=True)
+            raise typer.Exit(code=1)
+        yield stack.enter_context(open_fit_stream(file, member))
+
+
+def report_fit_import(
+    stats: FitImportStats, errors_path: Path | str, directory: Path | None = None
+):
+    """Print an import's counts and failures, listing the failed files in
+    ``errors_path``; exits with an error if an insert batch failed."""
+    not_runs = f", ignored {stats.not_runs} non-runs" if stats.not_runs else ""
+    typer.echo(
+        f"✅ Imported {stats.imported} new runs from {stats.files} files in "
+        f"{stats.elapsed:.2f}s ({stats.files_per_second:.1f} files/s), "
+        f"skipped {stats.skipped} already imported{not_runs}."
+    )
+
+    if stats.failed:
+        table = Table(title=f"⚠️ {len(stats.failed)} files failed")
+        table.add_column("File", style="cyan")
+        table.add_column("Error", style="red")
+        with RejectsWriter(errors_path) as errors:
+            for path, error in stats.failed:
+                errors.write({"file": str(path)}, error)
+                table.add_row(
+                    str(path.relative_to(directory) if directory else path), error
+                )
+        console.print(table)
+        typer.echo(f"The failed files are listed in {errors_path}")
+
+    if stats.insert.failed_at is not None:
+        typer.echo(f"Error: batch failed: {stats.insert.error}", err=True)
+        raise typer.Exit(code=1)
+
+
 @app.command(
     "import-fit",
-    help="Import running data from a .fit file. Call function and use --help for list of unit/run_type",
+    help="Import running data from a .fit or .fit.gz file, or every .fit file of a "
+    ".zip export. Call function and use --help for list of unit/run_type",
 )
 def import_fit(
     fit_file: str,
@@ -408,61 +906,158 @@ def import_fit(
         "-r",
         help=f"Type of run. Options: {', '.join([e.value for e in RunType])}",
     ),
+    member: str = typer.Option(
+        None, "--member", "-m", help="Only this file of a .zip export"
+    ),
 ):
     path = validate_fit_file(fit_file)
-    records = parse_fit_file(str(path))
 
-    if not records:
-        typer.echo("Error: No data found in the .fit file")
+    if path.suffix.lower() == ZIP_FILE_EXTENSION:
+        members = None if member is None else [member]
+        try:
+            with ZipFile(path) as archive:
+                total = 1 if member else len(archive_fit_members(archive))
+        except BadZipFile as e:
+            typer.echo(f"Error: {e}", err=True)
+            raise typer.Exit(code=1)
+        with Progress(console=console) as progress:
+            task = progress.add_task(f"Importing {total} files", total=total)
+            stats = import_fit_archive(
+                repo,
+                path,
+                unit=unit,
+                run_type=run_type,
+                members=members,
+                progress=lambda name, error: progress.advance(task),
+            )
+        report_fit_import(stats, path.with_suffix(".errors.csv"))
+        return
+
+    try:
+        row = fit_data_row(read_fit_bytes(path), unit, run_type)
+    except FIT_READ_ERRORS as e:
+        typer.echo(f"Error: {e}")
         raise typer.Exit(1)
 
-    summary = summarize_fit_data(records)
+    stats = repo.bulk_insert_runs([row])
+    if stats.failed_at is not None:
+        typer.echo(f"Error: {stats.error}", err=True)
+        raise typer.Exit(code=1)
+    if stats.skipped:
+        typer.echo(f"{path} was already imported, skipped it.")
+        raise typer.Exit()
 
-    distance_m = summary["total_distance"]
-    distance = distance_m / 1609.34 if unit == "mi" else distance_m / 1000
+    typer.echo("\n Run data successfully imported into the database!")
 
-    run = Run(
-        date=datetime.fromisoformat(summary["last_timestamp"]),
-        distance=round(distance, 2),
-        unit=DistanceUnit(unit),
-        duration=summary["total_duration"],
-        run_type=RunType(run_type),
-    )
 
-    repo = RunRepository()
-    repo.add_run(run)
+@app.command(
+    "import-fit-dir",
+    help="Import every .fit/.fit.gz file in a directory (e.g. a Strava export)",
+)
+def import_fit_dir(
+    directory: Path,
+    unit: DistanceUnit = typer.Option(
+        "km",
+        "--unit",
+        "-u",
+        help=f"Distance unit. Options: {', '.join([e.value for e in DistanceUnit])}",
+    ),
+    run_type: RunType = typer.Option(
+        "Easy",
+        "--run-type",
+        "-r",
+        help=f"Type of run. Options: {', '.join([e.value for e in RunType])}",
+    ),
+    workers: int = typer.Option(
+        None, "--workers", "-j", help="Decoding processes (default: one per core)"
+    ),
+    batch_size: int = typer.Option(
+        500, "--batch-size", "-b", help="Runs inserted and committed per batch"
+    ),
+    errors_file: str = typer.Option(
+        None,
+        "--errors",
+        help="CSV file listing the files that failed (default: <directory>.errors.csv)",
+    ),
+):
+    if not directory.is_dir():
+        typer.echo(f"Error: {directory} is not a directory.", err=True)
+        raise typer.Exit(code=1)
 
-    typer.echo("\n Run data successfully imported into the database!")
+    paths = find_fit_files(directory)
+    if not paths:
+        typer.echo(f"No .fit files found in {directory}.")
+        raise typer.Exit()
+
+    with Progress(console=console) as progress:
+        task = progress.add_task(f"Importing {len(paths)} files", total=len(paths))
+        stats = import_fit_files(
+            repo,
+            paths,
+            unit=unit,
+            run_type=run_type,
+            workers=workers,
+            batch_size=batch_size,
+            progress=lambda path, error: progress.advance(task),
+        )
 
+    report_fit_import(
+        stats, errors_file or directory.with_suffix(".errors.csv"), directory
+    )
 
-@app.command("list-fit", help="List all raw data from a .fit file")
-def list_fit(fit_file: str):
+
+@app.command(
+    "list-fit", help="List the raw records of a .fit, .fit.gz or zipped .fit file"
+)
+def list_fit(
+    fit_file: str,
+    limit: int = typer.Option(
+        10, "--limit", "-n", min=1, help="Show at most N records"
+    ),
+    offset: int = typer.Option(0, "--offset", min=0, help="Skip the first N records"),
+    fields: str = typer.Option(
+        None,
+        "--fields",
+        "-f",
+        help="Comma-separated record fields to show, e.g. timestamp,heart_rate",
+    ),
+    member: str = typer.Option(
+        None, "--member", "-m", help="The file to list from a .zip export"
+    ),
+):
     path = validate_fit_file(fit_file)
-    records = parse_fit_file(str(path))
+    if fields is not None:
+        fields = {field.strip() for field in fields.split(",") if field.strip()}
+    # decoding, and decompressing, stops once the requested page has been read
+    try:
+        with open_fit_source(path, member) as source:
+            records = list(
+                islice(iter_fit_records(source, fields), offset, offset + limit)
+            )
+    except FIT_READ_ERRORS as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(code=1)
 
     if not records:
         typer.echo("No data found in the FIT file")
     else:
-        console.print_json(json.dumps(records[:10], indent=2))
+        console.print_json(json.dumps(records, indent=2))
 
 
 # Plot/Chart Commands
 @app.command("plot-runs", help="Plot distance trend over time")
-def plot_runs():
-    runs = repo.list_runs()
+@query_options
+def plot_runs(query: RunQuery):
+    frame = analytics(query).load_frame(**query.filters())
+    distances = frame.distance.tolist()
+    date_labels = [date.strftime("%d/%m/%Y") for date in frame.date.tolist()]
 
-    if not runs:
+    if not distances:
         typer.echo("No runs found in the database")
         raise typer.Exit()
 
-    runs = sorted(runs, key=lambda r: datetime.strptime(r.run_date, "%Y-%m-%d"))
-
     # convert dates to numbers (for regression) and store formatted date labels for plotext
-    dates_numeric = list(range(len(runs)))
-    distances = [run.distance for run in runs]
-    date_labels = [
-        datetime.strptime(run.run_date, "%Y-%m-%d").strftime("%d/%m/%Y") for run in runs
-    ]
+    dates_numeric = list(range(len(distances)))
 
     if len(dates_numeric) > 1:
         slope, intercept = np.polyfit(dates_numeric, distances, 1)
@@ -486,20 +1081,17 @@ def plot_runs():
 
 
 @app.command("plot-pace", help="Plot pace trends over time")
-def plot_pace():
-    runs = repo.list_runs()
+@query_options
+def plot_pace(query: RunQuery):
+    frame = analytics(query).load_frame(**query.filters())
+    paces = frame.calculated_pace.tolist()
+    date_labels = [date.strftime("%d/%m/%Y") for date in frame.date.tolist()]
 
-    if not runs:
+    if not paces:
         typer.echo("No runs found in the database")
         raise typer.Exit()
 
-    runs = sorted(runs, key=lambda r: datetime.strptime(r.run_date, "%Y-%m-%d"))
-
-    dates_numeric = list(range(len(runs)))
-    paces = [run.calculated_pace for run in runs]
-    date_labels = [
-        datetime.strptime(run.run_date, "%Y-%m-%d").strftime("%d/%m/%Y") for run in runs
-    ]
+    dates_numeric = list(range(len(paces)))
 
     if len(dates_numeric) > 1:
         slope, intercept = np.polyfit(dates_numeric, paces, 1)
@@ -523,42 +1115,117 @@ def plot_pace():
 
 
 @app.command("plot-weekly-summary", help="Show weekly distance summary as a bar chart")
-def plot_weekly_summary():
-    runs = repo.list_runs()
-    if not runs:
+@query_options
+def plot_weekly_summary(query: RunQuery):
+    filters = query.filters()
+    source = analytics(query)
+    unit = source.get_display_unit(**filters)
+    if unit is None:
         typer.echo("No runs found in database")
         raise typer.Exit()
 
-    weekly_data = Run.weekly_summary(runs)
+    weekly_data = source.weekly_summary(unit, **filters)
 
-    sorted_weeks = sorted(
-        weekly_data.keys(), key=lambda r: datetime.strptime(r + "-1", "%Y-%W-%w")
-    )
-    distances = [weekly_data[week]["total_distance"] for week in sorted_weeks]
+    weeks = list(weekly_data)
+    distances = [weekly_data[week]["total_distance"] for week in weeks]
 
     plt.clear_data()
     plt.title("Weekly Running Summary")
-    plt.bar(sorted_weeks, distances, color="green")
+    plt.bar(weeks, distances, color="green")
 
-    tick_step = max(1, len(sorted_weeks) // 6)
-    selected_indices = range(0, len(sorted_weeks), tick_step)
-    selected_labels = [sorted_weeks[i] for i in selected_indices]
+    tick_step = max(1, len(weeks) // 6)
+    selected_indices = range(0, len(weeks), tick_step)
+    selected_labels = [weeks[i] for i in selected_indices]
 
     plt.xticks(selected_indices, selected_labels)
     plt.xlabel("Week")
-    plt.ylabel("Total Distance")
+    plt.ylabel(f"Total Distance ({unit.value})")
     plt.show()
 
 
+@app.command("athletes", help="List the athletes and their number of runs")
+def athletes():
+    table = Table(title="🏃 Athletes")
+    table.add_column("ID", justify="center", style="cyan")
+    table.add_column("Name", style="magenta")
+    table.add_column("Runs", justify="right", style="green")
+
+    for athlete, run_count in repo.list_athletes():
+        name = f"{athlete.name} *" if athlete.name == repo.athlete else athlete.name
+        table.add_row(str(athlete.id), name, str(run_count))
+
+    console.print(table)
+
+
+@app.command("cache-stats", help="Show query cache hits and misses for this session")
+def cache_stats():
+    if repo.cache is None:
+        typer.echo("Query cache is disabled (QUERY_CACHE_SIZE=0)")
+        raise typer.Exit()
+
+    stats = repo.cache.stats()
+    typer.echo(
+        f"🗄️ Query cache: {stats['hits']} hits, {stats['misses']} misses "
+        f"({stats['hit_rate']:.0%} hit rate), {stats['size']}/{stats['maxsize']} entries"
+    )
+
+
+@app.command(
+    "rebuild-rollups", help="Recompute the weekly/monthly rollups from scratch"
+)
+def rebuild_rollups():
+    result = repo.rebuild_rollups()
+    typer.echo(f"✅ Rebuilt {result['buckets']} rollup buckets.")
+    if result["mismatched"]:
+        typer.echo(
+            f"⚠️ {result['mismatched']} buckets differed from the stored rollups."
+        )
+
+
+@app.command(
+    "snapshot",
+    help="Build or refresh the columnar snapshot the analytics commands read",
+)
+def snapshot(
+    drop: bool = typer.Option(
+        False, "--drop", help="Delete the snapshot and read the database again"
+    ),
+):
+    if repo.athlete_id is None:
+        typer.echo(f"No runs recorded for {repo.athlete} yet.")
+        raise typer.Exit(code=1)
+
+    path = snapshot_dir()
+    if path is None:
+        typer.echo("No snapshot location for this database, set SNAPSHOT_DIR")
+        raise typer.Exit(code=1)
+
+    snapshot = FrameSnapshot(path)
+    if drop:
+        snapshot.drop()
+        typer.echo(f"🗑️ Removed the snapshot at {path}")
+        raise typer.Exit()
+
+    snapshot.refresh(repo)
+    meta = snapshot.read_meta()
+    typer.echo(
+        f"✅ Snapshot of {meta['rows']} runs at {path} "
+        f"(data version {meta['version']})."
+    )
+
+
 # Register aliases
 app.command("ar")(add_run)
 app.command("lr")(list_runs)
+app.command("q")(query_runs)
+app.command("s")(search_runs)
 app.command("ur")(update_run)
 app.command("rb")(lambda: run_stat("best"))
 app.command("rl")(lambda: run_stat("longest"))
 app.command("rs")(lambda: run_stat("shortest"))
 app.command("rt")(lambda: run_stat("slowest"))
 app.command("id")(import_data)
+app.command("ed")(export_data)
 app.command("sum")(summary)
 app.command("ap")(avg_pace)
 app.command("ws")(weekly_summary)
@@ -567,4 +1234,6 @@ app.command("pr")(plot_runs)
 app.command("pp")(plot_pace)
 app.command("pws")(plot_weekly_summary)
 app.command("if")(import_fit)
+app.command("ifd")(import_fit_dir)
 app.command("lf")(list_fit)
+app.command("sp")(splits)
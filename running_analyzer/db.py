@@ -1,11 +1,438 @@
+import math
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import wraps
+from itertools import batched, chain, islice
+from operator import attrgetter, itemgetter
 from pathlib import Path
+from typing import Iterable, Iterator, Sequence
+import numpy as np
 from decouple import config
-from sqlmodel import SQLModel, create_engine, Session, select
+from sqlalchemy import case, delete, event, literal, make_url, tuple_, update
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlmodel import SQLModel, create_engine, Session, select, func
 from typing import Optional
-from running_analyzer.models import Run
+from running_analyzer.cache import QueryCache
+from running_analyzer.models import (
+    Athlete,
+    DataVersion,
+    Run,
+    RunRollup,
+    RunTrack,
+    RunType,
+    DistanceUnit,
+    METERS_PER_UNIT,
+)
+from running_analyzer.frame import RunFrame, FRAME_COLUMNS
+from running_analyzer.search import search_statement
+from running_analyzer.track import decode_track
 from datetime import datetime
 
 
+PERIOD_FORMATS = {"week": "%Y-%W", "month": "%Y-%m"}
+
+DEFAULT_ATHLETE = "default"
+
+# the run columns a rollup bucket depends on
+ROLLUP_FIELDS = ("date", "run_type", "distance_m", "duration")
+
+
+def run_filters(
+    athlete_id: int | None = None,
+    run_type: RunType | None = None,
+    start_date: datetime | None = None,
+    end_date: datetime | None = None,
+    location: str | None = None,
+    min_id: int | None = None,
+    max_id: int | None = None,
+    min_distance_m: float | None = None,
+    max_distance_m: float | None = None,
+    min_pace_s_per_km: float | None = None,
+    max_pace_s_per_km: float | None = None,
+    hr_above: float | None = None,
+) -> list:
+    conditions = []
+    if athlete_id is not None:
+        conditions.append(Run.athlete_id == athlete_id)
+    if run_type is not None:
+        conditions.append(Run.run_type == run_type)
+    if start_date is not None:
+        conditions.append(Run.date >= start_date)
+    if end_date is not None:
+        conditions.append(Run.date <= end_date)
+    if location is not None:
+        conditions.append(Run.location == location)
+    if min_id is not None:
+        conditions.append(Run.id >= min_id)
+    if max_id is not None:
+        conditions.append(Run.id <= max_id)
+    if min_distance_m is not None:
+        conditions.append(Run.distance_m >= min_distance_m)
+    if max_distance_m is not None:
+        conditions.append(Run.distance_m <= max_distance_m)
+    if min_pace_s_per_km is not None:
+        conditions.append(Run.pace_s_per_km >= min_pace_s_per_km)
+    if max_pace_s_per_km is not None:
+        conditions.append(Run.pace_s_per_km <= max_pace_s_per_km)
+    if hr_above is not None:
+        conditions.append(Run.heart_rate > hr_above)
+    return conditions
+
+
+# run columns update_runs can set, the normalized ones follow from these
+UPDATABLE_COLUMNS = {
+    "date",
+    "distance",
+    "unit",
+    "duration",
+    "heart_rate",
+    "elevation_gain",
+    "pace",
+    "run_type",
+    "location",
+    "notes",
+}
+
+
+def normalized_values(values: dict) -> dict:
+    """``UPDATE ... SET`` expressions for ``values``, plus ``distance_m`` and
+    ``pace_s_per_km`` recomputed in SQL the way ``Run.normalize`` does when the
+    distance, unit or duration change."""
+    columns = Run.__table__.c
+    assignments = {
+        name: literal(value, columns[name].type) for name, value in values.items()
+    }
+    if not {"distance", "unit", "duration"} & values.keys():
+        return assignments
+
+    if "unit" in values:
+        factor = METERS_PER_UNIT[DistanceUnit(values["unit"])]
+    else:
+        factor = case(
+            *(
+                (columns.unit == unit, meters)
+                for unit, meters in METERS_PER_UNIT.items()
+            )
+        )
+    distance_m = assignments.get("distance", columns.distance) * factor
+    duration = assignments.get("duration", columns.duration)
+    assignments["distance_m"] = distance_m
+    assignments["pace_s_per_km"] = case(
+        (distance_m > 0, duration * 60 / (distance_m / 1000)), else_=None
+    )
+    return assignments
+
+
+def rollup_deltas(added: Iterable[tuple] = (), removed: Iterable[tuple] = ()) -> dict:
+    """Net ``run_rollup`` changes for runs given as ``ROLLUP_FIELDS`` tuples,
+    keyed by (period, bucket, run_type) as [run_count, distance_m, duration]."""
+    deltas = defaultdict(lambda: [0, 0.0, 0.0])
+    buckets = {}  # strftime is the slow part, and many runs share a day
+    signed = chain(((1, row) for row in added), ((-1, row) for row in removed))
+    for sign, (date, run_type, distance_m, duration) in signed:
+        day = date.toordinal()
+        if day not in buckets:
+            buckets[day] = [(p, date.strftime(f)) for p, f in PERIOD_FORMATS.items()]
+        for period, bucket in buckets[day]:
+            delta = deltas[period, bucket, run_type]
+            delta[0] += sign
+            delta[1] += sign * (distance_m or 0.0)
+            delta[2] += sign * duration
+    return {key: delta for key, delta in deltas.items() if any(delta)}
+
+
+def period_key(period: str, dialect: str, date=Run.date):
+    """SQL expression rendering ``Run.date`` the way ``strftime`` does in
+    ``Run.weekly_summary`` / ``Run.monthly_summary``."""
+    if dialect != "postgresql":
+        return func.strftime(PERIOD_FORMATS[period], date)
+
+    if period == "month":
+        return func.to_char(date, "YYYY-MM")
+    # %W: Monday-based week number, days before the first Monday are week 00
+    week = func.floor(
+        (func.extract("doy", date) + 7 - func.extract("isodow", date)) / 7
+    )
+    return func.concat(func.to_char(date, "YYYY-"), func.to_char(week, "FM00"))
+
+
+# The read queries are built by these functions and their rows turned into
+# results by the *_from_* ones, shared by RunRepository and AsyncRunRepository.
+
+
+def summary_statement(**filters):
+    return select(
+        func.count(Run.id),
+        func.coalesce(func.sum(Run.distance_m), 0.0),
+        func.coalesce(func.sum(Run.duration), 0.0),
+    ).where(*run_filters(**filters))
+
+
+def summary_from_totals(
+    total_runs: int, total_distance_m: float, total_duration: float, unit: DistanceUnit
+) -> Optional[dict]:
+    if not total_runs:
+        return None
+
+    total_distance = total_distance_m / METERS_PER_UNIT[unit]
+    return {
+        "total_runs": total_runs,
+        "total_distance": total_distance,
+        "total_duration": total_duration,
+        "avg_distance": total_distance / total_runs,
+        "avg_duration": total_duration / total_runs,
+        "avg_pace": total_duration / total_distance if total_distance > 0 else 0,
+    }
+
+
+def period_statement(period: str, dialect: str, **filters):
+    """Totals per period bucket, from ``run_rollup`` when only the athlete and
+    run type are filtered on. Rollup buckets cannot be split by other filters,
+    such as a date range, so those group the matching runs instead."""
+    filters = {name: value for name, value in filters.items() if value is not None}
+    if filters.keys() <= {"athlete_id", "run_type"}:
+        conditions = [RunRollup.period == period]
+        if "athlete_id" in filters:
+            conditions.append(RunRollup.athlete_id == filters["athlete_id"])
+        if "run_type" in filters:
+            conditions.append(RunRollup.run_type == filters["run_type"])
+        bucket = RunRollup.bucket
+        statement = select(
+            bucket, func.sum(RunRollup.distance_m), func.sum(RunRollup.duration)
+        ).where(*conditions)
+    else:
+        bucket = period_key(period, dialect).label("period")
+        statement = select(
+            bucket, func.sum(Run.distance_m), func.sum(Run.duration)
+        ).where(*run_filters(**filters))
+    return statement.group_by(bucket).order_by(bucket)
+
+
+def period_from_rows(rows: Iterable[tuple], unit: DistanceUnit) -> dict:
+    factor = METERS_PER_UNIT[unit]
+    return {
+        key: {
+            "total_distance": distance_m / factor,
+            "total_duration": duration,
+            "avg_pace": duration * factor / distance_m if distance_m > 0 else 0.0,
+        }
+        for key, distance_m, duration in rows
+    }
+
+
+def page_statement(
+    *,
+    limit: int | None = None,
+    after_date: datetime | None = None,
+    after_id: int | None = None,
+    desc: bool = False,
+    **filters,
+):
+    """Runs ordered by (date, id), seeking past the (date, id) cursor."""
+    conditions = run_filters(**filters)
+    if after_date is not None and after_id is not None:
+        cursor = tuple_(Run.date, Run.id)
+        after = (after_date, after_id)
+        conditions.append(cursor < after if desc else cursor > after)
+    elif after_date is not None:
+        conditions.append(Run.date < after_date if desc else Run.date > after_date)
+
+    order_by = (Run.date.desc(), Run.id.desc()) if desc else (Run.date, Run.id)
+    return select(Run).where(*conditions).order_by(*order_by).limit(limit)
+
+
+def display_unit_statement(**filters):
+    return select(Run.unit).where(*run_filters(**filters)).order_by(Run.id).limit(1)
+
+
+# order and extra conditions of each run stat, ties go to the lowest id
+RUN_STAT_ORDERS = {
+    "best": ((Run.pace_s_per_km, Run.id), [Run.pace_s_per_km.is_not(None)]),
+    "slowest": ((Run.pace_s_per_km.desc(), Run.id), [Run.pace_s_per_km.is_not(None)]),
+    "longest": ((Run.distance_m.desc(), Run.id), []),
+    "shortest": ((Run.distance_m, Run.id), []),
+}
+
+
+def first_run_statement(stat: str, **filters):
+    order_by, conditions = RUN_STAT_ORDERS[stat]
+    return (
+        select(Run)
+        .where(*conditions, *run_filters(**filters))
+        .order_by(*order_by)
+        .limit(1)
+    )
+
+
+def run_stats_statements(**filters) -> tuple:
+    """One aggregate statement for the totals and the four run stat ids (in
+    ``RUN_STAT_ORDERS`` order) and one counting runs per run type."""
+    conditions = run_filters(**filters)
+
+    def first_id(order_by, extra):
+        return (
+            select(Run.id)
+            .where(*extra, *conditions)
+            .order_by(*order_by)
+            .limit(1)
+            .scalar_subquery()
+        )
+
+    statement = select(
+        func.count(Run.id),
+        func.coalesce(func.sum(Run.distance_m), 0.0),
+        func.coalesce(func.sum(Run.duration), 0.0),
+        *(first_id(*order) for order in RUN_STAT_ORDERS.values()),
+    ).where(*conditions)
+    type_counts = (
+        select(Run.run_type, func.count()).where(*conditions).group_by(Run.run_type)
+    )
+    return statement, type_counts
+
+
+def run_stats_from_rows(
+    row: tuple, type_counts: Iterable[tuple], runs: Iterable[Run], unit: DistanceUnit
+) -> Optional[dict]:
+    summary = summary_from_totals(*row[:3], unit)
+    if summary is None:
+        return None
+
+    run_types = dict(type_counts)
+    by_id = {run.id: run for run in runs}
+    return {
+        **summary,
+        **{f"{stat}_run": by_id.get(i) for stat, i in zip(RUN_STAT_ORDERS, row[3:])},
+        "run_types": {rt: run_types[rt] for rt in RunType if rt in run_types},
+    }
+
+
+def cached(method):
+    """Serve a RunRepository read through its QueryCache, keyed by the
+    arguments and the current data version.
+
+    Reads inside a ``transaction()`` bypass the cache: they see a version
+    that a rollback hands to the next write.
+    """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.cache is None or self._connection is not None:
+            return method(self, *args, **kwargs)
+        key = (
+            self.data_version(),
+            method.__name__,
+            args,
+            tuple(sorted(kwargs.items())),
+        )
+        return self.cache.get_or_compute(key, lambda: method(self, *args, **kwargs))
+
+    return wrapper
+
+
+class Explain(Executable, ClauseElement):
+    """``EXPLAIN`` (PostgreSQL) / ``EXPLAIN QUERY PLAN`` (SQLite) wrapper for a
+    select statement, so the repository's queries can be checked for index use."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    prefix = "EXPLAIN QUERY PLAN" if compiler.dialect.name == "sqlite" else "EXPLAIN"
+    return f"{prefix} {compiler.process(element.statement, **kw)}"
+
+
+# process-wide engines by (url, echo), so every Database on a URL shares a pool
+_engines: dict[tuple[str, bool], Engine] = {}
+
+
+def _sqlite_pragmas() -> dict:
+    return {
+        "journal_mode": config("SQLITE_JOURNAL_MODE", default="WAL"),
+        "synchronous": config("SQLITE_SYNCHRONOUS", default="NORMAL"),
+        "mmap_size": config("SQLITE_MMAP_SIZE", default=256 * 1024**2, cast=int),
+        # negative sizes are in KiB
+        "cache_size": config("SQLITE_CACHE_SIZE", default=-64 * 1024, cast=int),
+    }
+
+
+def pool_options() -> dict:
+    return {
+        "pool_size": config("DB_POOL_SIZE", default=5, cast=int),
+        "max_overflow": config("DB_MAX_OVERFLOW", default=10, cast=int),
+        "pool_timeout": config("DB_POOL_TIMEOUT", default=30, cast=int),
+        "pool_recycle": config("DB_POOL_RECYCLE", default=1800, cast=int),
+        "pool_pre_ping": True,
+    }
+
+
+def add_sqlite_pragmas(engine: Engine, url: URL) -> None:
+    """Set the ``SQLITE_*`` pragmas on every new connection of the engine."""
+    pragmas = _sqlite_pragmas()
+    if url.database in (None, "", ":memory:"):
+        pragmas.pop("journal_mode")  # in-memory databases have no WAL
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def _create_engine(database_url: str, echo: bool) -> Engine:
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite":
+        return create_engine(url, echo=echo, **pool_options())
+
+    engine = create_engine(url, echo=echo)
+    add_sqlite_pragmas(engine, url)
+    return engine
+
+
+def get_engine(database_url: str, *, echo: bool = False) -> Engine:
+    """The shared engine for a URL, created on first use.
+
+    In-memory SQLite URLs get a new engine each time: every one is a separate,
+    empty database.
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return _create_engine(database_url, echo)
+
+    key = (database_url, echo)
+    if key not in _engines:
+        _engines[key] = _create_engine(database_url, echo)
+    return _engines[key]
+
+
+@dataclass
+class ImportStats:
+    inserted: int = 0
+    rejected: int = 0
+    # rows whose source_hash was already imported
+    skipped: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+    # number of input rows committed before the failed batch, pass it back as
+    # ``skip`` to resume the import
+    failed_at: int | None = None
+    error: str | None = None
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.inserted / self.elapsed if self.elapsed else 0.0
+
+
 class Database:
     def __init__(
         self,
@@ -18,11 +445,12 @@ class Database:
         self.debug = (
             debug if debug is not None else config("ECHO", default=False, cast=bool)
         )
-        self.engine = create_engine(self.database_url, echo=self.debug)
+        self.engine = get_engine(self.database_url, echo=self.debug)
         if create_db:
             self._init_db()
 
-    def get_default_database_url(self) -> str:
+    @staticmethod
+    def get_default_database_url() -> str:
         env_db_url = config("DATABASE_URL", default=None)
         if env_db_url:
             return env_db_url
@@ -47,62 +475,670 @@ class RunRepository:
         *,
         debug: bool | None = None,
         create_db: bool = False,
+        cache_size: int | None = None,
+        athlete: str | None = None,
     ):
         self.db = Database(database_url, debug=debug, create_db=create_db)
-        self.session = self.db.get_session
+        self.athlete = athlete or config("ATHLETE", default=DEFAULT_ATHLETE)
+        self._athlete_id = None
+        if cache_size is None:
+            cache_size = config("QUERY_CACHE_SIZE", default=128, cast=int)
+        self.cache = QueryCache(cache_size) if cache_size > 0 else None
+        self._connection = None
+
+    def session(self) -> Session:
+        """A new session, bound to the open ``transaction()`` if there is one."""
+        if self._connection is not None:
+            return Session(self._connection)
+        return self.db.get_session()
+
+    @contextmanager
+    def transaction(self) -> Iterator[Session]:
+        """Run repository calls on one connection and commit them together.
+
+        Sessions bound to a connection that is already in a transaction leave
+        it to its owner: their ``commit()`` only flushes, and their
+        ``rollback()`` rolls back everything since the ``transaction()``
+        began. The transaction commits when the block exits, and rolls back if
+        it raises. Nested calls join the outer transaction.
+        """
+        if self._connection is not None:
+            with self.session() as session:
+                yield session
+            return
+
+        self.create_athlete()  # outside, a rollback must not remove it
+        with self.db.engine.connect() as connection, connection.begin():
+            self._connection = connection
+            try:
+                with self.session() as session:
+                    yield session
+            finally:
+                self._connection = None
+
+    @property
+    def athlete_id(self) -> int | None:
+        """Id of the athlete whose runs this repository reads and writes
+        (``ATHLETE``, else the default athlete), None until their first run."""
+        if self._athlete_id is None:
+            with self.session() as session:
+                statement = select(Athlete.id).where(Athlete.name == self.athlete)
+                self._athlete_id = session.exec(statement).first()
+        return self._athlete_id
+
+    def create_athlete(self) -> int:
+        """The athlete's id, adding the athlete if they are new."""
+        if self.athlete_id is None:
+            with self.session() as session:
+                session.execute(
+                    self._insert(Athlete)
+                    .values(name=self.athlete)
+                    .on_conflict_do_nothing(index_elements=["name"])
+                )
+                session.commit()
+        return self.athlete_id
+
+    def _scoped(self, filters: dict) -> dict:
+        """``run_filters`` keywords limited to this repository's athlete."""
+        # -1 matches no runs, for an athlete not created yet
+        return {**filters, "athlete_id": self.athlete_id or -1}
+
+    def list_athletes(self) -> list[tuple[Athlete, int]]:
+        """Every athlete with their number of runs, by name."""
+        statement = (
+            select(Athlete, func.count(Run.id))
+            .join(Run, Run.athlete_id == Athlete.id, isouter=True)
+            .group_by(Athlete.id)
+            .order_by(Athlete.name)
+        )
+        with self.session() as session:
+            return [tuple(row) for row in session.exec(statement)]
+
+    def data_version(self) -> int:
+        return self.data_versions()[0]
+
+    def data_versions(self) -> tuple[int, int]:
+        """The (version, rewrites) write counters, see DataVersion."""
+        with self.session() as session:
+            statement = select(DataVersion.version, DataVersion.rewrites)
+            row = session.exec(statement).first()
+            return tuple(row) if row else (0, 0)
+
+    def _insert(self, model):
+        """Dialect INSERT, for ``on_conflict_do_update`` upserts."""
+        dialect = postgresql if self.db.engine.dialect.name == "postgresql" else sqlite
+        return dialect.insert(model)
+
+    def _bump_version(self, session: Session, *, rewrite: bool = False) -> None:
+        statement = self._insert(DataVersion).values(
+            id=1, version=1, rewrites=int(rewrite)
+        )
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["id"],
+                set_={
+                    "version": DataVersion.version + 1,
+                    "rewrites": DataVersion.rewrites + statement.excluded.rewrites,
+                },
+            )
+        )
+
+    def _get_run(self, session: Session, run_id: int) -> Optional[Run]:
+        run = session.get(Run, run_id)
+        return run if run is not None and run.athlete_id == self.athlete_id else None
 
     def get_run_by_id(self, run_id: int) -> Optional[Run]:
         with self.session() as session:
-            return session.get(Run, run_id)
+            return self._get_run(session, run_id)
 
+    def get_run_track(self, run_id: int) -> Optional[dict[str, np.ndarray]]:
+        """The sample streams of a run imported from a FIT file, read and
+        decoded only when asked for; None if the run has none."""
+        statement = (
+            select(RunTrack.data)
+            .join(Run, Run.id == RunTrack.run_id)
+            .where(RunTrack.run_id == run_id, Run.athlete_id == self.athlete_id)
+        )
+        with self.session() as session:
+            data = session.scalar(statement)
+        return None if data is None else decode_track(data)
+
+    @cached
     def list_runs(self) -> list[Run]:
         with self.session() as session:
-            statement = select(Run)
+            statement = (
+                select(Run).where(*run_filters(**self._scoped({}))).order_by(Run.id)
+            )
             return session.exec(statement).all()
 
+    def iter_runs(
+        self,
+        batch_size: int = 1000,
+        *,
+        limit: int | None = None,
+        after_date: datetime | None = None,
+        after_id: int | None = None,
+        desc: bool = False,
+        **filters,
+    ) -> Iterator[Run]:
+        """Yield runs in date order without materializing the whole result.
+
+        ``yield_per`` fetches ``batch_size`` rows at a time: a server-side
+        cursor on PostgreSQL, chunked ``fetchmany`` calls on SQLite. Paging
+        uses the (date, id) keyset cursor of the last run seen rather than an
+        OFFSET, so every page costs the same index seek.
+        """
+        with self.session() as session:
+            if after_id is not None and after_date is None:
+                after_date = session.exec(
+                    select(Run.date).where(
+                        Run.id == after_id, *run_filters(**self._scoped({}))
+                    )
+                ).first()
+                if after_date is None:
+                    raise ValueError(f"Run with ID {after_id} not found.")
+
+            statement = page_statement(
+                limit=limit,
+                after_date=after_date,
+                after_id=after_id,
+                desc=desc,
+                **self._scoped(filters),
+            ).execution_options(yield_per=batch_size)
+            yield from session.exec(statement)
+
+    def list_runs_page(self, limit: int = 50, **kwargs) -> list[Run]:
+        return list(self.iter_runs(batch_size=limit, limit=limit, **kwargs))
+
+    @cached
+    def load_frame(
+        self, batch_size: int = 10000, *, after_id: int | None = None, **filters
+    ) -> RunFrame:
+        """Fill a RunFrame from a column-only query, skipping ORM hydration.
+
+        ``after_id`` keeps only runs with a greater id, the runs appended since
+        a frame was last loaded.
+        """
+        conditions = run_filters(**self._scoped(filters))
+        if after_id is not None:
+            conditions.append(Run.id > after_id)
+        statement = (
+            select(*(getattr(Run, column) for column in FRAME_COLUMNS))
+            .where(*conditions)
+            .order_by(Run.date, Run.id)
+            .execution_options(yield_per=batch_size)
+        )
+        with self.session() as session:
+            result = session.execute(statement)
+            return RunFrame.concat(
+                [RunFrame.from_rows(rows) for rows in result.partitions()]
+            )
+
+    def _apply_rollups(self, session: Session, deltas: dict) -> None:
+        """Upsert this athlete's rollup deltas inside the caller's transaction."""
+        if not deltas:
+            return
+
+        statement = self._insert(RunRollup)
+        statement = statement.on_conflict_do_update(
+            index_elements=["athlete_id", "period", "bucket", "run_type"],
+            set_={
+                "run_count": RunRollup.run_count + statement.excluded.run_count,
+                "distance_m": RunRollup.distance_m + statement.excluded.distance_m,
+                "duration": RunRollup.duration + statement.excluded.duration,
+            },
+        )
+        session.execute(
+            statement,
+            [
+                {
+                    "athlete_id": self.athlete_id,
+                    "period": period,
+                    "bucket": bucket,
+                    "run_type": run_type,
+                    "run_count": run_count,
+                    "distance_m": distance_m,
+                    "duration": duration,
+                }
+                for (period, bucket, run_type), (
+                    run_count,
+                    distance_m,
+                    duration,
+                ) in deltas.items()
+            ],
+        )
+        if any(run_count < 0 for run_count, _, _ in deltas.values()):
+            session.execute(delete(RunRollup).where(RunRollup.run_count <= 0))
+
+    def _rollup_totals(self, session: Session) -> dict:
+        statement = select(
+            RunRollup.athlete_id,
+            RunRollup.period,
+            RunRollup.bucket,
+            RunRollup.run_type,
+            RunRollup.run_count,
+            RunRollup.distance_m,
+            RunRollup.duration,
+        )
+        return {tuple(row[:4]): tuple(row[4:]) for row in session.exec(statement)}
+
+    def rebuild_rollups(self) -> dict:
+        """Recompute ``run_rollup`` for every athlete from the run table in one
+        transaction and report how many buckets the maintained rollups had
+        wrong."""
+        columns = [
+            "athlete_id",
+            "period",
+            "bucket",
+            "run_type",
+            "run_count",
+            "distance_m",
+            "duration",
+        ]
+        with self.session() as session:
+            before = self._rollup_totals(session)
+            session.execute(delete(RunRollup))
+
+            for period in PERIOD_FORMATS:
+                bucket = self._period_key(period)
+                rows = select(
+                    Run.athlete_id,
+                    literal(period),
+                    bucket,
+                    Run.run_type,
+                    func.count(Run.id),
+                    func.coalesce(func.sum(Run.distance_m), 0.0),
+                    func.sum(Run.duration),
+                ).group_by(Run.athlete_id, bucket, Run.run_type)
+                session.execute(RunRollup.__table__.insert().from_select(columns, rows))
+
+            after = self._rollup_totals(session)
+            self._bump_version(session)
+            session.commit()
+
+        mismatched = [
+            key
+            for key in before.keys() | after.keys()
+            if key not in before
+            or key not in after
+            or not all(
+                math.isclose(old, new, rel_tol=1e-9, abs_tol=1e-6)
+                for old, new in zip(before[key], after[key])
+            )
+        ]
+        return {"buckets": len(after), "mismatched": len(mismatched)}
+
     def add_run(self, run: Run) -> Run:
+        athlete_id = self.create_athlete()
         with self.session() as session:
-            session.add(run)
+            run.athlete_id = athlete_id
+            session.add(run.normalize())
+            self._apply_rollups(
+                session, rollup_deltas(added=[attrgetter(*ROLLUP_FIELDS)(run)])
+            )
+            self._bump_version(session)
             session.commit()
             session.refresh(run)
             return run
 
+    def bulk_insert_runs(
+        self, rows: Iterable[dict], *, batch_size: int = 1000, skip: int = 0
+    ) -> ImportStats:
+        """Insert normalized run rows with one executemany and commit per batch.
+
+        A row's ``track``, the ``RunTrack`` fields of its samples, is stored
+        with it. Rows whose ``source_hash`` this athlete already has, or that
+        repeat one earlier in the batch, are counted in ``skipped`` instead:
+        each batch looks its hashes up in one query on the unique source
+        index, so a re-import skips what it imported before. The first
+        ``skip`` rows are assumed to be committed by an earlier call and are
+        not inserted again. A failed batch is rolled back and stops the
+        import; ``ImportStats.failed_at`` tells where to resume. Inside a
+        ``transaction()`` nothing is committed per batch, so the error is
+        raised instead and the whole transaction rolls back.
+        """
+        stats = ImportStats()
+        statement = Run.__table__.insert()
+        athlete_id = self.create_athlete()
+        offset = skip
+        start = time.perf_counter()
+
+        with self.session() as session:
+            for batch in batched(islice(rows, skip, None), batch_size):
+                try:
+                    new = self._new_rows(session, athlete_id, batch)
+                    if new:
+                        self._insert_runs(
+                            session,
+                            statement,
+                            [
+                                {"source_hash": None, **row, "athlete_id": athlete_id}
+                                for row in new
+                            ],
+                        )
+                        self._apply_rollups(
+                            session,
+                            rollup_deltas(added=map(itemgetter(*ROLLUP_FIELDS), new)),
+                        )
+                        self._bump_version(session)
+                        session.commit()
+                except SQLAlchemyError as e:
+                    if self._connection is not None:
+                        raise
+                    session.rollback()
+                    stats.failed_at = offset
+                    stats.error = str(getattr(e, "orig", None) or e)
+                    break
+
+                offset += len(batch)
+                stats.inserted += len(new)
+                stats.skipped += len(batch) - len(new)
+                stats.batches += 1
+
+        stats.elapsed = time.perf_counter() - start
+        return stats
+
+    def _insert_runs(self, session: Session, statement, runs: list[dict]) -> None:
+        """Insert run rows, and the ``RunTrack`` fields of those carrying a
+        ``track``, under the ids the runs got."""
+        tracks = [run.pop("track", None) for run in runs]
+        if not any(tracks):
+            session.execute(statement, runs)
+            return
+
+        ids = session.scalars(
+            statement.returning(Run.id, sort_by_parameter_order=True), runs
+        ).all()
+        session.execute(
+            RunTrack.__table__.insert(),
+            [
+                {"run_id": run_id, **track}
+                for run_id, track in zip(ids, tracks)
+                if track is not None
+            ],
+        )
+
+    def _new_rows(
+        self, session: Session, athlete_id: int, batch: Sequence[dict]
+    ) -> list[dict]:
+        """The rows of ``batch`` whose source_hash is not imported yet."""
+        hashes = {row["source_hash"] for row in batch if row.get("source_hash")}
+        if not hashes:
+            return list(batch)
+        seen = set(
+            session.scalars(
+                select(Run.source_hash).where(
+                    Run.athlete_id == athlete_id, Run.source_hash.in_(hashes)
+                )
+            )
+        )
+        new = []
+        for row in batch:
+            source_hash = row.get("source_hash")
+            if source_hash:
+                if source_hash in seen:
+                    continue
+                seen.add(source_hash)
+            new.append(row)
+        return new
+
     def delete_run(self, run_id: int) -> bool:
         with self.session() as session:
-            run = self.get_run_by_id(run_id)
+            run = self._get_run(session, run_id)
             if run:
+                session.execute(delete(RunTrack).where(RunTrack.run_id == run_id))
                 session.delete(run)
+                self._apply_rollups(
+                    session, rollup_deltas(removed=[attrgetter(*ROLLUP_FIELDS)(run)])
+                )
+                self._bump_version(session, rewrite=True)
                 session.commit()
                 return True
             return False
 
     def update_run(self, run_id: int, **kwargs) -> None:
         with self.session() as session:
-            run = session.get(Run, run_id)
+            run = self._get_run(session, run_id)
             if run is None:
                 raise ValueError(f"Run with ID {run_id} not found.")
 
+            before = attrgetter(*ROLLUP_FIELDS)(run)
             for key, value in kwargs.items():
                 setattr(run, key, value)
-            session.add(run)
+            session.add(run.normalize())
+            self._apply_rollups(
+                session,
+                rollup_deltas(
+                    added=[attrgetter(*ROLLUP_FIELDS)(run)], removed=[before]
+                ),
+            )
+            self._bump_version(session, rewrite=True)
             session.commit()
 
+    def _matching_totals(
+        self, session: Session, conditions: list, values: dict | None = None
+    ) -> dict:
+        """Rollup totals of the runs matching ``conditions``, as they are or as
+        they would be after ``normalized_values(values)``, keyed like
+        ``rollup_deltas``. Grouped in SQL, the runs are never loaded."""
+        values = values or {}
+        assignments = normalized_values(values)
+        distance_m = assignments.get("distance_m", Run.distance_m)
+        duration = assignments.get("duration", Run.duration)
+
+        totals = {}
+        for period, period_format in PERIOD_FORMATS.items():
+            # a column being set to one value is constant, group by the others
+            keys = []
+            if "date" not in values:
+                keys.append(self._period_key(period))
+            if "run_type" not in values:
+                keys.append(Run.run_type)
+            statement = select(
+                *keys,
+                func.count(Run.id),
+                func.coalesce(func.sum(distance_m), 0.0),
+                func.coalesce(func.sum(duration), 0.0),
+            ).where(*conditions)
+            if keys:
+                statement = statement.group_by(*keys)
+
+            for *key, run_count, total_distance_m, total_duration in session.execute(
+                statement
+            ):
+                if not run_count:
+                    continue
+                if "date" in values:
+                    bucket = values["date"].strftime(period_format)
+                else:
+                    bucket = key.pop(0)
+                run_type = RunType(values.get("run_type") or key.pop(0))
+                totals[period, bucket, run_type] = [
+                    run_count,
+                    total_distance_m,
+                    total_duration,
+                ]
+        return totals
+
+    def count_runs(self, **filters) -> int:
+        with self.session() as session:
+            statement = select(func.count(Run.id)).where(
+                *run_filters(**self._scoped(filters))
+            )
+            return session.exec(statement).one()
+
+    def update_runs(self, filters: dict, **values) -> int:
+        """Set ``values`` on every run matching ``run_filters(**filters)`` with
+        one UPDATE statement and return the number of runs changed.
+
+        The normalized columns are recomputed in SQL, and the rollups are
+        adjusted by the matching runs' grouped totals before and after.
+        """
+        unknown = values.keys() - UPDATABLE_COLUMNS
+        if unknown:
+            raise ValueError(f"Cannot update run columns: {', '.join(sorted(unknown))}")
+        if not values:
+            raise ValueError("No values to update.")
+
+        conditions = run_filters(**self._scoped(filters))
+        statement = (
+            update(Run)
+            .where(*conditions)
+            .values(normalized_values(values))
+            .execution_options(synchronize_session=False)
+        )
+        with self.session() as session:
+            before = self._matching_totals(session, conditions)
+            after = self._matching_totals(session, conditions, values)
+            updated = session.execute(statement).rowcount
+            if updated:
+                deltas = defaultdict(lambda: [0, 0.0, 0.0])
+                for sign, totals in ((1, after), (-1, before)):
+                    for key, row in totals.items():
+                        for i, value in enumerate(row):
+                            deltas[key][i] += sign * value
+                self._apply_rollups(
+                    session, {key: d for key, d in deltas.items() if any(d)}
+                )
+                self._bump_version(session, rewrite=True)
+            session.commit()
+        return updated
+
+    def delete_runs(self, filters: dict) -> int:
+        """Delete every run matching ``run_filters(**filters)`` with one DELETE
+        statement and return the number of runs removed."""
+        conditions = run_filters(**self._scoped(filters))
+        statement = (
+            delete(Run).where(*conditions).execution_options(synchronize_session=False)
+        )
+        with self.session() as session:
+            removed = self._matching_totals(session, conditions)
+            session.execute(
+                delete(RunTrack).where(
+                    RunTrack.run_id.in_(select(Run.id).where(*conditions))
+                )
+            )
+            deleted = session.execute(statement).rowcount
+            if deleted:
+                self._apply_rollups(
+                    session,
+                    {key: [-value for value in row] for key, row in removed.items()},
+                )
+                self._bump_version(session, rewrite=True)
+            session.commit()
+        return deleted
+
     def list_runs_by_type(self, run_type: str) -> list[Run]:
         with self.session() as session:
-            statement = select(Run).where(Run.run_type == run_type)
+            statement = select(Run).where(
+                *run_filters(**self._scoped({"run_type": run_type}))
+            )
             return session.exec(statement).all()
 
     def list_runs_by_date_range(
         self, start_date: datetime, end_date: datetime
     ) -> list[Run]:
         with self.session() as session:
-            statement = select(Run).where(Run.date.between(start_date, end_date))
+            statement = select(Run).where(
+                *run_filters(
+                    **self._scoped({"start_date": start_date, "end_date": end_date})
+                )
+            )
             return session.exec(statement).all()
 
-    def get_best_run(self) -> Optional[Run]:
+    def search_runs(
+        self, terms: str, limit: int = 20, **filters
+    ) -> list[tuple[Run, float]]:
+        """Runs whose notes or location match ``terms``, best match first, with
+        their relevance score, through the full-text index (see search.py)."""
+        if not terms.strip(" *"):
+            raise ValueError("Nothing to search for.")
+
+        statement = search_statement(
+            terms, self.db.engine.dialect.name, run_filters(**self._scoped(filters))
+        ).limit(limit)
         with self.session() as session:
-            statement = select(Run).where(Run.distance > 0)
-            runs = session.exec(statement).all()
-            if not runs:
+            return [tuple(row) for row in session.exec(statement)]
+
+    def explain(self, statement) -> list[str]:
+        with self.session() as session:
+            rows = session.execute(Explain(statement)).all()
+        return [row[-1] for row in rows]
+
+    def _period_key(self, period: str, date=Run.date):
+        return period_key(period, self.db.engine.dialect.name, date)
+
+    @cached
+    def summarize_runs(
+        self, unit: DistanceUnit = DistanceUnit.KILOMETERS, **filters
+    ) -> Optional[dict]:
+        with self.session() as session:
+            totals = session.exec(summary_statement(**self._scoped(filters))).one()
+        return summary_from_totals(*totals, unit)
+
+    @cached
+    def period_summary(
+        self, period: str, unit: DistanceUnit = DistanceUnit.KILOMETERS, **filters
+    ) -> dict:
+        """Totals per period bucket in bucket order, see ``period_statement``."""
+        statement = period_statement(
+            period, self.db.engine.dialect.name, **self._scoped(filters)
+        )
+        with self.session() as session:
+            rows = session.exec(statement).all()
+        return period_from_rows(rows, unit)
+
+    def weekly_summary(
+        self, unit: DistanceUnit = DistanceUnit.KILOMETERS, **filters
+    ) -> dict:
+        return self.period_summary("week", unit, **filters)
+
+    def monthly_summary(
+        self, unit: DistanceUnit = DistanceUnit.KILOMETERS, **filters
+    ) -> dict:
+        return self.period_summary("month", unit, **filters)
+
+    @cached
+    def get_display_unit(self, **filters) -> Optional[DistanceUnit]:
+        with self.session() as session:
+            statement = display_unit_statement(**self._scoped(filters))
+            return session.exec(statement).first()
+
+    def _first_run(self, stat: str, **filters) -> Optional[Run]:
+        with self.session() as session:
+            statement = first_run_statement(stat, **self._scoped(filters))
+            return session.exec(statement).first()
+
+    @cached
+    def get_best_run(self, **filters) -> Optional[Run]:
+        return self._first_run("best", **filters)
+
+    @cached
+    def get_slowest_run(self, **filters) -> Optional[Run]:
+        return self._first_run("slowest", **filters)
+
+    @cached
+    def get_longest_run(self, **filters) -> Optional[Run]:
+        return self._first_run("longest", **filters)
+
+    @cached
+    def get_shortest_run(self, **filters) -> Optional[Run]:
+        return self._first_run("shortest", **filters)
+
+    @cached
+    def get_run_stats(
+        self, unit: DistanceUnit = DistanceUnit.KILOMETERS, **filters
+    ) -> Optional[dict]:
+        """``summarize_runs`` plus the best/slowest/longest/shortest runs and the
+        run type counts in one session: one aggregate query for the totals and
+        the four run ids, an index-only count per run type, then the four runs
+        loaded together by id."""
+        statement, type_counts = run_stats_statements(**self._scoped(filters))
+        with self.session() as session:
+            row = session.exec(statement).one()
+            if not row[0]:
                 return None
-            return min(runs, key=lambda run: run.duration / run.distance)
+
+            run_types = session.exec(type_counts).all()
+            runs = session.exec(select(Run).where(Run.id.in_(row[3:]))).all()
+        return run_stats_from_rows(row, run_types, runs, unit)
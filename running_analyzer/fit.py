@@ -0,0 +1,240 @@
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import BinaryIO
+import numpy as np
+
+
+# FIT timestamps count seconds from 1989-12-31T00:00:00Z
+FIT_EPOCH = 631065600
+RECORD_MESSAGE = 20
+TIMESTAMP_FIELD = 253
+
+# base type byte -> numpy type and invalid value
+BASE_TYPES = {
+    0x00: ("u1", 0xFF),  # enum
+    0x01: ("i1", 0x7F),
+    0x02: ("u1", 0xFF),
+    0x83: ("i2", 0x7FFF),
+    0x84: ("u2", 0xFFFF),
+    0x85: ("i4", 0x7FFFFFFF),
+    0x86: ("u4", 0xFFFFFFFF),
+    0x8B: ("u2", 0x0000),  # uint16z
+    0x8C: ("u4", 0x00000000),  # uint32z
+    0x0A: ("u1", 0x00),  # uint8z
+}
+
+# record fields by column: candidate field numbers, best first, then scale
+# and offset (value = raw / scale - offset)
+RECORD_FIELDS = {
+    "timestamp": ((TIMESTAMP_FIELD,), 1, 0),
+    "position_lat": ((0,), 2**31 / 180, 0),  # semicircles to degrees
+    "position_long": ((1,), 2**31 / 180, 0),
+    "altitude": ((78, 2), 5, 500),  # enhanced_altitude, altitude, in m
+    "heart_rate": ((3,), 1, 0),
+    "cadence": ((4,), 1, 0),
+    "distance": ((5,), 100, 0),  # m
+    "speed": ((73, 6), 1000, 0),  # enhanced_speed, speed, in m/s
+}
+SUMMARY_FIELDS = ("timestamp", "distance", "speed")
+
+
+@dataclass
+class _Definition:
+    global_number: int
+    size: int
+    # field number -> (offset in the message, size, byte order, base type)
+    fields: dict[int, tuple[int, int, str, int]]
+
+
+def _read_bytes(source: str | Path | bytes | BinaryIO) -> bytes:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if isinstance(source, (str, Path)):
+        return Path(source).read_bytes()
+    return source.read()
+
+
+def _check_size(pos: int, size: int, end: int) -> None:
+    if pos + size > end:
+        raise ValueError("Truncated FIT file")
+
+
+def _parse_definition(
+    data: bytes, pos: int, end: int, developer: bool
+) -> tuple[_Definition, int]:
+    _check_size(pos, 5, end)
+    byte_order = ">" if data[pos + 1] else "<"
+    global_number = int.from_bytes(
+        data[pos + 2 : pos + 4], "big" if data[pos + 1] else "little"
+    )
+    field_count = data[pos + 4]
+    pos += 5
+    _check_size(pos, 3 * field_count + developer, end)
+    fields = {}
+    size = 0
+    for _ in range(field_count):
+        number, field_size, base_type = data[pos], data[pos + 1], data[pos + 2]
+        fields[number] = (size, field_size, byte_order, base_type)
+        size += field_size
+        pos += 3
+    if developer:
+        developer_count = data[pos]
+        pos += 1
+        _check_size(pos, 3 * developer_count, end)
+        for _ in range(developer_count):
+            size += data[pos + 1]
+            pos += 3
+    return _Definition(global_number, size, fields), pos
+
+
+def _field_values(
+    raw: np.ndarray, offsets: np.ndarray, field: tuple[int, int, str, int]
+) -> np.ndarray | None:
+    """One field of the messages at ``offsets`` as float64, NaN where the
+    field holds its invalid value; None if the base type is not numeric."""
+    start, field_size, byte_order, base_type = field
+    if base_type not in BASE_TYPES:
+        return None
+    type_code, invalid = BASE_TYPES[base_type]
+    dtype = np.dtype(byte_order + type_code)
+    if field_size < dtype.itemsize:
+        return None
+
+    # an array field keeps its first element
+    index = (offsets + start)[:, None] + np.arange(dtype.itemsize)
+    values = raw[index].copy().view(dtype)[:, 0]
+    return np.where(values == invalid, np.nan, values.astype(np.float64))
+
+
+def _timestamps(timestamps: np.ndarray, compressed: np.ndarray) -> np.ndarray:
+    """FIT timestamps as Unix seconds, -1 where missing. A compressed header
+    holds the low 5 bits of the seconds since the last full timestamp of any
+    message, so those resolve in order, in Python, only in files using them."""
+    if (compressed >= 0).any():
+        last = None
+        for i, time_offset in enumerate(compressed.tolist()):
+            if time_offset >= 0 and last is not None:
+                last += (time_offset - last) & 0x1F
+                timestamps[i] = last
+            elif not np.isnan(timestamps[i]):
+                last = int(timestamps[i])
+    return np.where(np.isnan(timestamps), -1, timestamps + FIT_EPOCH).astype(np.int64)
+
+
+def read_fit_columns(
+    source: str | Path | bytes | BinaryIO, fields=tuple(RECORD_FIELDS)
+) -> dict[str, np.ndarray]:
+    """The ``record`` messages of a FIT file as one NumPy column per field.
+
+    ``fields`` picks columns from ``RECORD_FIELDS``. ``timestamp`` is int64
+    Unix seconds, the other columns float64 in SI units (positions in
+    degrees) with NaN where a sample has no value. Only the message headers
+    are walked in Python; the requested fields are then gathered from the
+    raw bytes of all record messages at once, so no per-sample objects are
+    built. The CRC is not checked.
+    """
+    data = _read_bytes(source)
+    if len(data) < 12 or data[8:12] != b".FIT":
+        raise ValueError("Not a FIT file")
+    pos = data[0]
+    end = pos + int.from_bytes(data[4:8], "little")
+    if end > len(data):
+        raise ValueError("Truncated FIT file")
+
+    # every definition in file order, local types index into it
+    definitions: list[_Definition] = []
+    local_types: dict[int, int] = {}
+    # every data message's definition, offset and compressed time offset
+    owners = []
+    offsets = []
+    compressed = []
+    while pos < end:
+        header = data[pos]
+        pos += 1
+        if header & 0x80:  # compressed timestamp header
+            local = (header >> 5) & 0x03
+            time_offset = header & 0x1F
+        elif header & 0x40:
+            definition, pos = _parse_definition(data, pos, end, bool(header & 0x20))
+            local_types[header & 0x0F] = len(definitions)
+            definitions.append(definition)
+            continue
+        else:
+            local = header & 0x0F
+            time_offset = -1
+
+        owner = local_types.get(local)
+        if owner is None:
+            raise ValueError(f"FIT data message without a definition at byte {pos}")
+        _check_size(pos, definitions[owner].size, end)
+        owners.append(owner)
+        offsets.append(pos)
+        compressed.append(time_offset)
+        pos += definitions[owner].size
+
+    raw = np.frombuffer(data, dtype=np.uint8)
+    owners = np.array(owners, dtype=np.int64)
+    offsets = np.array(offsets, dtype=np.int64)
+    compressed = np.array(compressed, dtype=np.int64)
+
+    def column(name: str, owners: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+        numbers, scale, offset = RECORD_FIELDS[name]
+        values = np.full(len(owners), np.nan)
+        for owner in np.unique(owners):
+            definition = definitions[owner]
+            number = next((n for n in numbers if n in definition.fields), None)
+            if number is None:
+                continue
+            selected = owners == owner
+            field = _field_values(raw, offsets[selected], definition.fields[number])
+            if field is not None:
+                values[selected] = field / scale - offset
+        return values
+
+    is_record = np.array(
+        [definition.global_number == RECORD_MESSAGE for definition in definitions]
+        + [False],
+        dtype=bool,
+    )[owners]
+    columns = {
+        name: column(name, owners[is_record], offsets[is_record])
+        for name in fields
+        if name != "timestamp"
+    }
+    if "timestamp" in fields:
+        # compressed timestamps count from any message's timestamp
+        timestamps = _timestamps(column("timestamp", owners, offsets), compressed)
+        columns = {"timestamp": timestamps[is_record], **columns}
+    return columns
+
+
+def _isoformat(timestamp: int) -> str | None:
+    if timestamp < 0:
+        return None
+    return datetime.fromtimestamp(timestamp, UTC).replace(tzinfo=None).isoformat()
+
+
+def summarize_fit_columns(columns: dict[str, np.ndarray]) -> dict:
+    """``summarize_fit_data`` over ``read_fit_columns`` output: the same keys
+    and values, computed on whole arrays. ``average_speed`` also counts
+    ``enhanced_speed``, which newer devices record instead of ``speed``."""
+    timestamps = columns["timestamp"]
+    count = len(timestamps)
+    if not count:
+        raise ValueError("No records to summarize")
+    first, last = int(timestamps[0]), int(timestamps[-1])
+
+    distance = columns["distance"]
+    present = distance[~np.isnan(distance)]
+    speed = columns["speed"]
+    return {
+        "total_records": count,
+        "first_timestamp": _isoformat(first),
+        "last_timestamp": _isoformat(last),
+        "total_distance": float(present[-1]) if len(present) else 0,
+        "average_speed": float(np.nansum(speed)) / count,
+        "total_duration": round((last - first) / 60, 2)
+        if first >= 0 and last >= 0
+        else 0,
+    }
@@ -0,0 +1,268 @@
+import csv
+import gzip
+import hashlib
+import io
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator
+from zipfile import ZipFile
+from running_analyzer.db import ImportStats, RunRepository
+from running_analyzer.fit import read_fit_columns, summarize_fit_columns
+from running_analyzer.models import DistanceUnit, RunType
+from running_analyzer.track import encode_track
+from running_analyzer.utils import fit_run
+
+
+FIT_SUFFIXES = (".fit", ".fit.gz")
+ACTIVITIES_CSV = "activities.csv"
+
+# the run types behind Strava's workout_type codes for runs
+STRAVA_WORKOUT_TYPES = {1: RunType.RACE, 2: RunType.LONG, 3: RunType.INTERVAL}
+
+# decoding workers are never forked: callers such as the CLI's progress bar
+# have threads running, which fork() does not carry over safely
+POOL_START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def is_fit_name(name: str) -> bool:
+    return name.lower().endswith(FIT_SUFFIXES)
+
+
+def find_fit_files(directory: Path | str) -> list[Path]:
+    """Every .fit and .fit.gz file under ``directory``, in path order."""
+    return sorted(
+        path
+        for path in Path(directory).rglob("*")
+        if is_fit_name(path.name) and path.is_file()
+    )
+
+
+def open_fit_stream(file: BinaryIO, name: str) -> BinaryIO:
+    """The FIT data of an open file as a stream, gunzipped as it is read if
+    ``name`` ends in .gz."""
+    if name.lower().endswith(".gz"):
+        return gzip.GzipFile(fileobj=file)
+    return file
+
+
+def read_fit_stream(file: BinaryIO, name: str) -> bytes:
+    with open_fit_stream(file, name) as stream:
+        return stream.read()
+
+
+def read_fit_bytes(path: Path | str) -> bytes:
+    path = Path(path)
+    with path.open("rb") as file:
+        return read_fit_stream(file, path.name)
+
+
+def read_archive_member(archive: ZipFile, name: str) -> bytes:
+    """A FIT member of a zip export, decompressed in memory."""
+    with archive.open(name) as member:
+        return read_fit_stream(member, name)
+
+
+def archive_fit_members(archive: ZipFile) -> list[str]:
+    return [
+        info.filename
+        for info in archive.infolist()
+        if not info.is_dir() and is_fit_name(info.filename)
+    ]
+
+
+def fit_data_row(data: bytes, unit: DistanceUnit, run_type: RunType, **details) -> dict:
+    """Decode and summarize one FIT file's data into a ``bulk_insert_runs``
+    row; ``details`` are extra ``Run`` fields such as ``notes``. The row's
+    ``source_hash`` is the SHA-256 of the uncompressed data, so a .fit and
+    a .fit.gz of the same activity match, and its ``track`` keeps the
+    record streams for ``RunRepository.get_run_track``."""
+    columns = read_fit_columns(data)
+    if not len(columns["timestamp"]):
+        raise ValueError("No data found in the .fit file")
+    run = fit_run(summarize_fit_columns(columns), unit, run_type, **details)
+    run.source_hash = hashlib.sha256(data).hexdigest()
+    track = {"samples": len(columns["timestamp"]), "data": encode_track(columns)}
+    return {**run.normalize().model_dump(exclude={"id", "athlete_id"}), "track": track}
+
+
+def fit_file_row(path: Path | str, unit: DistanceUnit, run_type: RunType) -> dict:
+    """Decode and summarize one FIT file into a ``bulk_insert_runs`` row.
+
+    Runs in the worker processes, so it only returns plain data.
+    """
+    return fit_data_row(read_fit_bytes(path), unit, run_type)
+
+
+def _strava_run_type(workout_type: str | None) -> RunType | None:
+    try:
+        return STRAVA_WORKOUT_TYPES.get(int(float(workout_type)))
+    except (TypeError, ValueError):
+        return None
+
+
+def read_strava_activities(file: BinaryIO) -> dict[str, dict | None]:
+    """``Run`` fields from a Strava export's activities.csv, by the FIT
+    member they describe; None for activities that are not runs.
+
+    ``run_type`` comes from Workout Type (race, long run, workout) and
+    ``notes`` from the description, else the activity name. Strava exports
+    have no location, a ``Location`` column is used when there is one.
+    """
+    activities = {}
+    for row in csv.DictReader(io.TextIOWrapper(file, encoding="utf-8-sig")):
+        name = row.get("Filename")
+        if not name:
+            continue
+        if "run" not in (row.get("Activity Type") or "run").lower():
+            activities[name] = None
+            continue
+        details = {
+            "run_type": _strava_run_type(row.get("Workout Type")),
+            "notes": row.get("Activity Description") or row.get("Activity Name"),
+            "location": row.get("Location"),
+        }
+        activities[name] = {key: value for key, value in details.items() if value}
+    return activities
+
+
+@dataclass
+class FitImportStats:
+    files: int = 0
+    failed: list[tuple[Path, str]] = field(default_factory=list)
+    insert: ImportStats = field(default_factory=ImportStats)
+    elapsed: float = 0.0
+    # activities an archive's activities.csv lists as something other than runs
+    not_runs: int = 0
+
+    @property
+    def imported(self) -> int:
+        return self.insert.inserted
+
+    @property
+    def skipped(self) -> int:
+        """Files already imported, by their ``source_hash``."""
+        return self.insert.skipped
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.elapsed if self.elapsed else 0.0
+
+
+def import_fit_files(
+    repo: RunRepository,
+    paths: Iterable[Path],
+    *,
+    unit: DistanceUnit = DistanceUnit.KILOMETERS,
+    run_type: RunType = RunType.EASY,
+    workers: int | None = None,
+    batch_size: int = 500,
+    progress: Callable[[Path, str | None], None] | None = None,
+) -> FitImportStats:
+    """Import one run per FIT file: decoded in a pool of ``workers`` processes
+    (default: one per core) and inserted by this process as they complete,
+    ``batch_size`` runs per ``bulk_insert_runs`` batch.
+
+    Decoding is what the pool spreads out; a single writer keeps the
+    database to one write transaction at a time. A file that fails to decode
+    is recorded in ``failed`` and skipped, and files imported before are
+    counted in ``skipped``. ``progress`` is called with each file and its
+    error, None if it decoded.
+    """
+    stats = FitImportStats()
+    start = time.perf_counter()
+    decode = partial(fit_file_row, unit=unit, run_type=run_type)
+
+    context = multiprocessing.get_context(POOL_START_METHOD)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = {executor.submit(decode, path): path for path in paths}
+
+        def rows():
+            for future in as_completed(futures):
+                # drop the finished future so its row is freed once inserted
+                path = futures.pop(future)
+                stats.files += 1
+                try:
+                    row = future.result()
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+                    stats.failed.append((path, error))
+                else:
+                    error = None
+                if progress is not None:
+                    progress(path, error)
+                if error is None:
+                    yield row
+
+        stats.insert = repo.bulk_insert_runs(rows(), batch_size=batch_size)
+        # a failed batch stops the import, drop the files not decoded yet
+        executor.shutdown(cancel_futures=True)
+
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def import_fit_archive(
+    repo: RunRepository,
+    path: Path | str,
+    *,
+    unit: DistanceUnit = DistanceUnit.KILOMETERS,
+    run_type: RunType = RunType.EASY,
+    members: Iterable[str] | None = None,
+    batch_size: int = 500,
+    progress: Callable[[Path, str | None], None] | None = None,
+) -> FitImportStats:
+    """Import one run per FIT member of a zip export, such as Strava's bulk
+    export, or just ``members``.
+
+    Each member is decompressed in memory as it is read, gzip included, so
+    nothing is unpacked to disk. When the archive has an activities.csv its
+    run type, notes and location override the defaults, and activities it
+    lists as something other than runs are counted in ``not_runs``. Decoding
+    is cheap next to decompression, so this runs in a single process.
+    ``progress`` is called as by ``import_fit_files`` for every member,
+    skipped ones included.
+    """
+    stats = FitImportStats()
+    start = time.perf_counter()
+
+    with ZipFile(path) as archive:
+        names = list(members) if members is not None else archive_fit_members(archive)
+        activities = {}
+        if ACTIVITIES_CSV in archive.namelist():
+            with archive.open(ACTIVITIES_CSV) as file:
+                activities = read_strava_activities(file)
+
+        def rows() -> Iterator[dict]:
+            for name in names:
+                details = activities.get(name, {})
+                if details is None:
+                    stats.not_runs += 1
+                    if progress is not None:
+                        progress(Path(name), None)
+                    continue
+                stats.files += 1
+                details = {"run_type": run_type, **details}
+                try:
+                    row = fit_data_row(
+                        read_archive_member(archive, name), unit, **details
+                    )
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+                    stats.failed.append((Path(name), error))
+                else:
+                    error = None
+                if progress is not None:
+                    progress(Path(name), error)
+                if error is None:
+                    yield row
+
+        stats.insert = repo.bulk_insert_runs(rows(), batch_size=batch_size)
+
+    stats.elapsed = time.perf_counter() - start
+    return stats
@@ -0,0 +1,223 @@
+from __future__ import annotations
+from dataclasses import dataclass, fields
+from typing import Iterable, Optional
+import numpy as np
+from running_analyzer.models import Run, DistanceUnit, RunType, METERS_PER_UNIT
+
+
+UNITS = list(DistanceUnit)
+RUN_TYPES = list(RunType)
+UNIT_CODES = {unit: code for code, unit in enumerate(UNITS)}
+RUN_TYPE_CODES = {run_type: code for code, run_type in enumerate(RUN_TYPES)}
+
+# column order of the rows RunFrame.from_rows expects
+FRAME_COLUMNS = (
+    "id",
+    "date",
+    "distance",
+    "unit",
+    "duration",
+    "heart_rate",
+    "elevation_gain",
+    "run_type",
+    "distance_m",
+)
+
+
+def _optional(value: np.floating) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+@dataclass
+class RunFrame:
+    """Parallel NumPy arrays holding the analytic columns of many runs.
+
+    ``unit`` and ``run_type`` are stored as small integer codes into
+    ``UNITS`` / ``RUN_TYPES``; missing heart rate and elevation are NaN.
+    The aggregations mirror the ``Run`` classmethods of the same name; given a
+    ``unit`` they total the normalized ``distance_m`` instead, like the
+    RunRepository aggregates.
+    """
+
+    id: np.ndarray
+    date: np.ndarray
+    distance: np.ndarray
+    unit: np.ndarray
+    duration: np.ndarray
+    heart_rate: np.ndarray
+    elevation_gain: np.ndarray
+    run_type: np.ndarray
+    distance_m: np.ndarray
+
+    @classmethod
+    def empty(cls) -> RunFrame:
+        return cls.from_rows([])
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> RunFrame:
+        """Build a frame from tuples in ``FRAME_COLUMNS`` order."""
+        columns = list(zip(*rows)) or [()] * len(FRAME_COLUMNS)
+        ids, dates, distances, units, durations, hrs, elevations, types, meters = (
+            columns
+        )
+
+        return cls(
+            id=np.array(ids, dtype=np.int64),
+            date=np.array(dates, dtype="datetime64[us]"),
+            distance=np.array(distances, dtype=np.float64),
+            unit=np.array([UNIT_CODES[DistanceUnit(u)] for u in units], dtype=np.int8),
+            duration=np.array(durations, dtype=np.float64),
+            heart_rate=np.array(hrs, dtype=np.float64),
+            elevation_gain=np.array(elevations, dtype=np.float64),
+            run_type=np.array(
+                [RUN_TYPE_CODES[RunType(t)] for t in types], dtype=np.int8
+            ),
+            distance_m=np.array(meters, dtype=np.float64),
+        )
+
+    @classmethod
+    def from_runs(cls, runs: Iterable[Run]) -> RunFrame:
+        return cls.from_rows(
+            tuple(getattr(run, column) for column in FRAME_COLUMNS) for run in runs
+        )
+
+    @classmethod
+    def concat(cls, frames: list[RunFrame]) -> RunFrame:
+        if not frames:
+            return cls.empty()
+        return cls(
+            **{
+                field.name: np.concatenate([getattr(f, field.name) for f in frames])
+                for field in fields(cls)
+            }
+        )
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def take(self, index) -> RunFrame:
+        """Rows selected by a boolean mask or integer index array."""
+        return RunFrame(
+            **{field.name: getattr(self, field.name)[index] for field in fields(self)}
+        )
+
+    def to_run(self, i: int) -> Run:
+        return Run(
+            id=int(self.id[i]),
+            date=self.date[i].astype("datetime64[us]").item(),
+            distance=float(self.distance[i]),
+            unit=UNITS[self.unit[i]],
+            duration=float(self.duration[i]),
+            heart_rate=_optional(self.heart_rate[i]),
+            elevation_gain=_optional(self.elevation_gain[i]),
+            run_type=RUN_TYPES[self.run_type[i]],
+            distance_m=float(self.distance_m[i]),
+        )
+
+    @property
+    def calculated_pace(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.distance > 0, self.duration / self.distance, 0.0)
+
+    @property
+    def pace_s_per_km(self) -> np.ndarray:
+        """``Run.pace_s_per_km``, NaN where the distance is zero."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(
+                self.distance_m > 0,
+                self.duration * 60 / (self.distance_m / 1000),
+                np.nan,
+            )
+
+    def distance_in(self, unit: Optional[DistanceUnit] = None) -> np.ndarray:
+        if unit is None:
+            return self.distance
+        return self.distance_m / METERS_PER_UNIT[unit]
+
+    def summarize_runs(self, unit: Optional[DistanceUnit] = None) -> Optional[dict]:
+        total_runs = len(self)
+        if not total_runs:
+            return None
+
+        total_distance = float(self.distance_in(unit).sum())
+        total_duration = float(self.duration.sum())
+        return {
+            "total_runs": total_runs,
+            "total_distance": total_distance,
+            "total_duration": total_duration,
+            "avg_distance": total_distance / total_runs,
+            "avg_duration": total_duration / total_runs,
+            "avg_pace": total_duration / total_distance if total_distance > 0 else 0,
+        }
+
+    def average_pace(self) -> float:
+        total_distance = self.distance.sum()
+        return float(self.duration.sum() / total_distance) if total_distance else 0
+
+    # the run stats return a row index into the frame, None when nothing qualifies
+    def best_run(self) -> Optional[int]:
+        valid = self.distance > 0
+        if not valid.any():
+            return None
+        return int(np.argmin(np.where(valid, self.calculated_pace, np.inf)))
+
+    def slowest_run(self) -> Optional[int]:
+        valid = self.distance > 0
+        if not valid.any():
+            return None
+        return int(np.argmax(np.where(valid, self.calculated_pace, -np.inf)))
+
+    def longest_run(self) -> Optional[int]:
+        return int(np.argmax(self.distance)) if len(self) else None
+
+    def shortest_run(self) -> Optional[int]:
+        return int(np.argmin(self.distance)) if len(self) else None
+
+    def week_keys(self) -> np.ndarray:
+        """``strftime("%Y-%W")`` as ``year * 100 + week`` integers."""
+        days = self.date.astype("datetime64[D]").astype(np.int64)
+        year_start = self.date.astype("datetime64[Y]")
+        yday = days - year_start.astype("datetime64[D]").astype(np.int64)
+        weekday = (days + 3) % 7  # 1970-01-01 was a Thursday, Monday is 0
+        year = year_start.astype(np.int64) + 1970
+        return year * 100 + (yday + 7 - weekday) // 7
+
+    def month_keys(self) -> np.ndarray:
+        """``strftime("%Y-%m")`` as ``year * 100 + month`` integers."""
+        months = self.date.astype("datetime64[M]").astype(np.int64)
+        return (months // 12 + 1970) * 100 + months % 12 + 1
+
+    def _period_summary(self, keys: np.ndarray, distance: np.ndarray) -> dict:
+        if not len(keys):
+            return {}
+
+        # keys are dense enough (at most 100 per year) to bincount directly
+        first = keys.min()
+        index = keys - first
+        present = np.flatnonzero(np.bincount(index))
+        distances = np.bincount(index, weights=distance)[present]
+        durations = np.bincount(index, weights=self.duration)[present]
+        buckets = present + first
+
+        return {
+            f"{bucket // 100:04d}-{bucket % 100:02d}": {
+                "total_distance": distance,
+                "total_duration": duration,
+                "avg_pace": duration / distance if distance > 0 else 0.0,
+            }
+            for bucket, distance, duration in zip(
+                buckets.tolist(), distances.tolist(), durations.tolist()
+            )
+        }
+
+    def weekly_summary(self, unit: Optional[DistanceUnit] = None) -> dict:
+        return self._period_summary(self.week_keys(), self.distance_in(unit))
+
+    def monthly_summary(self, unit: Optional[DistanceUnit] = None) -> dict:
+        return self._period_summary(self.month_keys(), self.distance_in(unit))
+
+    def run_type_distribution(self) -> dict:
+        counts = np.bincount(self.run_type, minlength=len(RUN_TYPES))
+        return {
+            RUN_TYPES[code]: int(count) for code, count in enumerate(counts) if count
+        }
@@ -1,8 +1,9 @@
 from __future__ import annotations
-from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, LargeBinary
+from sqlmodel import SQLModel, Field, Index
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Iterable, Optional
 from collections import defaultdict, Counter
 
 
@@ -20,10 +21,48 @@ class RunType(str, Enum):
     RECOVERY = "Recovery"
 
 
+METERS_PER_UNIT = {DistanceUnit.MILES: 1609.344, DistanceUnit.KILOMETERS: 1000.0}
+
+
+def to_meters(distance: float, unit: DistanceUnit | str) -> float:
+    return distance * METERS_PER_UNIT[DistanceUnit(unit)]
+
+
+def pace_per_km(duration: float, distance_m: float) -> float | None:
+    """Pace in seconds per km for a duration in minutes, None for zero distance."""
+    return duration * 60 / (distance_m / 1000) if distance_m > 0 else None
+
+
+class Athlete(SQLModel, table=True):
+    """The owner of a set of runs; every RunRepository reads and writes the
+    runs of one athlete."""
+
+    __tablename__ = "athlete"
+
+    id: int | None = Field(default=None, primary_key=True)
+    name: str = Field(..., description="Athlete name", unique=True)
+
+
 class Run(SQLModel, table=True):
     __tablename__ = "run"
+    # every repository query filters on athlete_id, so it leads the indexes
+    # the per-athlete queries seek and order by
+    __table_args__ = (
+        Index("ix_run_athlete_id_date", "athlete_id", "date"),
+        Index("ix_run_athlete_id_run_type_date", "athlete_id", "run_type", "date"),
+        Index("ix_run_athlete_id_distance_m", "athlete_id", "distance_m"),
+        Index("ix_run_athlete_id_pace_s_per_km", "athlete_id", "pace_s_per_km"),
+        Index("ix_run_athlete_id_location", "athlete_id", "location"),
+        # what an import came from, so re-imports can skip what is already here
+        Index(
+            "ix_run_athlete_id_source_hash", "athlete_id", "source_hash", unique=True
+        ),
+    )
 
     id: int | None = Field(default=None, primary_key=True)
+    athlete_id: int | None = Field(
+        default=None, foreign_key="athlete.id", nullable=False
+    )
     date: datetime = Field(default_factory=datetime.utcnow)
     distance: float = Field(..., description="Distance Covered", ge=0)
     unit: DistanceUnit = Field(..., description="Unit of measurement (mi/km)")
@@ -34,6 +73,18 @@ class Run(SQLModel, table=True):
     run_type: RunType = Field(..., description="Type of run")
     location: str | None = Field(default=None, description="Run Location")
     notes: str | None = Field(default=None, description="Running Notes")
+    distance_m: float | None = Field(default=None, description="Distance in meters")
+    pace_s_per_km: float | None = Field(
+        default=None, description="Pace in seconds per km"
+    )
+    source_hash: str | None = Field(
+        default=None, description="SHA-256 of the imported FIT file or CSV row"
+    )
+
+    def normalize(self) -> Run:
+        self.distance_m = to_meters(self.distance, self.unit)
+        self.pace_s_per_km = pace_per_km(self.duration, self.distance_m)
+        return self
 
     @property
     def calculated_pace(self) -> float:
@@ -65,6 +116,57 @@ class Run(SQLModel, table=True):
             "avg_pace": avg_pace,
         }
 
+    @classmethod
+    def run_stats(cls, runs: Iterable[Run]) -> Optional[dict]:
+        """Summary, best/slowest/longest/shortest run and type counts in one pass.
+
+        Ties resolve to the first run seen, like the separate classmethods.
+        """
+        total_runs = 0
+        total_distance = 0
+        total_duration = 0
+        best = slowest = longest = shortest = None
+        best_pace = slowest_pace = longest_distance = shortest_distance = 0
+        run_types = Counter()
+
+        for run in runs:
+            # read each column once, model attribute access is not free
+            distance = run.distance
+            duration = run.duration
+            total_runs += 1
+            total_distance += distance
+            total_duration += duration
+            run_types[run.run_type] += 1
+
+            if longest is None or distance > longest_distance:
+                longest, longest_distance = run, distance
+            if shortest is None or distance < shortest_distance:
+                shortest, shortest_distance = run, distance
+
+            if distance > 0:
+                pace = duration / distance
+                if best is None or pace < best_pace:
+                    best, best_pace = run, pace
+                if slowest is None or pace > slowest_pace:
+                    slowest, slowest_pace = run, pace
+
+        if not total_runs:
+            return None
+
+        return {
+            "total_runs": total_runs,
+            "total_distance": total_distance,
+            "total_duration": total_duration,
+            "avg_distance": total_distance / total_runs,
+            "avg_duration": total_duration / total_runs,
+            "avg_pace": total_duration / total_distance if total_distance > 0 else 0,
+            "best_run": best,
+            "slowest_run": slowest,
+            "longest_run": longest,
+            "shortest_run": shortest,
+            "run_types": dict(run_types),
+        }
+
     @classmethod
     def best_run(cls, runs: list[Run]) -> Optional[Run]:
         valid_runs = [run for run in runs if run.distance > 0]
@@ -174,3 +276,41 @@ class Run(SQLModel, table=True):
             location=location,
             notes=notes,
         )
+
+
+class RunTrack(SQLModel, table=True):
+    """A run's per-sample streams, packed by ``track.encode_track``. Kept out
+    of the run table so that reading runs never reads the samples."""
+
+    __tablename__ = "run_track"
+
+    run_id: int = Field(primary_key=True, foreign_key="run.id")
+    samples: int = Field(default=0, description="Number of samples")
+    data: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+
+
+class RunRollup(SQLModel, table=True):
+    """Run totals per athlete, period bucket and run type, maintained by
+    RunRepository alongside every write to the run table."""
+
+    __tablename__ = "run_rollup"
+
+    athlete_id: int = Field(primary_key=True, foreign_key="athlete.id")
+    period: str = Field(primary_key=True, description="week or month")
+    bucket: str = Field(primary_key=True, description="strftime key, e.g. 2025-07")
+    run_type: RunType = Field(primary_key=True)
+    run_count: int = Field(default=0)
+    distance_m: float = Field(default=0.0, description="Distance in meters")
+    duration: float = Field(default=0.0, description="Duration in minutes")
+
+
+class DataVersion(SQLModel, table=True):
+    """Single-row counters bumped by writes: ``version`` by every write, used
+    to invalidate cached query results, ``rewrites`` only by writes that
+    change or remove existing runs rather than append new ones."""
+
+    __tablename__ = "data_version"
+
+    id: int = Field(default=1, primary_key=True)
+    version: int = Field(default=0)
+    rewrites: int = Field(default=0)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+from dataclasses import dataclass, fields, replace
+from datetime import datetime
+from typing import Optional
+from sqlmodel import select
+from running_analyzer.db import run_filters
+from running_analyzer.models import METERS_PER_UNIT, DistanceUnit, Run, RunType
+
+
+@dataclass(frozen=True)
+class RunQuery:
+    """Run filters as the CLI takes them, compiled to ``run_filters`` keywords.
+
+    Distances are in ``unit`` and paces in minutes per ``unit``; both are
+    converted to the indexed ``distance_m`` and ``pace_s_per_km`` columns, so
+    every filter runs in the database in one parameterized statement.
+    """
+
+    run_type: Optional[RunType] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    min_distance: Optional[float] = None
+    max_distance: Optional[float] = None
+    min_pace: Optional[float] = None
+    max_pace: Optional[float] = None
+    location: Optional[str] = None
+    hr_above: Optional[float] = None
+    unit: DistanceUnit = DistanceUnit.KILOMETERS
+
+    def where(self, **changes) -> RunQuery:
+        """A copy with more filters set, e.g. ``query.where(run_type=...)``."""
+        return replace(self, **changes)
+
+    def __bool__(self) -> bool:
+        return any(
+            getattr(self, field.name) is not None
+            for field in fields(self)
+            if field.name != "unit"
+        )
+
+    def filters(self) -> dict:
+        """The keyword arguments for ``run_filters`` and the RunRepository
+        methods that take them, without the ones left unset."""
+        meters = METERS_PER_UNIT[DistanceUnit(self.unit)]
+
+        def distance_m(distance):
+            return None if distance is None else distance * meters
+
+        def pace_s_per_km(pace):
+            return None if pace is None else pace * 60 / (meters / 1000)
+
+        filters = {
+            "run_type": self.run_type,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "location": self.location,
+            "min_distance_m": distance_m(self.min_distance),
+            "max_distance_m": distance_m(self.max_distance),
+            "min_pace_s_per_km": pace_s_per_km(self.min_pace),
+            "max_pace_s_per_km": pace_s_per_km(self.max_pace),
+            "hr_above": self.hr_above,
+        }
+        return {name: value for name, value in filters.items() if value is not None}
+
+    def statement(self, **filters):
+        """The matching runs in (date, id) order, ``filters`` adds more
+        ``run_filters`` keywords, e.g. the athlete."""
+        conditions = run_filters(**self.filters(), **filters)
+        return select(Run).where(*conditions).order_by(Run.date, Run.id)
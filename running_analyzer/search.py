@@ -0,0 +1,98 @@
+from sqlalchemy import DDL, event, func, literal_column, select, table, column
+from running_analyzer.models import Run
+
+
+# SQLite: an external-content FTS5 table over run.notes and run.location,
+# kept in step with the run table by triggers, so every write path (ORM,
+# bulk insert, set-based update/delete) updates it
+SQLITE_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS run_fts USING fts5(
+        notes, location, content='run', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS run_fts_insert AFTER INSERT ON run BEGIN
+        INSERT INTO run_fts(rowid, notes, location)
+        VALUES (new.id, new.notes, new.location);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS run_fts_delete AFTER DELETE ON run BEGIN
+        INSERT INTO run_fts(run_fts, rowid, notes, location)
+        VALUES ('delete', old.id, old.notes, old.location);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS run_fts_update
+    AFTER UPDATE OF notes, location ON run BEGIN
+        INSERT INTO run_fts(run_fts, rowid, notes, location)
+        VALUES ('delete', old.id, old.notes, old.location);
+        INSERT INTO run_fts(rowid, notes, location)
+        VALUES (new.id, new.notes, new.location);
+    END
+    """,
+]
+
+# PostgreSQL: a GIN index on the same expression search_statement matches on,
+# the regconfig and separators are literals so the planner can use the index
+PG_SEARCH_DOCUMENT = (
+    "to_tsvector('english', coalesce(notes, '') || ' ' || coalesce(location, ''))"
+)
+PG_SEARCH_INDEX_DDL = (
+    f"CREATE INDEX IF NOT EXISTS ix_run_search ON run USING gin ({PG_SEARCH_DOCUMENT})"
+)
+
+for statement in SQLITE_FTS_DDL:
+    event.listen(
+        Run.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite")
+    )
+event.listen(
+    Run.__table__,
+    "after_create",
+    DDL(PG_SEARCH_INDEX_DDL).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Run.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS run_fts").execute_if(dialect="sqlite"),
+)
+
+run_fts = table("run_fts", column("rowid"))
+
+
+def fts5_query(terms: str) -> str:
+    """User input as an FTS5 query: every word must match, each quoted so
+    punctuation is not read as query syntax; a trailing ``*`` searches by
+    prefix."""
+    words = []
+    for word in terms.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            words.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(words)
+
+
+def search_statement(terms: str, dialect: str, conditions: list = ()):
+    """Runs matching ``terms`` in their notes or location with a relevance
+    score, best match first."""
+    if dialect == "postgresql":
+        document = literal_column(PG_SEARCH_DOCUMENT)
+        query = func.websearch_to_tsquery(literal_column("'english'"), terms)
+        rank = func.ts_rank(document, query)
+        return (
+            select(Run, rank.label("rank"))
+            .where(document.op("@@")(query), *conditions)
+            .order_by(rank.desc(), Run.id)
+        )
+
+    # bm25() is lower for better matches, negate it so higher is better
+    rank = -func.bm25(literal_column("run_fts"))
+    return (
+        select(Run, rank.label("rank"))
+        .join_from(run_fts, Run, Run.id == run_fts.c.rowid)
+        .where(literal_column("run_fts").op("MATCH")(fts5_query(terms)), *conditions)
+        .order_by(rank.desc(), Run.id)
+    )
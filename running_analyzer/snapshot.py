@@ -0,0 +1,219 @@
+from __future__ import annotations
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+import numpy as np
+from decouple import config
+from sqlalchemy.engine import make_url
+from running_analyzer.db import RunRepository
+from running_analyzer.frame import UNITS, RunFrame, FRAME_COLUMNS
+from running_analyzer.models import DistanceUnit, Run
+
+
+META_FILE = "meta.json"
+
+
+def default_snapshot_dir(
+    database_url: str, athlete_id: int | None = None
+) -> Optional[Path]:
+    """``SNAPSHOT_DIR``, else ``<database>.snapshot`` next to a SQLite file,
+    with an ``athlete-<id>`` directory inside for each athlete if given.
+
+    None for other databases without ``SNAPSHOT_DIR`` and in-memory SQLite.
+    """
+    configured = config("SNAPSHOT_DIR", default=None)
+    if configured:
+        path = Path(configured).expanduser()
+    else:
+        url = make_url(database_url)
+        in_memory = url.database in (None, "", ":memory:")
+        if url.get_backend_name() != "sqlite" or in_memory:
+            return None
+        path = Path(url.database).with_suffix(".snapshot")
+    return path if athlete_id is None else path / f"athlete-{athlete_id}"
+
+
+class FrameSnapshot:
+    """RunFrame columns saved as one ``.npy`` file each and memory-mapped back.
+
+    ``meta.json`` records the athlete, the row count, the highest run id in the
+    snapshot and the database's (version, rewrites) counters when it was
+    written. Runs that
+    were only appended since then are fetched by id and added to the snapshot;
+    an update or delete of an existing run rebuilds it from scratch.
+    """
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+
+    def exists(self) -> bool:
+        return (self.path / META_FILE).exists()
+
+    def read_meta(self) -> Optional[dict]:
+        try:
+            return json.loads((self.path / META_FILE).read_text())
+        except (OSError, ValueError):
+            return None
+
+    def load(self) -> Optional[tuple[dict, RunFrame]]:
+        """The metadata and memory-mapped frame, None if missing or damaged."""
+        meta = self.read_meta()
+        if meta is None:
+            return None
+
+        # numpy cannot map a zero-length file
+        mmap_mode = "r" if meta["rows"] else None
+        try:
+            columns = {
+                column: np.load(self.path / f"{column}.npy", mmap_mode=mmap_mode)
+                for column in FRAME_COLUMNS
+            }
+        except (OSError, ValueError):
+            return None
+
+        if any(len(values) != meta["rows"] for values in columns.values()):
+            return None  # interrupted write
+        return meta, RunFrame(**columns)
+
+    def write(
+        self,
+        frame: RunFrame,
+        *,
+        version: int,
+        rewrites: int,
+        athlete_id: int | None = None,
+        columns: bool = True,
+    ) -> dict:
+        """Save the frame, replacing each file atomically, metadata last.
+
+        ``columns=False`` only rewrites the metadata, for a version bump that
+        added no runs.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        if columns:
+            for column in FRAME_COLUMNS:
+                target = self.path / f"{column}.npy"
+                partial = target.with_suffix(".npy.tmp")
+                with open(partial, "wb") as file:
+                    np.save(file, np.ascontiguousarray(getattr(frame, column)))
+                os.replace(partial, target)
+
+        meta = {
+            "athlete_id": athlete_id,
+            "rows": len(frame),
+            "last_id": int(frame.id.max()) if len(frame) else 0,
+            "version": version,
+            "rewrites": rewrites,
+        }
+        partial = self.path / f"{META_FILE}.tmp"
+        partial.write_text(json.dumps(meta))
+        os.replace(partial, self.path / META_FILE)
+        return meta
+
+    def refresh(self, repo: RunRepository) -> RunFrame:
+        """Bring the snapshot up to the database's data version and return it.
+
+        An up-to-date snapshot costs one read of the version row.
+        """
+        version, rewrites = repo.data_versions()
+        athlete_id = repo.athlete_id
+        loaded = self.load()
+        if loaded is not None and loaded[0].get("athlete_id") == athlete_id:
+            meta, frame = loaded
+            if (meta["version"], meta["rewrites"]) == (version, rewrites):
+                return frame
+
+            if meta["rewrites"] == rewrites:
+                added = repo.load_frame(after_id=meta["last_id"])
+                if len(added):
+                    frame = RunFrame.concat([frame, added])
+                    # appended runs can be dated before the ones snapshotted
+                    frame = frame.take(np.lexsort((frame.id, frame.date)))
+                self.write(
+                    frame,
+                    version=version,
+                    rewrites=rewrites,
+                    athlete_id=athlete_id,
+                    columns=bool(len(added)),
+                )
+                return frame
+
+        frame = repo.load_frame()
+        self.write(frame, version=version, rewrites=rewrites, athlete_id=athlete_id)
+        return frame
+
+    def drop(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def _first_index(key: np.ndarray, ids: np.ndarray) -> Optional[int]:
+    """Row with the smallest non-NaN ``key``, ties to the smallest id."""
+    valid = ~np.isnan(key)
+    if not valid.any():
+        return None
+    candidates = np.flatnonzero(valid & (key == key[valid].min()))
+    return int(candidates[np.argmin(ids[candidates])])
+
+
+class FrameRepository:
+    """The read-only RunRepository analytics answered from a RunFrame.
+
+    Method names and results match RunRepository, with distances totalled from
+    the normalized ``distance_m`` and the run stats ranked by ``distance_m`` and
+    ``pace_s_per_km``, so the CLI can read either.
+    """
+
+    def __init__(self, frame: RunFrame):
+        self.frame = frame
+
+    def _run(self, index: Optional[int]) -> Optional[Run]:
+        return None if index is None else self.frame.to_run(index)
+
+    def load_frame(self) -> RunFrame:
+        return self.frame
+
+    def get_display_unit(self) -> Optional[DistanceUnit]:
+        if not len(self.frame):
+            return None
+        return UNITS[self.frame.unit[np.argmin(self.frame.id)]]
+
+    def summarize_runs(
+        self, unit: DistanceUnit = DistanceUnit.KILOMETERS
+    ) -> Optional[dict]:
+        return self.frame.summarize_runs(unit)
+
+    def weekly_summary(self, unit: DistanceUnit = DistanceUnit.KILOMETERS) -> dict:
+        return self.frame.weekly_summary(unit)
+
+    def monthly_summary(self, unit: DistanceUnit = DistanceUnit.KILOMETERS) -> dict:
+        return self.frame.monthly_summary(unit)
+
+    def get_best_run(self) -> Optional[Run]:
+        return self._run(_first_index(self.frame.pace_s_per_km, self.frame.id))
+
+    def get_slowest_run(self) -> Optional[Run]:
+        return self._run(_first_index(-self.frame.pace_s_per_km, self.frame.id))
+
+    def get_longest_run(self) -> Optional[Run]:
+        return self._run(_first_index(-self.frame.distance_m, self.frame.id))
+
+    def get_shortest_run(self) -> Optional[Run]:
+        return self._run(_first_index(self.frame.distance_m, self.frame.id))
+
+    def get_run_stats(
+        self, unit: DistanceUnit = DistanceUnit.KILOMETERS
+    ) -> Optional[dict]:
+        summary = self.summarize_runs(unit)
+        if summary is None:
+            return None
+
+        return {
+            **summary,
+            "best_run": self.get_best_run(),
+            "slowest_run": self.get_slowest_run(),
+            "longest_run": self.get_longest_run(),
+            "shortest_run": self.get_shortest_run(),
+            "run_types": self.frame.run_type_distribution(),
+        }
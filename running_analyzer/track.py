@@ -0,0 +1,112 @@
+import struct
+import zlib
+
+import numpy as np
+
+from running_analyzer.fit import RECORD_FIELDS
+
+TRACK_FORMAT = 1
+TRACK_COLUMNS = tuple(RECORD_FIELDS)
+FLOAT_COLUMNS = TRACK_COLUMNS[1:]
+
+# format, bitmask of the stored float columns, sample count
+HEADER = struct.Struct("<BHI")
+
+
+def _shuffle(values: np.ndarray) -> bytes:
+    # byte i of every value together: the slowly changing high bytes of a
+    # stream become long runs zlib packs tightly
+    return values.view(np.uint8).reshape(-1, values.itemsize).T.tobytes()
+
+
+def _unshuffle(data: memoryview, dtype: str, count: int) -> np.ndarray:
+    dtype = np.dtype(dtype)
+    raw = np.frombuffer(data, dtype=np.uint8, count=count * dtype.itemsize)
+    return raw.reshape(dtype.itemsize, count).T.copy().view(dtype).ravel()
+
+
+def encode_track(columns: dict[str, np.ndarray]) -> bytes:
+    """Pack ``read_fit_columns`` output into one zlib-compressed blob.
+
+    Timestamps are stored as deltas from the previous sample and the other
+    streams as float32 (positions to about half a metre), byte-shuffled
+    first. Streams without a single value are left out.
+    """
+    count = len(columns["timestamp"])
+    timestamps = np.asarray(columns["timestamp"], dtype="<i8")
+    parts = [_shuffle(np.diff(timestamps, prepend=np.int64(0)))]
+    mask = 0
+    for bit, name in enumerate(FLOAT_COLUMNS):
+        values = columns.get(name)
+        if values is None or np.isnan(values).all():
+            continue
+        mask |= 1 << bit
+        parts.append(_shuffle(np.asarray(values, dtype="<f4")))
+    return HEADER.pack(TRACK_FORMAT, mask, count) + zlib.compress(b"".join(parts))
+
+
+def decode_track(data: bytes) -> dict[str, np.ndarray]:
+    """The ``read_fit_columns`` arrays an ``encode_track`` blob holds, with
+    NaN columns for the streams it left out."""
+    version, mask, count = HEADER.unpack_from(data)
+    if version != TRACK_FORMAT:
+        raise ValueError(f"Unknown track format {version}")
+    payload = memoryview(zlib.decompress(data[HEADER.size :]))
+
+    columns = {"timestamp": np.cumsum(_unshuffle(payload, "<i8", count))}
+    offset = count * 8
+    for bit, name in enumerate(FLOAT_COLUMNS):
+        if mask & 1 << bit:
+            values = _unshuffle(payload[offset:], "<f4", count)
+            columns[name] = values.astype(np.float64)
+            offset += count * 4
+        else:
+            columns[name] = np.full(count, np.nan)
+    return columns
+
+
+def track_splits(columns: dict[str, np.ndarray], split_m: float) -> list[dict]:
+    """Per-``split_m`` splits of a track: elapsed seconds, average heart rate
+    and elevation gain of each, the last one possibly partial.
+
+    Split times are interpolated at the exact boundary distances, and each
+    sample falls in the split of the distance interpolated at its time, so
+    devices that record heart rate and distance in separate samples work.
+    """
+    timed = columns["timestamp"] >= 0
+    timestamps = columns["timestamp"][timed].astype(np.float64)
+    distance = columns["distance"][timed]
+    measured = ~np.isnan(distance)
+    if not measured.any() or np.nanmax(distance) <= 0:
+        return []
+    # distance never decreases, whatever a device's glitches
+    distance_times = timestamps[measured]
+    distance = np.maximum.accumulate(distance[measured])
+
+    edges = np.append(np.arange(0, distance[-1], split_m), distance[-1])
+    times = np.interp(edges, distance, distance_times)
+    count = len(edges) - 1
+    split = np.searchsorted(edges, np.interp(timestamps, distance_times, distance))
+    split = np.clip(split - 1, 0, count - 1)
+
+    heart_rate = columns["heart_rate"][timed]
+    has_hr = ~np.isnan(heart_rate)
+    hr_sum = np.bincount(split[has_hr], heart_rate[has_hr], minlength=count)
+    hr_count = np.bincount(split[has_hr], minlength=count)
+
+    altitude = columns["altitude"][timed]
+    has_altitude = ~np.isnan(altitude)
+    climb = np.diff(altitude[has_altitude], prepend=np.nan)
+    climb = np.where(np.isnan(climb) | (climb < 0), 0, climb)
+    gain = np.bincount(split[has_altitude], climb, minlength=count)
+
+    return [
+        {
+            "split": i + 1,
+            "distance_m": float(edges[i + 1] - edges[i]),
+            "duration_s": float(times[i + 1] - times[i]),
+            "heart_rate": float(hr_sum[i] / hr_count[i]) if hr_count[i] else None,
+            "elevation_gain": float(gain[i]),
+        }
+        for i in range(count)
+    ]
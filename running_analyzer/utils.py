@@ -1,5 +1,13 @@
 import csv
-from running_analyzer.models import Run
+import hashlib
+import json
+import re
+import warnings
+from itertools import batched
+from pathlib import Path
+from typing import Iterable, Iterator
+import numpy as np
+from running_analyzer.models import Run, DistanceUnit, RunType, METERS_PER_UNIT
 from datetime import datetime
 from fitparse import FitFile
 import logging
@@ -8,35 +16,249 @@ import typer
 logging.basicConfig(level=logging.WARNING)
 
 
-def load_runs_from_csv(csv_file: str):
-    runs_to_add = []
-    invalid_rows = []
+class RejectsWriter:
+    """Side CSV holding rejected input rows plus the reason they were rejected.
+
+    The file is only created once the first row is rejected.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def write(self, row: dict, error: Exception | str):
+        if self._writer is None:
+            self._file = open(self.path, "w", newline="")
+            self._writer = csv.DictWriter(
+                self._file, fieldnames=[*row, "error"], extrasaction="ignore"
+            )
+            self._writer.writeheader()
+        self._writer.writerow({**row, "error": str(error)})
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+UNIT_LOOKUP = {
+    key.lower(): unit for unit in DistanceUnit for key in (unit.value, unit.name)
+}
+RUN_TYPE_LOOKUP = {
+    key.lower(): run_type
+    for run_type in RunType
+    for key in (run_type.value, run_type.name)
+}
+CSV_CHUNK_SIZE = 1000
+
+
+def normalize_header(name: str) -> str:
+    """Map headers like ``Duration (min)`` or ``Run Type`` to model field names."""
+    return re.sub(r"\(.*?\)", "", name).strip().lower().replace(" ", "_")
+
+
+def lookup_enum(lookup: dict, value: str | None):
+    try:
+        return lookup[(value or "").strip().lower()]
+    except KeyError:
+        raise ValueError(f"Invalid value: {value!r}") from None
+
+
+def parse_pace(value: str | None) -> float:
+    """Pace in minutes, given as decimal minutes (``5.25``) or ``mm:ss``."""
+    if not value:
+        return 0.0
+    if ":" in value:
+        minutes, seconds = value.split(":")
+        return int(minutes) + int(seconds) / 60
+    return float(value)
+
+
+def parse_run_row(row: dict) -> Run:
+    """Fully validate one CSV row through the ``Run`` model."""
+    return Run.model_validate(
+        {
+            "date": row["date"],
+            "distance": row["distance"] or 0,
+            "unit": lookup_enum(UNIT_LOOKUP, row.get("unit", "km")),
+            "duration": row["duration"] or 0,
+            "heart_rate": row["heart_rate"] or 0,
+            "elevation_gain": row["elevation_gain"] or 0,
+            "pace": parse_pace(row["pace"]),
+            "run_type": lookup_enum(RUN_TYPE_LOOKUP, row["run_type"]),
+            "location": row.get("location", ""),
+            "notes": row.get("notes", ""),
+        }
+    ).normalize()
+
+
+def _column(values: list, convert, dtype, ok: np.ndarray) -> np.ndarray:
+    """Convert a whole column at once, falling back to element-wise conversion
+    (and marking the bad rows in ``ok``) when the fast conversion fails."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        try:
+            return np.array(values, dtype=dtype)
+        except (ValueError, TypeError, Warning):
+            pass
+
+        column = np.zeros(len(values), dtype=dtype)
+        for i, value in enumerate(values):
+            try:
+                column[i] = convert(value)
+            except (ValueError, TypeError, Warning):
+                ok[i] = False
+        return column
+
+
+def parse_run_chunk(chunk: list[dict]) -> list[dict | None]:
+    """Column-wise parse of a chunk of CSV rows into insertable run rows, with
+    None in place of every row that failed the fast checks."""
+    ok = np.ones(len(chunk), dtype=bool)
+
+    def floats(name: str) -> np.ndarray:
+        values = [row.get(name) or "0" for row in chunk]
+        return _column(values, float, np.float64, ok)
+
+    dates = _column(
+        [row.get("date") or "" for row in chunk], np.datetime64, "datetime64[us]", ok
+    )
+    ok &= ~np.isnat(dates)
+
+    distance = floats("distance")
+    duration = floats("duration")
+    heart_rate = floats("heart_rate")
+    elevation_gain = floats("elevation_gain")
+    pace = _column([row.get("pace") for row in chunk], parse_pace, np.float64, ok)
+    ok &= (distance >= 0) & (duration >= 0)
+    ok &= np.isfinite(heart_rate) & np.isfinite(elevation_gain) & np.isfinite(pace)
+
+    units = [
+        UNIT_LOOKUP.get((row.get("unit", "km") or "").strip().lower()) for row in chunk
+    ]
+    run_types = [
+        RUN_TYPE_LOOKUP.get((row.get("run_type") or "").strip().lower())
+        for row in chunk
+    ]
+    ok &= np.array([unit is not None for unit in units], dtype=bool)
+    ok &= np.array([run_type is not None for run_type in run_types], dtype=bool)
+
+    meters = np.array([METERS_PER_UNIT.get(unit, 0.0) for unit in units])
+    distance_m = distance * meters
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pace_s_per_km = np.where(
+            distance_m > 0, duration * 60 / (distance_m / 1000), np.nan
+        )
+
+    columns = zip(
+        dates.tolist(),
+        distance.tolist(),
+        duration.tolist(),
+        heart_rate.tolist(),
+        elevation_gain.tolist(),
+        pace.tolist(),
+        distance_m.tolist(),
+        pace_s_per_km.tolist(),
+    )
+    rows = []
+    for i, (row, values) in enumerate(zip(chunk, columns)):
+        if not ok[i]:
+            rows.append(None)
+            continue
+        date, dist, dur, hr, elevation, row_pace, dist_m, pace_km = values
+        rows.append(
+            {
+                "date": date,
+                "distance": dist,
+                "unit": units[i],
+                "duration": dur,
+                "heart_rate": hr,
+                "elevation_gain": elevation,
+                "pace": row_pace,
+                "run_type": run_types[i],
+                "location": row.get("location", ""),
+                "notes": row.get("notes", ""),
+                "distance_m": dist_m,
+                "pace_s_per_km": None if np.isnan(pace_km) else pace_km,
+            }
+        )
+    return rows
+
+
+def run_row_hash(row: dict) -> str:
+    """SHA-256 of a normalized run row, its ``source_hash`` for CSV imports."""
+    data = json.dumps(row, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def iter_run_rows(
+    csv_file: str,
+    rejects: RejectsWriter | None = None,
+    chunk_size: int = CSV_CHUNK_SIZE,
+) -> Iterator[dict]:
+    """Stream validated, normalized run rows from a CSV file.
+
+    Rows are parsed column-wise in chunks of ``chunk_size``; only rows failing
+    the fast checks go through the full ``Run`` model, and rows that fail that
+    too go to ``rejects`` (when given) instead of being kept around. Each row
+    carries its ``run_row_hash`` as ``source_hash``.
+    """
     with open(csv_file, newline="") as file:
         reader = csv.DictReader(file)
-        for row in reader:
-            try:
-                run = Run(
-                    date=row["date"],
-                    distance=float(row["distance"] or 0),
-                    unit=row.get("unit", "km"),
-                    duration=float(row["duration"] or 0),
-                    heart_rate=float(row["heart_rate"] or 0),
-                    elevation_gain=float(row["elevation_gain"] or 0),
-                    pace=float(row["pace"] or 0),
-                    run_type=row["run_type"],
-                    location=row.get("location", ""),
-                    notes=row.get("notes", ""),
-                )
-                runs_to_add.append(run)
-            except (KeyError, ValueError) as e:
-                logging.warning(f"Skipping row {row} due to error: {e}")
-                invalid_rows.append(row)
-    if invalid_rows:
-        print("The following rows were skipped due to invalid data:")
-        for invalid in invalid_rows:
-            print(invalid)
-
-    return runs_to_add
+        reader.fieldnames = [normalize_header(name) for name in reader.fieldnames or []]
+
+        for chunk in batched(reader, chunk_size):
+            for raw, row in zip(chunk, parse_run_chunk(chunk)):
+                if row is not None:
+                    yield {**row, "source_hash": run_row_hash(row)}
+                    continue
+                try:
+                    run = parse_run_row(raw)
+                except (KeyError, ValueError) as e:
+                    logging.debug(f"Skipping row {raw} due to error: {e}")
+                    if rejects is not None:
+                        rejects.write(raw, e)
+                    continue
+                row = run.model_dump(exclude={"id", "athlete_id", "source_hash"})
+                yield {**row, "source_hash": run_row_hash(row)}
+
+
+CSV_FIELDS = [
+    "date",
+    "distance",
+    "unit",
+    "duration",
+    "heart_rate",
+    "elevation_gain",
+    "pace",
+    "run_type",
+    "location",
+    "notes",
+]
+
+
+def write_runs_to_csv(runs: Iterable[Run], csv_file: str) -> int:
+    """Write runs in the import format, one row at a time. Returns the count."""
+    count = 0
+    with open(csv_file, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for run in runs:
+            row = run.model_dump(include=set(CSV_FIELDS))
+            row["date"] = run.date.isoformat()
+            row["unit"] = run.unit_display
+            row["run_type"] = RunType(run.run_type).value
+            writer.writerow(row)
+            count += 1
+    return count
 
 
 def display_run_details(run: Run):
@@ -54,26 +276,40 @@ def display_run_details(run: Run):
     typer.echo(f"  Notes: {run.notes}")
 
 
-def parse_fit_file(file_path):
-    """Parses a .fit file and extracts key running data."""
-    fitfile = FitFile(file_path)
+def iter_fit_records(file_path, fields=None):
+    """Yield the record messages of a .fit file (a path, bytes or binary file
+    object) one at a time, as ``parse_fit_file`` dicts limited to ``fields``
+    if given; records carrying none of ``fields`` are skipped.
 
-    records = []
+    fitparse decodes as it is asked for messages, so a caller that stops
+    iterating stops the decoding too and the file is closed. The messages
+    fitparse keeps for a second pass are dropped as records are yielded, so
+    memory stays flat however far the caller gets.
+    """
+    with FitFile(file_path) as fitfile:
+        for record in fitfile.get_messages("record"):
+            # get_messages replays this cache only when it starts
+            fitfile._messages.clear()
+            data = {}
+            for data_field in record:
+                if fields is not None and data_field.name not in fields:
+                    continue
+                value = data_field.value
 
-    for record in fitfile.get_messages("record"):
-        data = {}
-        for data_field in record:
-            value = data_field.value
+                # Convert datetime objects to strings
+                if isinstance(value, datetime):
+                    value = value.isoformat()
 
-            # Convert datetime objects to strings
-            if isinstance(value, datetime):
-                value = value.isoformat()
+                data[data_field.name] = value
 
-            data[data_field.name] = value
+            if data or fields is None:
+                yield data
 
-        records.append(data)
 
-    return records
+def parse_fit_file(file_path):
+    """Parses a .fit file (a path, bytes or binary file object) and extracts
+    key running data."""
+    return list(iter_fit_records(file_path))
 
 
 def get_last_distance(records):
@@ -113,3 +349,17 @@ def summarize_fit_data(records):
     }
 
     return summary
+
+
+def fit_run(summary: dict, unit: DistanceUnit, run_type: RunType, **details) -> Run:
+    """The run a FIT file recorded, from its ``summarize_fit_data`` summary;
+    ``details`` are other ``Run`` fields such as ``notes``."""
+    distance = summary["total_distance"] / METERS_PER_UNIT[DistanceUnit(unit)]
+    return Run(
+        date=datetime.fromisoformat(summary["last_timestamp"]),
+        distance=round(distance, 2),
+        unit=DistanceUnit(unit),
+        duration=summary["total_duration"],
+        run_type=RunType(run_type),
+        **details,
+    )
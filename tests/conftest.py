@@ -0,0 +1,44 @@
+import csv
+from datetime import datetime
+
+import pytest
+
+from running_analyzer.db import RunRepository
+from running_analyzer.models import DistanceUnit, Run, RunType
+from running_analyzer.utils import parse_run_row
+
+FAKE_RUN_DATA = "data/fake_run_data.csv"
+
+
+def create_run(**kwargs) -> Run:
+    """Helper function to create a new Run instance with overridden values."""
+    defaults = {
+        "date": datetime(2025, 1, 2, 0, 1),
+        "unit": DistanceUnit.MILES,
+        "distance": 5,
+        "duration": 60,
+        "run_type": RunType.RECOVERY,
+        "notes": "Second run",
+    }
+    defaults.update(kwargs)
+    return Run(**defaults)
+
+
+def fake_runs() -> list[Run]:
+    """The runs of data/fake_run_data.csv, not yet stored."""
+    with open(FAKE_RUN_DATA, newline="") as file:
+        return [parse_run_row(row) for row in csv.DictReader(file)]
+
+
+def load_fake_runs(repo: RunRepository) -> RunRepository:
+    for run in fake_runs():
+        repo.add_run(run)
+    return repo
+
+
+@pytest.fixture
+def fake_repo():
+    """An in-memory repository holding the fake runs, without a query cache."""
+    return load_fake_runs(
+        RunRepository("sqlite:///:memory:", create_db=True, cache_size=0)
+    )
@@ -0,0 +1,135 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from running_analyzer.async_db import AsyncRunRepository, async_database_url
+from running_analyzer.db import RunRepository
+from running_analyzer.fit_import import fit_data_row
+from running_analyzer.models import DistanceUnit, Run, RunType
+from tests.conftest import load_fake_runs
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'runs.db'}"
+    load_fake_runs(RunRepository(url, create_db=True))
+    return url
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_async_database_url():
+    assert str(async_database_url("sqlite:///runs.db")) == "sqlite+aiosqlite:///runs.db"
+    assert async_database_url("postgresql+psycopg2://db/runs").drivername == (
+        "postgresql+asyncpg"
+    )
+    assert async_database_url("postgresql+psycopg://db/runs").drivername == (
+        "postgresql+psycopg"
+    )
+
+
+def test_queries_match_sync_repository(database_url):
+    repo = RunRepository(database_url)
+    start = datetime(2025, 1, 1)
+
+    async def queries():
+        async with AsyncRunRepository(database_url) as async_repo:
+            return await asyncio.gather(
+                async_repo.get_run_stats(),
+                async_repo.weekly_summary(),
+                async_repo.monthly_summary(start_date=start),
+                async_repo.get_display_unit(),
+                async_repo.count_runs(run_type=RunType.TEMPO),
+                async_repo.list_runs_by_type(RunType.LONG),
+                async_repo.get_best_run(),
+                async_repo.data_version(),
+            )
+
+    stats, weekly, monthly, unit, tempo, long_runs, best, version = run(queries())
+
+    expected = repo.get_run_stats()
+    for key in ["best_run", "slowest_run", "longest_run", "shortest_run"]:
+        assert stats.pop(key).id == expected.pop(key).id
+    assert stats == expected
+    assert weekly == repo.weekly_summary()
+    assert monthly == repo.monthly_summary(start_date=start)
+    assert unit == repo.get_display_unit()
+    assert tempo == repo.count_runs(run_type=RunType.TEMPO)
+    assert [r.id for r in long_runs] == [r.id for r in repo.list_runs_by_type("Long")]
+    assert best.id == repo.get_best_run().id
+    assert version == repo.data_version()
+
+
+def test_streaming_reads(database_url):
+    repo = RunRepository(database_url)
+
+    async def reads():
+        async with AsyncRunRepository(database_url) as async_repo:
+            first = await async_repo.list_runs_page(limit=10)
+            second = await async_repo.list_runs_page(limit=10, after_id=first[-1].id)
+            frame = await async_repo.load_frame(batch_size=30)
+            return first, second, frame
+
+    first, second, frame = run(reads())
+    expected = [r.id for r in repo.iter_runs(limit=20)]
+    assert [r.id for r in first + second] == expected
+    assert frame.id.tolist() == repo.load_frame().id.tolist()
+
+
+def test_empty_database(tmp_path):
+    url = f"sqlite:///{tmp_path / 'empty.db'}"
+    RunRepository(url, create_db=True)
+
+    async def queries():
+        async with AsyncRunRepository(url) as async_repo:
+            return await async_repo.get_run_stats(), await async_repo.weekly_summary()
+
+    assert run(queries()) == (None, {})
+
+
+def test_athlete_scope(database_url):
+    RunRepository(database_url, athlete="bob").add_run(
+        Run(
+            date=datetime(2025, 3, 1),
+            distance=5,
+            unit=DistanceUnit.KILOMETERS,
+            duration=30,
+            run_type=RunType.EASY,
+        )
+    )
+
+    async def counts():
+        async with AsyncRunRepository(database_url, athlete="bob") as bob:
+            async with AsyncRunRepository(database_url, athlete="carol") as carol:
+                return (
+                    await bob.count_runs(),
+                    await bob.get_run_by_id(1),
+                    await carol.summarize_runs(),
+                )
+
+    assert run(counts()) == (1, None, None)
+
+
+def test_get_run_track(database_url):
+    fit_file = "data/Morning_Run.fit"
+    repo = RunRepository(database_url)
+    with open(fit_file, "rb") as file:
+        repo.bulk_insert_runs(
+            [fit_data_row(file.read(), DistanceUnit.KILOMETERS, RunType.EASY)]
+        )
+    run_id = repo.count_runs()
+
+    async def tracks():
+        async with AsyncRunRepository(database_url) as async_repo:
+            return await async_repo.get_run_track(
+                run_id
+            ), await async_repo.get_run_track(1)
+
+    track, missing = run(tracks())
+    assert missing is None
+    assert (
+        track["timestamp"].tolist() == repo.get_run_track(run_id)["timestamp"].tolist()
+    )
@@ -0,0 +1,34 @@
+import pytest
+
+from running_analyzer.cache import QueryCache
+
+
+def test_get_or_compute_counts_hits_and_misses():
+    cache = QueryCache(maxsize=4)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_compute("a", compute) == 1
+    assert cache.get_or_compute("a", compute) == 1
+    assert cache.get_or_compute("b", compute) == 2
+    assert (cache.hits, cache.misses, len(cache)) == (1, 2, 2)
+    assert cache.stats()["hit_rate"] == pytest.approx(1 / 3)
+
+
+def test_lru_eviction():
+    cache = QueryCache(maxsize=2)
+    cache.get_or_compute("a", lambda: 1)
+    cache.get_or_compute("b", lambda: 2)
+    cache.get_or_compute("a", lambda: 1)  # "b" is now least recently used
+    cache.get_or_compute("c", lambda: 3)
+
+    assert cache.get_or_compute("a", lambda: "recomputed") == 1
+    assert cache.get_or_compute("b", lambda: "recomputed") == "recomputed"
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        QueryCache(maxsize=0)
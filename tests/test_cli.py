@@ -0,0 +1,115 @@
+import gzip
+import json
+import zipfile
+from datetime import datetime
+
+import pytest
+from typer.testing import CliRunner
+
+from running_analyzer import cli
+from running_analyzer.db import RunRepository
+from running_analyzer.models import DistanceUnit, Run, RunType
+from running_analyzer.utils import parse_fit_file
+
+runner = CliRunner()
+
+FIT_FILE = "data/Morning_Run.fit"
+
+
+@pytest.fixture
+def repo(monkeypatch):
+    repo = RunRepository("sqlite:///:memory:", create_db=True)
+    monkeypatch.setattr(cli, "repo", repo)
+    return repo
+
+
+def next_page(output):
+    line = next(line for line in output.splitlines() if line.startswith("Next page"))
+    return line.removeprefix("Next page: ").split()
+
+
+def test_list_runs_pages_sub_second_dates(repo):
+    for second in [0.5, 0.2, 0.8, 1.3]:
+        date = datetime(2025, 3, 1, 7, 0, int(second), int(second % 1 * 1e6))
+        repo.add_run(
+            Run(
+                date=date,
+                unit=DistanceUnit.KILOMETERS,
+                distance=5,
+                duration=30,
+                run_type=RunType.EASY,
+            )
+        )
+
+    # (date, id) order: 2, 1, 3, 4
+    result = runner.invoke(cli.app, ["list-runs", "-n", "2"])
+    assert result.exit_code == 0
+    page = next_page(result.output)
+    assert page[-4:] == [
+        "--after-date",
+        "2025-03-01T07:00:00.500000",
+        "--after-id",
+        "1",
+    ]
+
+    result = runner.invoke(cli.app, page)
+    assert result.exit_code == 0
+    assert next_page(result.output)[-1] == "4"
+
+
+@pytest.fixture
+def fit_gz(tmp_path):
+    with open(FIT_FILE, "rb") as source:
+        data = source.read()
+    path = tmp_path / "run.fit.gz"
+    with gzip.open(path, "wb") as file:
+        file.write(data)
+    return path
+
+
+def test_list_fit_zip_member(tmp_path, fit_gz):
+    path = tmp_path / "export.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.write(fit_gz, "activities/1.fit.gz")
+
+    result = runner.invoke(cli.app, ["list-fit", str(path), "-n", "2"])
+    assert result.exit_code == 0
+    assert [record["timestamp"] for record in json.loads(result.output)] == [
+        "2025-02-22T15:55:37",
+        "2025-02-22T15:55:47",
+    ]
+
+
+def test_list_fit_gz(fit_gz):
+    # a .fit.gz is decoded from a stream, not decompressed into bytes first
+    with cli.open_fit_source(fit_gz, None) as source:
+        assert not isinstance(source, bytes)
+
+    result = runner.invoke(cli.app, ["list-fit", str(fit_gz), "-n", "2"])
+    assert result.exit_code == 0
+    assert len(json.loads(result.output)) == 2
+
+
+def test_list_fit_fields_skip_other_records():
+    result = runner.invoke(
+        cli.app, ["list-fit", FIT_FILE, "-n", "2", "--offset", "1", "-f", "heart_rate"]
+    )
+    assert result.exit_code == 0
+    heart_rates = [
+        {"heart_rate": record["heart_rate"]}
+        for record in parse_fit_file(FIT_FILE)
+        if "heart_rate" in record
+    ]
+    assert json.loads(result.output) == heart_rates[1:3]
+
+
+@pytest.mark.parametrize("name", ["junk.fit.gz", "junk.fit", "junk.zip"])
+@pytest.mark.parametrize("command", ["import-fit", "list-fit"])
+def test_fit_commands_report_corrupt_files(repo, tmp_path, command, name):
+    path = tmp_path / name
+    path.write_bytes(b"not a FIT file at all")
+
+    result = runner.invoke(cli.app, [command, str(path)])
+    assert result.exit_code == 1
+    assert "Error:" in result.output
+    assert repo.count_runs() == 0
@@ -1,9 +1,20 @@
 from datetime import datetime
+import numpy as np
 import pytest
 from freezegun import freeze_time
 
-from running_analyzer.db import RunRepository
-from running_analyzer.models import Run, DistanceUnit, RunType
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import delete, select
+
+from running_analyzer.db import (
+    RunRepository,
+    first_run_statement,
+    run_filters,
+    summary_statement,
+)
+from running_analyzer.models import Run, RunRollup, RunTrack, DistanceUnit, RunType
+from running_analyzer.track import encode_track
+from tests.conftest import create_run
 
 
 @pytest.fixture(scope="function")
@@ -24,20 +35,6 @@ def add_run():
     )
 
 
-def create_run(**kwargs) -> Run:
-    """Helper function to create a new Run instance with overridden values."""
-    defaults = {
-        "date": datetime(2025, 1, 2, 0, 1),
-        "unit": DistanceUnit.MILES,
-        "distance": 5,
-        "duration": 60,
-        "run_type": RunType.RECOVERY,
-        "notes": "Second run",
-    }
-    defaults.update(kwargs)
-    return Run(**defaults)
-
-
 @freeze_time("2025-01-01")
 def test_add_run(repo, add_run):
     run_obj = repo.add_run(add_run).model_dump()
@@ -50,9 +47,13 @@ def test_add_run(repo, add_run):
         "notes": "Good run",
         "unit": DistanceUnit.MILES,
         "id": 1,
+        "athlete_id": 1,
         "heart_rate": None,
         "pace": None,
         "location": None,
+        "distance_m": 16093.44,
+        "pace_s_per_km": 3600 / 16.09344,
+        "source_hash": None,
     }
 
 
@@ -76,9 +77,13 @@ def test_list_runs(repo, add_run):
             "notes": "Good run",
             "unit": DistanceUnit.MILES,
             "id": 1,
+            "athlete_id": 1,
             "heart_rate": None,
             "pace": None,
             "location": None,
+            "distance_m": 16093.44,
+            "pace_s_per_km": 3600 / 16.09344,
+            "source_hash": None,
         },
         {
             "date": datetime(2025, 1, 2, 0, 1),
@@ -89,9 +94,13 @@ def test_list_runs(repo, add_run):
             "notes": "Second run",
             "unit": DistanceUnit.MILES,
             "id": 2,  # Ensure second run gets an ID
+            "athlete_id": 1,
             "heart_rate": None,
             "pace": None,
             "location": None,
+            "distance_m": 8046.72,
+            "pace_s_per_km": 3600 / 8.04672,
+            "source_hash": None,
         },
     ]
 
@@ -154,3 +163,514 @@ def test_get_best_run(repo, add_run):
     best_run = repo.get_best_run()
     assert best_run is not None
     assert best_run.duration == 60
+
+
+def test_get_best_run_empty(repo):
+    assert repo.get_best_run() is None
+    assert repo.summarize_runs() is None
+
+
+def test_summarize_runs_matches_model(repo, add_run):
+    runs = [
+        add_run,
+        create_run(distance=3, duration=30),
+        create_run(distance=8, duration=70, run_type=RunType.TEMPO),
+    ]
+    for run in runs:
+        repo.add_run(run)
+
+    assert repo.summarize_runs(DistanceUnit.MILES) == pytest.approx(
+        Run.summarize_runs(repo.list_runs())
+    )
+
+    tempo = repo.summarize_runs(DistanceUnit.MILES, run_type=RunType.TEMPO)
+    assert tempo["total_runs"] == 1
+    assert tempo["total_distance"] == pytest.approx(8)
+
+
+def test_run_stats(repo, add_run):
+    repo.add_run(add_run)
+    repo.add_run(create_run(distance=3, duration=30))
+    repo.add_run(create_run(distance=8, duration=40))
+
+    runs = repo.list_runs()
+    assert repo.get_best_run().id == Run.best_run(runs).id
+    assert repo.get_slowest_run().id == Run.slowest_run(runs).id
+    assert repo.get_longest_run().id == Run.longest_run(runs).id
+    assert repo.get_shortest_run().id == Run.shortest_run(runs).id
+
+    assert repo.get_longest_run(end_date=datetime(2025, 1, 1)).distance == 10
+    assert repo.get_display_unit() == DistanceUnit.MILES
+
+
+def test_get_run_stats_matches_model(repo, add_run):
+    repo.add_run(add_run)
+    repo.add_run(create_run(distance=3, duration=30))
+    repo.add_run(create_run(distance=8, duration=40, run_type=RunType.TEMPO))
+    repo.add_run(create_run(distance=0, duration=5))
+
+    runs = repo.list_runs()
+    fused = Run.run_stats(runs)
+    stats = repo.get_run_stats(DistanceUnit.MILES)
+
+    summary = Run.summarize_runs(runs)
+    assert {key: fused[key] for key in summary} == summary
+    assert fused["run_types"] == Run.run_type_distribution(runs)
+    for stat in ["best_run", "slowest_run", "longest_run", "shortest_run"]:
+        assert fused[stat].id == getattr(Run, stat)(runs).id
+        assert stats[stat].id == fused[stat].id
+
+    assert stats["run_types"] == fused["run_types"]
+    assert fused["run_types"] == {
+        RunType.LONG: 1,
+        RunType.RECOVERY: 2,
+        RunType.TEMPO: 1,
+    }
+    assert {key: stats[key] for key in summary} == pytest.approx(summary)
+
+    assert repo.get_run_stats(run_type=RunType.TEMPO)["total_runs"] == 1
+    assert repo.get_run_stats(start_date=datetime(2030, 1, 1)) is None
+    assert Run.run_stats([]) is None
+
+
+def test_period_summaries_match_model(repo, add_run):
+    repo.add_run(add_run)
+    repo.add_run(create_run(date=datetime(2025, 1, 6), distance=4))
+    repo.add_run(create_run(date=datetime(2025, 2, 3), distance=6))
+
+    runs = repo.list_runs()
+    for summary, expected in [
+        (repo.weekly_summary(DistanceUnit.MILES), Run.weekly_summary(runs)),
+        (repo.monthly_summary(DistanceUnit.MILES), Run.monthly_summary(runs)),
+    ]:
+        assert list(summary) == sorted(expected)
+        for key, data in summary.items():
+            assert data == pytest.approx(expected[key])
+
+    assert list(repo.weekly_summary()) == ["2025-00", "2025-01", "2025-05"]
+
+
+def test_rollups_follow_writes(repo, add_run):
+    repo.add_run(add_run)
+    moved = repo.add_run(create_run(date=datetime(2025, 1, 6), distance=4))
+    tempo = create_run(date=datetime(2025, 2, 3), distance=6, run_type=RunType.TEMPO)
+    repo.bulk_insert_runs([tempo.normalize().model_dump(exclude={"id"})])
+    repo.update_run(moved.id, date=datetime(2025, 3, 4), distance=7)
+    repo.delete_run(add_run.id)
+
+    monthly = repo.monthly_summary(DistanceUnit.MILES)
+    assert list(monthly) == ["2025-02", "2025-03"]
+    assert monthly["2025-03"]["total_distance"] == pytest.approx(7)
+    assert list(repo.monthly_summary(run_type=RunType.TEMPO)) == ["2025-02"]
+    assert list(repo.monthly_summary(start_date=datetime(2025, 3, 1))) == ["2025-03"]
+    assert repo.rebuild_rollups() == {"buckets": 4, "mismatched": 0}
+
+    with repo.session() as session:
+        session.exec(delete(RunRollup).where(RunRollup.bucket == "2025-03"))
+        session.commit()
+    assert repo.rebuild_rollups() == {"buckets": 4, "mismatched": 1}
+    assert list(repo.monthly_summary()) == ["2025-02", "2025-03"]
+
+
+def test_cached_reads_invalidated_by_writes(repo, add_run):
+    repo.add_run(add_run)
+    assert repo.summarize_runs()["total_runs"] == 1
+    assert repo.summarize_runs()["total_runs"] == 1
+    assert repo.cache.hits == 1
+
+    version = repo.data_version()
+    run = repo.add_run(create_run())
+    repo.update_run(run.id, distance=1)
+    assert repo.data_version() == version + 2
+    assert repo.summarize_runs()["total_runs"] == 2
+    assert repo.get_shortest_run().distance == 1
+
+    repo.delete_run(run.id)
+    assert repo.summarize_runs()["total_runs"] == 1
+
+
+def test_cache_sees_writes_from_other_repositories(tmp_path, add_run):
+    url = f"sqlite:///{tmp_path / 'runs.db'}"
+    reader = RunRepository(url, create_db=True)
+    writer = RunRepository(url, cache_size=0)
+    assert writer.cache is None
+
+    writer.add_run(add_run)
+    assert reader.summarize_runs()["total_runs"] == 1
+    writer.bulk_insert_runs([create_run().normalize().model_dump(exclude={"id"})])
+    assert reader.summarize_runs()["total_runs"] == 2
+    assert reader.cache.stats()["hits"] == 0
+
+
+def test_cross_unit_stats(repo):
+    repo.add_run(create_run(distance=6, unit=DistanceUnit.KILOMETERS, duration=30))
+    repo.add_run(create_run(distance=5, unit=DistanceUnit.MILES, duration=45))
+
+    assert repo.get_longest_run().unit == DistanceUnit.MILES
+    assert repo.get_best_run().unit == DistanceUnit.KILOMETERS
+    assert repo.get_slowest_run().unit == DistanceUnit.MILES
+    assert repo.summarize_runs()["total_distance"] == pytest.approx(6 + 8.04672)
+
+
+def test_update_run_renormalizes(repo, add_run):
+    run = repo.add_run(add_run)
+    repo.update_run(run.id, unit=DistanceUnit.KILOMETERS)
+
+    updated_run = repo.get_run_by_id(run.id)
+    assert updated_run.distance_m == 10000
+    assert updated_run.pace_s_per_km == 360
+
+
+@pytest.mark.parametrize(
+    "filters, index",
+    [
+        (
+            {"athlete_id": 1, "run_type": RunType.LONG},
+            "ix_run_athlete_id_run_type_date",
+        ),
+        ({"athlete_id": 1, "min_distance_m": 5000}, "ix_run_athlete_id_distance_m"),
+        (
+            {"athlete_id": 1, "max_pace_s_per_km": 300},
+            "ix_run_athlete_id_pace_s_per_km",
+        ),
+        (
+            {"athlete_id": 1, "start_date": datetime(2025, 1, 1)},
+            "ix_run_athlete_id_date",
+        ),
+        (
+            {
+                "athlete_id": 1,
+                "run_type": RunType.LONG,
+                "start_date": datetime(2025, 1, 1),
+            },
+            "ix_run_athlete_id_run_type_date",
+        ),
+    ],
+)
+def test_filtered_queries_use_indexes(repo, filters, index):
+    plan = " ".join(repo.explain(select(Run).where(*run_filters(**filters))))
+    assert f"USING INDEX {index}" in plan
+    assert "SCAN" not in plan
+
+
+def test_bulk_insert_runs(repo):
+    rows = [
+        create_run(distance=i + 1).normalize().model_dump(exclude={"id"})
+        for i in range(5)
+    ]
+
+    stats = repo.bulk_insert_runs(iter(rows), batch_size=2)
+    assert (stats.inserted, stats.batches, stats.failed_at) == (5, 3, None)
+    assert [run.distance for run in repo.list_runs()] == [1, 2, 3, 4, 5]
+    assert repo.get_longest_run().distance_m == 5 * 1609.344
+
+
+def test_bulk_insert_runs_resume(repo):
+    rows = [
+        create_run(distance=i + 1).normalize().model_dump(exclude={"id"})
+        for i in range(5)
+    ]
+    bad_rows = [*rows[:3], {**rows[3], "duration": None}, rows[4]]
+
+    stats = repo.bulk_insert_runs(iter(bad_rows), batch_size=2)
+    assert (stats.inserted, stats.failed_at) == (2, 2)
+    assert stats.error
+
+    stats = repo.bulk_insert_runs(iter(rows), batch_size=2, skip=stats.failed_at)
+    assert (stats.inserted, stats.failed_at) == (3, None)
+    assert [run.distance for run in repo.list_runs()] == [1, 2, 3, 4, 5]
+
+
+def test_bulk_insert_runs_skips_imported_sources(repo):
+    rows = [
+        {
+            **create_run(distance=i + 1).normalize().model_dump(exclude={"id"}),
+            "source_hash": f"hash-{i % 4}",
+        }
+        for i in range(5)
+    ]
+    manual = create_run(distance=9).normalize().model_dump(exclude={"id"})
+
+    stats = repo.bulk_insert_runs(iter([*rows[:3], manual]), batch_size=2)
+    assert (stats.inserted, stats.skipped) == (4, 0)
+
+    # hash-0 repeats within the second batch, hashes 0-2 were imported above
+    stats = repo.bulk_insert_runs(iter([*rows, manual]), batch_size=2)
+    assert (stats.inserted, stats.skipped, stats.batches) == (2, 4, 3)
+    assert [run.distance for run in repo.list_runs()] == [1, 2, 3, 9, 4, 9]
+    assert repo.rebuild_rollups()["mismatched"] == 0
+
+
+def test_source_hash_lookup_uses_index(repo):
+    statement = select(Run.source_hash).where(
+        Run.athlete_id == 1, Run.source_hash.in_(["a", "b"])
+    )
+    assert "USING COVERING INDEX ix_run_athlete_id_source_hash" in " ".join(
+        repo.explain(statement)
+    )
+
+
+def track_row(distance, seconds=60):
+    track = {
+        "timestamp": np.arange(seconds, dtype=np.int64),
+        "distance": np.linspace(0, distance * 1609.344, seconds),
+    }
+    return {
+        **create_run(distance=distance).normalize().model_dump(exclude={"id"}),
+        "track": {"samples": seconds, "data": encode_track(track)},
+    }
+
+
+def test_bulk_insert_runs_stores_tracks(repo, add_run):
+    repo.add_run(add_run)
+    rows = [track_row(1), create_run().normalize().model_dump(exclude={"id"})]
+    stats = repo.bulk_insert_runs([*rows, track_row(3)], batch_size=2)
+    assert stats.inserted == 3
+
+    assert repo.get_run_track(1) is None
+    assert repo.get_run_track(2)["distance"][-1] == pytest.approx(1609.344)
+    assert repo.get_run_track(3) is None
+    assert repo.get_run_track(4)["distance"][-1] == pytest.approx(3 * 1609.344)
+    # reading runs does not load the samples
+    assert "track" not in repo.get_run_by_id(2).model_dump()
+
+
+def test_deleting_runs_deletes_tracks(repo):
+    repo.bulk_insert_runs([track_row(1), track_row(2), track_row(3)])
+
+    assert repo.delete_run(3)
+    assert repo.delete_runs({"max_distance_m": 1609.344}) == 1
+    with repo.session() as session:
+        assert session.exec(select(RunTrack.run_id)).all() == [2]
+
+    # SQLite hands out the deleted ids again
+    repo.add_run(create_run())
+    assert repo.get_run_track(3) is None
+
+
+def test_iter_runs(repo, add_run):
+    repo.add_run(create_run(date=datetime(2025, 1, 3)))
+    repo.add_run(add_run)
+    repo.add_run(create_run(date=datetime(2025, 1, 2), run_type=RunType.TEMPO))
+
+    runs = list(repo.iter_runs(batch_size=2))
+    assert [run.id for run in runs] == [2, 3, 1]
+    assert runs[0].notes == "Good run"
+
+    tempo = list(repo.iter_runs(run_type=RunType.TEMPO))
+    assert [run.id for run in tempo] == [3]
+
+
+def test_list_runs_page(repo):
+    for day in [3, 1, 2, 2, 5]:
+        repo.add_run(create_run(date=datetime(2025, 1, day)))
+
+    # (date, id) order: 2, 3, 4, 1, 5
+    page = repo.list_runs_page(2)
+    assert [run.id for run in page] == [2, 3]
+
+    page = repo.list_runs_page(2, after_date=page[-1].date, after_id=page[-1].id)
+    assert [run.id for run in page] == [4, 1]
+
+    assert [run.id for run in repo.list_runs_page(2, after_id=1)] == [5]
+    assert [run.id for run in repo.list_runs_page(2, after_id=4, desc=True)] == [3, 2]
+    assert [
+        run.id for run in repo.list_runs_page(10, after_date=datetime(2025, 1, 2))
+    ] == [1, 5]
+    assert [run.id for run in repo.list_runs_page(2, desc=True)] == [5, 1]
+
+    with pytest.raises(ValueError):
+        repo.list_runs_page(2, after_id=99)
+
+
+def test_engine_shared_per_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'runs.db'}"
+    assert RunRepository(url).db.engine is RunRepository(url).db.engine
+
+    memory = "sqlite:///:memory:"
+    assert RunRepository(memory).db.engine is not RunRepository(memory).db.engine
+
+
+def test_sqlite_pragmas(tmp_path):
+    repo = RunRepository(f"sqlite:///{tmp_path / 'runs.db'}", create_db=True)
+    with repo.db.engine.connect() as connection:
+
+        def pragma(name):
+            return connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("cache_size") == -64 * 1024
+
+
+def test_transaction_commits_once(tmp_path, add_run):
+    url = f"sqlite:///{tmp_path / 'runs.db'}"
+    repo = RunRepository(url, create_db=True)
+    other = RunRepository(url, cache_size=0)
+
+    with repo.transaction():
+        run = repo.add_run(add_run)
+        repo.update_run(run.id, distance=12)
+        assert repo.get_run_by_id(run.id).distance == 12
+        assert other.summarize_runs() is None
+
+    assert other.get_run_by_id(run.id).distance == 12
+
+    with pytest.raises(RuntimeError):
+        with repo.transaction():
+            repo.delete_run(run.id)
+            raise RuntimeError
+    assert other.get_run_by_id(run.id) is not None
+    assert repo.get_run_by_id(run.id) is not None
+
+
+def test_transaction_rollback_leaves_cache_clean(repo):
+    repo.add_run(create_run(unit=DistanceUnit.KILOMETERS, distance=5))
+    with pytest.raises(RuntimeError):
+        with repo.transaction():
+            repo.add_run(create_run(unit=DistanceUnit.KILOMETERS, distance=100))
+            assert repo.summarize_runs()["total_distance"] == 105
+            raise RuntimeError
+
+    repo.add_run(create_run(unit=DistanceUnit.KILOMETERS, distance=7))
+    assert repo.summarize_runs()["total_distance"] == 12
+
+
+def test_bulk_insert_runs_raises_inside_transaction(repo):
+    rows = [
+        create_run(distance=i + 1).normalize().model_dump(exclude={"id"})
+        for i in range(3)
+    ]
+    rows[2]["duration"] = None
+
+    with pytest.raises(SQLAlchemyError):
+        with repo.transaction():
+            repo.bulk_insert_runs(iter(rows), batch_size=2)
+    assert repo.count_runs() == 0
+
+
+@pytest.fixture
+def club_repo(repo):
+    repo.add_run(create_run(location="Park", run_type=RunType.EASY))
+    repo.add_run(create_run(location="Park", date=datetime(2025, 2, 3), distance=8))
+    repo.add_run(create_run(location="Track", unit=DistanceUnit.KILOMETERS))
+    return repo
+
+
+def test_update_runs(club_repo):
+    repo = club_repo
+    assert repo.count_runs(location="Park") == 2
+    assert repo.update_runs({"location": "Park"}, run_type=RunType.TEMPO) == 2
+    assert repo.count_runs(run_type=RunType.TEMPO) == 2
+    assert repo.rebuild_rollups()["mismatched"] == 0
+
+    assert repo.update_runs({"location": "Track"}, unit=DistanceUnit.MILES) == 1
+    track = repo.list_runs_by_type(RunType.RECOVERY)[0]
+    assert track.distance_m == pytest.approx(5 * 1609.344)
+    assert track.pace_s_per_km == pytest.approx(3600 / (5 * 1.609344))
+
+    repo.update_runs({"min_id": 2}, date=datetime(2025, 3, 1), duration=30)
+    assert repo.rebuild_rollups()["mismatched"] == 0
+    assert repo.update_runs({"location": "Nowhere"}, notes="x") == 0
+
+
+def test_update_runs_rejects_unknown_columns(repo):
+    with pytest.raises(ValueError):
+        repo.update_runs({}, distance_m=1)
+    with pytest.raises(ValueError):
+        repo.update_runs({})
+
+
+def test_delete_runs(club_repo):
+    repo = club_repo
+    version = repo.data_version()
+    assert repo.delete_runs({"min_id": 2, "max_id": 3}) == 2
+    assert [run.id for run in repo.list_runs()] == [1]
+    assert repo.data_version() == version + 1
+    assert repo.rebuild_rollups()["mismatched"] == 0
+
+    assert repo.delete_runs({"location": "Track"}) == 0
+
+
+@pytest.fixture
+def athletes(tmp_path):
+    url = f"sqlite:///{tmp_path / 'club.db'}"
+    alice = RunRepository(url, create_db=True, cache_size=0, athlete="alice")
+    bob = RunRepository(url, cache_size=0, athlete="bob")
+    alice.add_run(create_run(location="Park", distance=10))
+    alice.add_run(create_run(location="Park", date=datetime(2025, 2, 3)))
+    bob.add_run(create_run(location="Park", distance=3))
+    return alice, bob
+
+
+def test_athletes_see_only_their_runs(athletes):
+    alice, bob = athletes
+    assert alice.summarize_runs()["total_runs"] == 2
+    assert bob.summarize_runs()["total_runs"] == 1
+    assert list(bob.weekly_summary(DistanceUnit.MILES).values()) == [
+        {"total_distance": 3, "total_duration": 60, "avg_pace": 20}
+    ]
+    assert bob.get_longest_run().distance == 3
+    assert [run.id for run in bob.list_runs()] == [3]
+
+    assert bob.get_run_by_id(1) is None
+    assert bob.delete_run(1) is False
+    with pytest.raises(ValueError):
+        bob.update_run(1, distance=1)
+
+    assert bob.update_runs({"location": "Park"}, location="Track") == 1
+    assert alice.count_runs(location="Park") == 2
+    assert alice.delete_runs({"location": "Park"}) == 2
+    assert bob.count_runs() == 1
+    assert alice.rebuild_rollups()["mismatched"] == 0
+
+
+def test_new_athlete(athletes):
+    alice, _ = athletes
+    carol = RunRepository(alice.db.database_url, athlete="carol")
+    assert carol.summarize_runs() is None
+    assert carol.weekly_summary() == {}
+    assert [athlete.name for athlete, _ in alice.list_athletes()] == ["alice", "bob"]
+
+    carol.add_run(create_run())
+    assert [(athlete.name, runs) for athlete, runs in alice.list_athletes()] == [
+        ("alice", 2),
+        ("bob", 1),
+        ("carol", 1),
+    ]
+
+
+def test_athlete_from_environment(monkeypatch):
+    monkeypatch.setenv("ATHLETE", "dana")
+    assert RunRepository("sqlite:///:memory:").athlete == "dana"
+    monkeypatch.delenv("ATHLETE")
+    assert RunRepository("sqlite:///:memory:").athlete == "default"
+
+
+def test_athlete_queries_use_athlete_indexes(athletes):
+    alice, _ = athletes
+    statement = summary_statement(athlete_id=1, start_date=datetime(2025, 1, 1))
+    assert "USING INDEX ix_run_athlete_id_date" in " ".join(alice.explain(statement))
+
+
+def test_athletes_import_the_same_source(athletes):
+    alice, bob = athletes
+    row = {
+        **create_run().normalize().model_dump(exclude={"id"}),
+        "source_hash": "shared",
+    }
+    assert alice.bulk_insert_runs([row]).inserted == 1
+    assert bob.bulk_insert_runs([row]).inserted == 1
+    assert alice.bulk_insert_runs([row]).skipped == 1
+
+
+def test_athletes_see_only_their_tracks(athletes):
+    alice, bob = athletes
+    bob.bulk_insert_runs([track_row(5)])
+    assert bob.get_run_track(4) is not None
+    assert alice.get_run_track(4) is None
+
+    statement = first_run_statement("longest", athlete_id=1)
+    plan = " ".join(alice.explain(statement))
+    assert "USING INDEX ix_run_athlete_id_distance_m" in plan
+    assert "USE TEMP B-TREE FOR ORDER BY" not in plan
@@ -0,0 +1,177 @@
+import struct
+
+import numpy as np
+import pytest
+
+from running_analyzer.fit import (
+    FIT_EPOCH,
+    SUMMARY_FIELDS,
+    read_fit_columns,
+    summarize_fit_columns,
+)
+from running_analyzer.utils import parse_fit_file, summarize_fit_data
+
+FIT_FILE = "data/Morning_Run.fit"
+
+# 2025-03-01T08:00:00Z in FIT seconds
+START = 1740816000 - FIT_EPOCH
+
+
+def definition(local, global_number, fields, big_endian=False):
+    """A definition message; ``fields`` are (number, size, base type)."""
+    header = struct.pack(
+        ">BBBHB" if big_endian else "<BBBHB",
+        0x40 | local,
+        0,
+        int(big_endian),
+        global_number,
+        len(fields),
+    )
+    return header + b"".join(struct.pack("BBB", *field) for field in fields)
+
+
+def fit_file(*messages):
+    data = b"".join(messages)
+    header = struct.pack("<BBHI4sH", 14, 0x10, 2100, len(data), b".FIT", 0)
+    return header + data + b"\0\0"
+
+
+RECORD = [
+    (253, 4, 0x86),  # timestamp
+    (0, 4, 0x85),  # position_lat
+    (1, 4, 0x85),  # position_long
+    (78, 4, 0x86),  # enhanced_altitude
+    (3, 1, 0x02),  # heart_rate
+    (5, 4, 0x86),  # distance
+    (6, 2, 0x84),  # speed
+]
+
+
+def record(timestamp, heart_rate, distance, speed, byte_order="<"):
+    return struct.pack(
+        byte_order + "BIiiIBIH",
+        0,
+        timestamp,
+        2**30,  # 90 degrees
+        -(2**29),  # -45 degrees
+        (120 + 500) * 5,
+        heart_rate,
+        distance * 100,
+        speed,
+    )
+
+
+def compressed_record(local, time_offset, distance):
+    return struct.pack("<BI", 0x80 | local << 5 | time_offset, distance * 100)
+
+
+def synthetic_file():
+    return fit_file(
+        definition(0, 20, RECORD),
+        record(START, 140, 0, 3000),
+        record(START + 1, 0xFF, 3, 0xFFFF),  # no heart rate or speed
+        # an event between records resets the compressed timestamp base
+        definition(1, 21, [(253, 4, 0x86), (0, 1, 0x00)]),
+        struct.pack("<BIB", 1, START + 40, 0),
+        # local type 0 redefined: big endian, then only distance with
+        # compressed timestamps
+        definition(0, 20, RECORD, big_endian=True),
+        record(START + 41, 150, 120, 3500, byte_order=">"),
+        definition(2, 20, [(5, 4, 0x86)]),
+        compressed_record(2, (START + 42) & 0x1F, 123),
+        compressed_record(2, (START + 70) & 0x1F, 200),
+    )
+
+
+def test_read_fit_columns_matches_fitparse():
+    records = parse_fit_file(FIT_FILE)
+    columns = read_fit_columns(FIT_FILE)
+
+    assert len(columns["timestamp"]) == len(records)
+    assert [
+        np.datetime64(int(ts), "s").item().isoformat() for ts in columns["timestamp"]
+    ] == [r["timestamp"] for r in records]
+    np.testing.assert_array_equal(
+        columns["distance"],
+        [np.nan if r.get("distance") is None else r["distance"] for r in records],
+    )
+    np.testing.assert_array_equal(
+        columns["heart_rate"],
+        [np.nan if r.get("heart_rate") is None else r["heart_rate"] for r in records],
+    )
+
+
+def test_read_fit_columns_synthetic():
+    columns = read_fit_columns(synthetic_file())
+
+    assert list(columns) == [
+        "timestamp",
+        "position_lat",
+        "position_long",
+        "altitude",
+        "heart_rate",
+        "cadence",
+        "distance",
+        "speed",
+    ]
+    assert (columns["timestamp"] - (START + FIT_EPOCH)).tolist() == [0, 1, 41, 42, 70]
+    np.testing.assert_array_equal(columns["distance"], [0, 3, 120, 123, 200])
+    np.testing.assert_array_equal(
+        columns["heart_rate"], [140, np.nan, 150, np.nan, np.nan]
+    )
+    np.testing.assert_array_equal(columns["speed"], [3.0, np.nan, 3.5, np.nan, np.nan])
+    np.testing.assert_array_equal(columns["position_lat"], [90, 90, 90, np.nan, np.nan])
+    np.testing.assert_array_equal(
+        columns["position_long"], [-45, -45, -45, np.nan, np.nan]
+    )
+    np.testing.assert_array_equal(columns["altitude"], [120, 120, 120, np.nan, np.nan])
+    assert np.isnan(columns["cadence"]).all()
+
+
+def test_read_fit_columns_selected_fields():
+    columns = read_fit_columns(synthetic_file(), ("distance", "timestamp"))
+    assert list(columns) == ["timestamp", "distance"]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"not a FIT file",
+        synthetic_file()[:-10],
+        fit_file(definition(0, 20, RECORD), record(START, 1, 1, 1)[:-3]),
+        fit_file(record(START, 1, 1, 1)),
+        # the declared data ends inside a definition
+        fit_file(definition(0, 20, RECORD)[:-4]),
+        fit_file(definition(0, 20, RECORD)[:3]),
+    ],
+)
+def test_read_fit_columns_rejects_bad_files(data):
+    with pytest.raises(ValueError):
+        read_fit_columns(data)
+
+
+def test_read_fit_columns_rejects_truncated_definition():
+    with open(FIT_FILE, "rb") as file:
+        data = bytearray(file.read())
+    # cut the data inside the first definition and declare the shorter size
+    data = data[: data[0] + 10]
+    data[4:8] = (len(data) - data[0]).to_bytes(4, "little")
+    with pytest.raises(ValueError, match="Truncated"):
+        read_fit_columns(bytes(data))
+
+
+def test_summarize_fit_columns_matches_summarize_fit_data():
+    assert summarize_fit_columns(
+        read_fit_columns(FIT_FILE, SUMMARY_FIELDS)
+    ) == summarize_fit_data(parse_fit_file(FIT_FILE))
+
+
+def test_summarize_fit_columns_synthetic():
+    assert summarize_fit_columns(read_fit_columns(synthetic_file())) == {
+        "total_records": 5,
+        "first_timestamp": "2025-03-01T08:00:00",
+        "last_timestamp": "2025-03-01T08:01:10",
+        "total_distance": 200.0,
+        "average_speed": 6.5 / 5,
+        "total_duration": 1.17,
+    }
@@ -0,0 +1,177 @@
+import gzip
+import hashlib
+import io
+import shutil
+import threading
+import warnings
+import zipfile
+
+import numpy as np
+import pytest
+
+from running_analyzer.db import RunRepository
+from running_analyzer.fit_import import (
+    find_fit_files,
+    fit_file_row,
+    import_fit_archive,
+    import_fit_files,
+    read_strava_activities,
+)
+from running_analyzer.models import DistanceUnit, RunType
+from running_analyzer.track import decode_track
+
+FIT_FILE = "data/Morning_Run.fit"
+
+
+@pytest.fixture
+def export_dir(tmp_path):
+    directory = tmp_path / "export"
+    (directory / "activities").mkdir(parents=True)
+    shutil.copy(FIT_FILE, directory / "first.fit")
+    with open(FIT_FILE, "rb") as source:
+        data = source.read()
+    with gzip.open(directory / "activities" / "second.FIT.gz", "wb") as file:
+        file.write(data)
+    (directory / "broken.fit").write_bytes(data[:500])
+    (directory / "notes.txt").write_text("not a FIT file")
+    return directory
+
+
+def test_find_fit_files(export_dir):
+    assert [
+        path.relative_to(export_dir).as_posix() for path in find_fit_files(export_dir)
+    ] == [
+        "activities/second.FIT.gz",
+        "broken.fit",
+        "first.fit",
+    ]
+
+
+def test_fit_file_row():
+    row = fit_file_row(FIT_FILE, DistanceUnit.KILOMETERS, RunType.EASY)
+    assert row["distance"] == 1.63
+    assert row["distance_m"] == 1630
+    assert row["duration"] == 10.27
+    assert "athlete_id" not in row
+    with open(FIT_FILE, "rb") as file:
+        assert row["source_hash"] == hashlib.sha256(file.read()).hexdigest()
+    assert row["track"]["samples"] == 265
+    assert decode_track(row["track"]["data"])["distance"][0] == 0
+
+
+def test_import_fit_files(export_dir):
+    repo = RunRepository("sqlite:///:memory:", create_db=True, cache_size=0)
+    seen = []
+    stats = import_fit_files(
+        repo,
+        find_fit_files(export_dir),
+        unit=DistanceUnit.MILES,
+        run_type=RunType.LONG,
+        workers=2,
+        batch_size=1,
+        progress=lambda path, error: seen.append((path.name, error is None)),
+    )
+
+    # first.fit and second.FIT.gz hold the same activity
+    assert (stats.files, stats.imported, stats.skipped, stats.insert.batches) == (
+        3,
+        1,
+        1,
+        2,
+    )
+    assert [path.name for path, _ in stats.failed] == ["broken.fit"]
+    assert sorted(seen) == [
+        ("broken.fit", False),
+        ("first.fit", True),
+        ("second.FIT.gz", True),
+    ]
+    assert stats.files_per_second > 0
+
+    runs = repo.list_runs()
+    assert [(run.distance, run.unit, run.run_type) for run in runs] == [
+        (1.01, DistanceUnit.MILES, RunType.LONG)
+    ]
+    assert repo.rebuild_rollups()["mismatched"] == 0
+
+    track = repo.get_run_track(runs[0].id)
+    assert np.nanmax(track["distance"]) == pytest.approx(1628.15)
+
+    stats = import_fit_files(repo, find_fit_files(export_dir), workers=1)
+    assert (stats.imported, stats.skipped) == (0, 2)
+
+
+def test_import_fit_files_with_threads_running(export_dir):
+    # the CLI decodes while rich's progress bar refreshes from a thread
+    repo = RunRepository("sqlite:///:memory:", create_db=True, cache_size=0)
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            stats = import_fit_files(repo, find_fit_files(export_dir), workers=2)
+    finally:
+        stop.set()
+        thread.join()
+    assert stats.imported == 1
+    assert not [w for w in caught if "fork()" in str(w.message)]
+
+
+ACTIVITIES = (
+    "Activity ID,Activity Date,Activity Name,Activity Type,Activity Description,"
+    "Filename,Workout Type\n"
+    '1,"Feb 22, 2025",Morning Run,Run,Parkrun PB,activities/1.fit.gz,1.0\n'
+    '2,"Feb 23, 2025",Afternoon Run,Trail Run,,activities/2.fit,\n'
+    '3,"Feb 24, 2025",Commute,Ride,,activities/3.fit.gz,\n'
+    '4,"Feb 25, 2025",Evening Run,Run,,activities/4.gpx.gz,\n'
+)
+
+
+@pytest.fixture
+def export_zip(tmp_path):
+    with open(FIT_FILE, "rb") as source:
+        data = source.read()
+    path = tmp_path / "export.zip"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("activities.csv", ACTIVITIES)
+        # distinct activities, so their source hashes differ
+        archive.writestr("activities/1.fit.gz", gzip.compress(data))
+        archive.writestr("activities/2.fit", data + b"2")
+        archive.writestr("activities/3.fit.gz", gzip.compress(data + b"3"))
+        archive.writestr("activities/4.gpx.gz", gzip.compress(b"<gpx/>"))
+        archive.writestr("activities/5.fit", data[:500])
+    return path
+
+
+def test_read_strava_activities():
+    activities = read_strava_activities(io.BytesIO(ACTIVITIES.encode()))
+    assert activities == {
+        "activities/1.fit.gz": {"run_type": RunType.RACE, "notes": "Parkrun PB"},
+        "activities/2.fit": {"notes": "Afternoon Run"},
+        "activities/3.fit.gz": None,
+        "activities/4.gpx.gz": {"notes": "Evening Run"},
+    }
+
+
+def test_import_fit_archive(export_zip):
+    repo = RunRepository("sqlite:///:memory:", create_db=True, cache_size=0)
+    stats = import_fit_archive(repo, export_zip, run_type=RunType.TEMPO)
+
+    assert (stats.files, stats.imported, stats.not_runs) == (3, 2, 1)
+    assert [str(path) for path, _ in stats.failed] == ["activities/5.fit"]
+    assert [(run.distance, run.run_type, run.notes) for run in repo.list_runs()] == [
+        (1.63, RunType.RACE, "Parkrun PB"),
+        (1.63, RunType.TEMPO, "Afternoon Run"),
+    ]
+    assert [path.name for path in export_zip.parent.iterdir()] == ["export.zip"]
+
+    stats = import_fit_archive(repo, export_zip)
+    assert (stats.imported, stats.skipped) == (0, 2)
+
+
+def test_import_fit_archive_members(export_zip):
+    repo = RunRepository("sqlite:///:memory:", create_db=True, cache_size=0)
+    stats = import_fit_archive(repo, export_zip, members=["activities/2.fit"])
+
+    assert (stats.files, stats.imported) == (1, 1)
+    assert repo.list_runs()[0].run_type == RunType.EASY
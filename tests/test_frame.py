@@ -0,0 +1,88 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from running_analyzer.db import RunRepository
+from running_analyzer.frame import RUN_TYPE_CODES, RunFrame
+from running_analyzer.models import Run, RunType
+from tests.conftest import fake_runs
+
+
+@pytest.fixture(scope="module")
+def runs():
+    runs = fake_runs()
+    for i, run in enumerate(runs, start=1):
+        run.id = i
+    return runs
+
+
+@pytest.fixture(scope="module")
+def frame(runs):
+    return RunFrame.from_runs(runs)
+
+
+def test_summarize_runs(runs, frame):
+    assert frame.summarize_runs() == pytest.approx(Run.summarize_runs(runs))
+    assert frame.average_pace() == pytest.approx(Run.average_pace(runs))
+
+
+@pytest.mark.parametrize(
+    "stat", ["best_run", "slowest_run", "longest_run", "shortest_run"]
+)
+def test_run_stats(runs, frame, stat):
+    expected = getattr(Run, stat)(runs)
+    run = frame.to_run(getattr(frame, stat)())
+
+    assert run.id == expected.id
+    assert (run.date, run.distance, run.unit, run.run_type) == (
+        expected.date,
+        expected.distance,
+        expected.unit,
+        expected.run_type,
+    )
+
+
+def test_period_summaries(runs, frame):
+    assert frame.weekly_summary() == Run.weekly_summary(runs)
+    assert frame.monthly_summary() == Run.monthly_summary(runs)
+
+
+def test_week_keys_match_strftime():
+    dates = np.arange("2023-12-20", "2025-01-10", dtype="datetime64[D]")
+    frame = RunFrame.empty()
+    frame.date = dates.astype("datetime64[us]")
+
+    keys = frame.week_keys()
+    for date, key in zip(dates.tolist(), keys.tolist()):
+        assert f"{key // 100}-{key % 100:02d}" == date.strftime("%Y-%W")
+
+
+def test_run_type_distribution(runs, frame):
+    assert frame.run_type_distribution() == Run.run_type_distribution(runs)
+
+
+def test_empty_frame():
+    frame = RunFrame.empty()
+    assert len(frame) == 0
+    assert frame.summarize_runs() is None
+    assert frame.best_run() is None
+    assert frame.longest_run() is None
+    assert frame.weekly_summary() == {}
+
+
+def test_load_frame(runs):
+    repo = RunRepository("sqlite:///:memory:", create_db=True)
+    for run in runs:
+        repo.add_run(Run(**run.model_dump(exclude={"id"})))
+
+    frame = repo.load_frame(batch_size=30)
+    assert len(frame) == len(runs)
+    # same summation order as the frame, so the float totals match exactly
+    assert frame.weekly_summary() == Run.weekly_summary(list(repo.iter_runs()))
+
+    tempo = repo.load_frame(run_type=RunType.TEMPO, start_date=datetime(2025, 1, 1))
+    assert len(tempo) == len(
+        [run for run in runs if run.run_type == RunType.TEMPO and run.date.year == 2025]
+    )
+    assert set(tempo.run_type.tolist()) == {RUN_TYPE_CODES[RunType.TEMPO]}
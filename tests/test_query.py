@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import pytest
+
+from running_analyzer.db import summary_statement
+from running_analyzer.models import DistanceUnit, RunType
+from running_analyzer.query import RunQuery
+
+
+@pytest.fixture
+def repo(fake_repo):
+    return fake_repo
+
+
+def test_filters_convert_to_normalized_columns():
+    query = RunQuery(min_distance=5, max_pace=8, unit=DistanceUnit.MILES)
+    assert query.filters() == {
+        "min_distance_m": pytest.approx(5 * 1609.344),
+        "max_pace_s_per_km": pytest.approx(8 * 60 / 1.609344),
+    }
+    assert not RunQuery()
+    assert RunQuery().where(location="Park").filters() == {"location": "Park"}
+
+
+@pytest.mark.parametrize(
+    "query, matches",
+    [
+        (
+            RunQuery(run_type=RunType.TEMPO, min_distance=10),
+            lambda run: run.run_type == RunType.TEMPO and run.distance_m >= 10000,
+        ),
+        (
+            RunQuery(min_pace=6, max_pace=7),
+            lambda run: 360 <= run.pace_s_per_km <= 420,
+        ),
+        (
+            RunQuery(hr_above=160, start_date=datetime(2025, 1, 1)),
+            lambda run: (
+                (run.heart_rate or 0) > 160 and run.date >= datetime(2025, 1, 1)
+            ),
+        ),
+        (RunQuery(location="Stadium"), lambda run: run.location == "Stadium"),
+    ],
+)
+def test_query_matches_python_filter(repo, query, matches):
+    expected = [run.id for run in repo.iter_runs() if matches(run)]
+    assert expected
+    assert [run.id for run in repo.iter_runs(**query.filters())] == expected
+    assert repo.summarize_runs(**query.filters())["total_runs"] == len(expected)
+
+
+def test_period_summary_with_query_filters(repo):
+    query = RunQuery(max_distance=10)
+    weekly = repo.weekly_summary(**query.filters())
+    runs = [run for run in repo.iter_runs() if run.distance_m <= 10000]
+    assert sum(week["total_duration"] for week in weekly.values()) == pytest.approx(
+        sum(run.duration for run in runs)
+    )
+
+
+@pytest.mark.parametrize(
+    "query, index",
+    [
+        (RunQuery(min_distance=20), "ix_run_athlete_id_distance_m"),
+        (RunQuery(max_pace=5), "ix_run_athlete_id_pace_s_per_km"),
+        (RunQuery(location="Park"), "ix_run_athlete_id_location"),
+    ],
+)
+def test_query_aggregates_use_index(repo, query, index):
+    statement = summary_statement(**query.filters(), athlete_id=repo.athlete_id)
+    plan = " ".join(repo.explain(statement))
+    assert f"USING INDEX {index}" in plan
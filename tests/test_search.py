@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from running_analyzer.async_db import AsyncRunRepository
+from running_analyzer.db import RunRepository
+from running_analyzer.models import RunType
+from running_analyzer.search import fts5_query, search_statement
+from tests.conftest import create_run
+
+
+@pytest.fixture
+def repo():
+    repo = RunRepository("sqlite:///:memory:", create_db=True, cache_size=0)
+    repo.add_run(create_run(location="Riverside", notes="Windy along the river"))
+    repo.add_run(create_run(location="Hills", notes="Hill repeats, legs tired"))
+    repo.add_run(
+        create_run(location="Track", notes="Intervals", run_type=RunType.INTERVAL)
+    )
+    repo.add_run(
+        create_run(location="Riverside", notes="River loop, river was flooded")
+    )
+    return repo
+
+
+def matching_ids(repo, terms, **filters):
+    return [run.id for run, _ in repo.search_runs(terms, **filters)]
+
+
+def test_search_ranks_matches(repo):
+    results = repo.search_runs("river")
+    assert [run.id for run, _ in results] == [4, 1]
+    assert results[0][1] > results[1][1]
+    assert matching_ids(repo, "riverside windy") == [1]
+    assert matching_ids(repo, "marathon") == []
+
+
+def test_search_stems_and_prefixes(repo):
+    assert matching_ids(repo, "hills") == [2]
+    assert matching_ids(repo, "interv*") == [3]
+
+
+def test_search_with_filters(repo):
+    assert matching_ids(repo, "river", limit=1) == [4]
+    assert matching_ids(repo, "intervals", run_type=RunType.EASY) == []
+
+
+def test_search_treats_punctuation_as_text(repo):
+    assert matching_ids(repo, 'hill" OR "river') == []
+    assert matching_ids(repo, "repeats, (legs)") == [2]
+    with pytest.raises(ValueError):
+        repo.search_runs(" * ")
+
+
+def test_index_follows_writes(repo):
+    repo.update_run(1, notes="Calm morning")
+    assert matching_ids(repo, "windy") == []
+    assert matching_ids(repo, "calm") == [1]
+
+    repo.update_runs({"location": "Riverside"}, location="Canal")
+    assert matching_ids(repo, "riverside") == []
+    assert matching_ids(repo, "canal") == [1, 4]
+
+    repo.bulk_insert_runs(
+        [create_run(notes="Canal towpath").normalize().model_dump(exclude={"id"})]
+    )
+    assert matching_ids(repo, "towpath") == [5]
+
+    repo.delete_runs({"location": "Canal"})
+    repo.delete_run(2)
+    assert matching_ids(repo, "canal") == [5]
+    assert matching_ids(repo, "hill") == []
+
+
+def test_fts5_query():
+    assert fts5_query('say "hi" now*') == '"say" """hi""" "now"*'
+    assert fts5_query("  ") == ""
+
+
+def test_postgresql_statement_matches_index_expression():
+    sql = str(
+        search_statement("hill repeats", "postgresql").compile(
+            dialect=postgresql.dialect()
+        )
+    )
+    assert "websearch_to_tsquery('english'" in sql
+    assert "to_tsvector('english', coalesce(notes, '')" in sql
+
+
+def test_async_search(tmp_path):
+    url = f"sqlite:///{tmp_path / 'runs.db'}"
+    repo = RunRepository(url, create_db=True)
+    repo.add_run(create_run(notes="Sunrise tempo"))
+
+    async def search():
+        async with AsyncRunRepository(url) as async_repo:
+            return await async_repo.search_runs("sunrise")
+
+    assert [run.id for run, _ in asyncio.run(search())] == [1]
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from running_analyzer.db import RunRepository
+from running_analyzer.snapshot import (
+    FrameRepository,
+    FrameSnapshot,
+    default_snapshot_dir,
+)
+from tests.conftest import create_run
+
+
+@pytest.fixture
+def repo(fake_repo):
+    return fake_repo
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    return FrameSnapshot(tmp_path / "runs.snapshot")
+
+
+def test_refresh_builds_memory_mapped_snapshot(repo, snapshot):
+    frame = snapshot.refresh(repo)
+    assert len(frame) == len(repo.list_runs())
+
+    meta, loaded = snapshot.load()
+    assert isinstance(loaded.distance_m, np.memmap)
+    assert meta["last_id"] == max(run.id for run in repo.list_runs())
+    assert (meta["version"], meta["rewrites"]) == repo.data_versions()
+    assert snapshot.refresh(repo).id.tolist() == frame.id.tolist()
+
+
+def test_refresh_appends_new_runs_in_date_order(repo, snapshot, monkeypatch):
+    snapshot.refresh(repo)
+    run = repo.add_run(create_run())
+
+    calls = []
+    load_frame = repo.load_frame
+    monkeypatch.setattr(
+        repo, "load_frame", lambda **kw: calls.append(kw) or load_frame(**kw)
+    )
+    frame = snapshot.refresh(repo)
+
+    assert calls == [{"after_id": run.id - 1}]
+    assert frame.id.tolist() == repo.load_frame().id.tolist()
+    assert snapshot.read_meta()["last_id"] == run.id
+
+
+def test_refresh_rebuilds_after_rewrite(repo, snapshot):
+    snapshot.refresh(repo)
+    first = repo.list_runs()[0]
+    repo.update_run(first.id, distance=42.0)
+    repo.delete_run(repo.list_runs()[1].id)
+
+    frame = snapshot.refresh(repo)
+    assert len(frame) == len(repo.list_runs())
+    assert frame.distance[frame.id == first.id].tolist() == [42.0]
+
+
+def test_frame_repository_matches_repository(repo, snapshot):
+    source = FrameRepository(snapshot.refresh(repo))
+    unit = repo.get_display_unit()
+    assert source.get_display_unit() == unit
+
+    expected = repo.get_run_stats(unit)
+    stats = source.get_run_stats(unit)
+    for key in ["best_run", "slowest_run", "longest_run", "shortest_run"]:
+        assert stats.pop(key).id == expected.pop(key).id
+    assert stats.pop("run_types") == expected.pop("run_types")
+    assert stats == pytest.approx(expected)
+
+    weekly = source.weekly_summary(unit)
+    expected = repo.weekly_summary(unit)
+    assert list(weekly) == list(expected)
+    for week, data in weekly.items():
+        assert data == pytest.approx(expected[week])
+
+
+def test_empty_snapshot(snapshot):
+    repo = RunRepository("sqlite:///:memory:", create_db=True)
+    assert len(snapshot.refresh(repo)) == 0
+    assert FrameRepository(snapshot.refresh(repo)).get_run_stats() is None
+
+
+def test_default_snapshot_dir(monkeypatch):
+    monkeypatch.delenv("SNAPSHOT_DIR", raising=False)
+    assert default_snapshot_dir("sqlite:////data/runs.db").as_posix() == (
+        "/data/runs.snapshot"
+    )
+    assert default_snapshot_dir("sqlite:///:memory:") is None
+    assert default_snapshot_dir("postgresql://localhost/runs") is None
+
+
+def test_refresh_rebuilds_for_another_athlete(tmp_path, snapshot):
+    url = f"sqlite:///{tmp_path / 'club.db'}"
+    alice = RunRepository(url, create_db=True, cache_size=0, athlete="alice")
+    bob = RunRepository(url, cache_size=0, athlete="bob")
+    alice.add_run(create_run(distance=12.5))
+    bob.add_run(create_run())
+
+    assert snapshot.refresh(alice).distance.tolist() == [12.5]
+    assert snapshot.refresh(bob).distance.tolist() == [5]
+    assert snapshot.read_meta()["athlete_id"] == bob.athlete_id
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from running_analyzer.fit import read_fit_columns
+from running_analyzer.track import decode_track, encode_track, track_splits
+
+FIT_FILE = "data/Morning_Run.fit"
+
+
+def columns(seconds, **streams):
+    start = 1740816000
+    track = {
+        "timestamp": np.arange(start, start + seconds, dtype=np.int64),
+        "position_lat": np.full(seconds, np.nan),
+        "position_long": np.full(seconds, np.nan),
+        "altitude": np.full(seconds, np.nan),
+        "heart_rate": np.full(seconds, np.nan),
+        "cadence": np.full(seconds, np.nan),
+        "distance": np.full(seconds, np.nan),
+        "speed": np.full(seconds, np.nan),
+    }
+    return {**track, **streams}
+
+
+def test_track_round_trip():
+    track = read_fit_columns(FIT_FILE)
+    decoded = decode_track(encode_track(track))
+
+    assert list(decoded) == list(track)
+    np.testing.assert_array_equal(decoded["timestamp"], track["timestamp"])
+    for name in ["heart_rate", "distance"]:
+        np.testing.assert_allclose(decoded[name], track[name], rtol=1e-6)
+    assert np.isnan(decoded["position_lat"]).all()
+
+
+def test_track_float32_precision():
+    lat = 51.5 + np.arange(600) * 1e-5
+    track = columns(600, position_lat=lat, altitude=np.linspace(10, 70, 600))
+    decoded = decode_track(encode_track(track))
+
+    # float32 keeps positions to about half a metre
+    assert np.abs(decoded["position_lat"] - lat).max() < 5e-6
+    np.testing.assert_allclose(decoded["altitude"], track["altitude"], rtol=1e-6)
+
+
+def test_track_smaller_than_fit():
+    with open(FIT_FILE, "rb") as file:
+        data = file.read()
+    assert len(encode_track(read_fit_columns(data))) < len(data) / 2
+
+
+def test_decode_track_rejects_unknown_format():
+    data = bytearray(encode_track(columns(10)))
+    data[0] = 99
+    with pytest.raises(ValueError):
+        decode_track(bytes(data))
+
+
+def test_track_splits():
+    # 2500 m at 4 m/s, climbing 1 m per 100 m, heart rate in the first 1000 m
+    distance = np.arange(626) * 4.0
+    heart_rate = np.where(distance <= 1000, 150.0, np.nan)
+    track = columns(
+        626, distance=distance, heart_rate=heart_rate, altitude=distance / 100
+    )
+
+    splits = track_splits(track, 1000)
+    assert [split["distance_m"] for split in splits] == [1000, 1000, 500]
+    assert [split["duration_s"] for split in splits] == [250, 250, 125]
+    assert [split["heart_rate"] for split in splits] == [150, None, None]
+    assert [split["elevation_gain"] for split in splits] == pytest.approx([10, 10, 5])
+
+
+def test_track_splits_without_distance():
+    assert track_splits(columns(10), 1000) == []
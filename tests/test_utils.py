@@ -0,0 +1,174 @@
+import csv
+import os
+from datetime import datetime
+
+import pytest
+from fitparse import FitFile
+
+from running_analyzer import utils
+from running_analyzer.models import DistanceUnit, RunType
+from running_analyzer.utils import (
+    RejectsWriter,
+    iter_fit_records,
+    iter_run_rows,
+    parse_run_chunk,
+    parse_fit_file,
+    parse_run_row,
+    run_row_hash,
+    write_runs_to_csv,
+)
+
+FIT_FILE = "data/Morning_Run.fit"
+HEADER = "date,distance,unit,duration,heart_rate,elevation_gain,pace,run_type,location,notes\n"
+
+
+def write_csv(path, *lines):
+    path.write_text(HEADER + "".join(f"{line}\n" for line in lines))
+    return str(path)
+
+
+def test_iter_run_rows(tmp_path):
+    csv_file = write_csv(
+        tmp_path / "runs.csv",
+        "2025-02-18,10,km,50,150,80,5,Easy,Park,",
+        "2025-02-16,5,mi,40,,,,Tempo,,Tough run",
+    )
+
+    rows = list(iter_run_rows(csv_file))
+
+    assert len(rows) == 2
+    assert rows[0]["date"] == datetime(2025, 2, 18)
+    assert rows[0]["distance_m"] == 10000
+    assert rows[0]["pace_s_per_km"] == 300
+    assert rows[1]["unit"] == DistanceUnit.MILES
+    assert rows[1]["run_type"] == RunType.TEMPO
+    assert "id" not in rows[0]
+
+
+def test_iter_run_rows_writes_rejects(tmp_path):
+    csv_file = write_csv(
+        tmp_path / "runs.csv",
+        "not-a-date,10,km,50,150,80,5,Easy,Park,",
+        "2025-02-16,5,mi,40,,,,Sprint,,",
+        "2025-02-15,5,mi,40,,,,Long,,",
+    )
+    rejects_path = tmp_path / "rejects.csv"
+
+    with RejectsWriter(rejects_path) as rejects:
+        rows = list(iter_run_rows(csv_file, rejects))
+
+    assert len(rows) == 1
+    assert rejects.count == 2
+    with open(rejects_path, newline="") as file:
+        rejected = list(csv.DictReader(file))
+    assert [row["date"] for row in rejected] == ["not-a-date", "2025-02-16"]
+    assert "Sprint" in rejected[1]["error"]
+
+
+def test_rejects_writer_is_lazy(tmp_path):
+    with RejectsWriter(tmp_path / "rejects.csv") as rejects:
+        pass
+
+    assert rejects.count == 0
+    assert not (tmp_path / "rejects.csv").exists()
+
+
+def test_iter_run_rows_readme_format(tmp_path):
+    csv_file = tmp_path / "runs.csv"
+    csv_file.write_text(
+        "Date,Distance,Unit,Duration (min),Heart Rate,Elevation Gain,Pace,Run Type,Location,Notes\n"
+        "2025-02-15,10.5,km,55,150,200,5:14,Tempo,Park,Good run\n"
+        "2025-02-10,8.0,mi,44,145,180,7:10,Long,Trail,Felt strong\n"
+    )
+
+    rows = list(iter_run_rows(str(csv_file)))
+
+    assert [row["pace"] for row in rows] == [
+        pytest.approx(5 + 14 / 60),
+        pytest.approx(7 + 10 / 60),
+    ]
+    assert rows[0]["duration"] == 55
+    assert rows[1]["run_type"] == RunType.LONG
+    assert rows[1]["notes"] == "Felt strong"
+
+
+def test_fast_parse_matches_model():
+    with open("data/fake_run_data.csv", newline="") as file:
+        chunk = list(csv.DictReader(file))
+
+    assert parse_run_chunk(chunk) == [
+        parse_run_row(row).model_dump(exclude={"id", "athlete_id", "source_hash"})
+        for row in chunk
+    ]
+
+
+def test_iter_run_rows_falls_back_to_model(tmp_path):
+    csv_file = write_csv(
+        tmp_path / "runs.csv",
+        "2025-02-18,10,km,50,150,80,5,Easy,Park,",
+        "2025-02-18T06:30:00+01:00,10,km,50,150,80,5,Easy,Park,",
+        "2025-02-18,-3,km,50,150,80,5,Easy,Park,",
+    )
+    chunk = [
+        {"date": "2025-02-18T06:30:00+01:00", "distance": "10", "unit": "km"},
+    ]
+    assert parse_run_chunk(chunk) == [None]
+
+    with RejectsWriter(tmp_path / "rejects.csv") as rejects:
+        rows = list(iter_run_rows(csv_file, rejects, chunk_size=2))
+
+    assert len(rows) == 2
+    assert rows[1]["date"].utcoffset() is not None
+    assert rejects.count == 1
+
+
+def test_write_runs_to_csv_round_trip(tmp_path):
+    with open("data/fake_run_data.csv", newline="") as file:
+        runs = [parse_run_row(row) for row in csv.DictReader(file)]
+    csv_file = str(tmp_path / "export.csv")
+
+    assert write_runs_to_csv(runs, csv_file) == len(runs)
+    rows = [run.model_dump(exclude={"id", "athlete_id", "source_hash"}) for run in runs]
+    assert list(iter_run_rows(csv_file)) == [
+        {**row, "source_hash": run_row_hash(row)} for row in rows
+    ]
+
+
+def test_iter_fit_records_stops_decoding_early():
+    with open(FIT_FILE, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        records = iter_fit_records(file)
+        first = [next(records) for _ in range(3)]
+        assert file.tell() < size / 2
+        records.close()
+        assert file.closed
+
+    assert first == parse_fit_file(FIT_FILE)[:3]
+
+
+def test_iter_fit_records_drops_decoded_messages(monkeypatch):
+    files = []
+
+    class RecordingFitFile(FitFile):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            files.append(self)
+
+    monkeypatch.setattr(utils, "FitFile", RecordingFitFile)
+    cached = [len(files[0]._messages) for _ in iter_fit_records(FIT_FILE)]
+    assert len(cached) == 265
+    assert max(cached) == 0
+
+
+def test_iter_fit_records_fields():
+    records = list(iter_fit_records(FIT_FILE, {"timestamp", "heart_rate"}))
+    assert len(records) == 265
+    assert records[1] == {"heart_rate": 76, "timestamp": "2025-02-22T15:55:47"}
+
+
+def test_iter_fit_records_skips_records_without_fields():
+    # heart rate and distance come in separate records
+    records = list(iter_fit_records(FIT_FILE, {"heart_rate"}))
+    assert len(records) == 122
+    assert records[0] == {"heart_rate": 76}
+    assert list(iter_fit_records(FIT_FILE, {"no_such_field"})) == []